@@ -0,0 +1,103 @@
+import io
+import csv
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+# Bulk license provisioning for the admin dashboard.
+# An operation builds all its rows here, writes them with one batched
+# repository call and hands the outcome back as a CSV to download (e.g. the
+# keys to pass on to a reseller).
+#
+# Import files are CSV with a header row; recognised columns are key, note
+# and days. A missing key is generated, a missing days uses the form value.
+# Keys are stored exactly as written (license lookups are case sensitive):
+#   key,note,days
+#   ,reseller-42,30
+#   TRADER-0A1B2C3D,vip,365
+
+MAX_BULK = 5000
+MAX_DAYS = 36500
+ACTIONS = ("extend", "revoke", "reset_hwid")
+RESULT_COLUMNS = ["key", "note", "status", "hwid", "expires_at", "result"]
+IMPORT_COLUMNS = {"key", "note", "days"}
+
+def new_key() -> str:
+    return f"TRADER-{str(uuid.uuid4())[:8].upper()}"
+
+def valid_days(days: int) -> bool:
+    return 1 <= days <= MAX_DAYS
+
+def expiry(days: int, start: Optional[datetime] = None) -> str:
+    return ((start or datetime.utcnow()) + timedelta(days=days)).isoformat()
+
+def parse_expiry(value: Optional[str]) -> Optional[datetime]:
+    """Stored expiry as naive UTC (Supabase returns offsets, SQLite doesn't)."""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def new_licenses(count: int, days: int, note: Optional[str] = None) -> List[dict]:
+    keys = set()
+    while len(keys) < count:
+        keys.add(new_key())
+    expires_at = expiry(days)
+    return [{"key": key, "status": "ACTIVE", "note": note, "expires_at": expires_at} for key in keys]
+
+def parse_import(data: bytes, default_days: int) -> Tuple[List[dict], List[dict]]:
+    """(rows to insert, rejected rows with a "result"). Raises ValueError for an unusable file."""
+    try:
+        text = data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise ValueError("File is not UTF-8 text")
+    reader = csv.DictReader(io.StringIO(text))
+    reader.fieldnames = [name.strip().lower() for name in reader.fieldnames or []]
+    if not IMPORT_COLUMNS & set(reader.fieldnames):
+        raise ValueError("CSV needs a header row with a key, note or days column")
+
+    rows, rejected, seen = [], [], set()
+    for line in reader:
+        key = (line.get("key") or "").strip() or new_key()
+        note = (line.get("note") or "").strip() or None
+        try:
+            days = int(line.get("days") or default_days)
+        except ValueError:
+            days = 0
+        if not valid_days(days):
+            rejected.append({"key": key, "note": note, "result": "invalid days"})
+            continue
+        if key in seen:
+            rejected.append({"key": key, "note": note, "result": "duplicate in file"})
+            continue
+        seen.add(key)
+        rows.append({"key": key, "status": "ACTIVE", "note": note, "expires_at": expiry(days)})
+        if len(rows) > MAX_BULK:
+            raise ValueError(f"At most {MAX_BULK} licenses per import")
+    return rows, rejected
+
+def extended(license: dict, days: int, now: Optional[datetime] = None) -> dict:
+    """Update row for extending one license: from its expiry, or from now if it already lapsed."""
+    now = now or datetime.utcnow()
+    current = parse_expiry(license.get("expires_at"))
+    row = {"key": license["key"], "expires_at": expiry(days, max(now, current) if current else now),
+           "status": license["status"]}
+    if license["status"] == "EXPIRED":
+        row["status"] = "ACTIVE" # revoked licenses stay revoked
+    return row
+
+def split_keys(values: List[str]) -> List[str]:
+    """Selected keys, also accepting pasted lists (one field, comma or whitespace separated)."""
+    keys = []
+    for value in values:
+        keys.extend(value.replace(",", " ").split())
+    return list(dict.fromkeys(k.strip() for k in keys))
+
+def result_csv(rows: List[dict]) -> str:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=RESULT_COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue()
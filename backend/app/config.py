@@ -3,6 +3,19 @@ from pydantic_settings import BaseSettings
 class Settings(BaseSettings):
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
+    # Connection pool and failure handling, see app/redis_pool.py
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_POOL_TIMEOUT: float = 0.2
+    REDIS_SOCKET_TIMEOUT: float = 0.5
+    REDIS_CONNECT_TIMEOUT: float = 0.5
+    REDIS_HEALTH_CHECK_INTERVAL: float = 15
+    REDIS_BREAKER_FAILURES: int = 3
+    REDIS_BREAKER_RESET: float = 5
+    # Signals kept for history while Redis is down, flushed when it is back
+    REDIS_BUFFER_SIZE: int = 10000
+    # Direct API -> gateway fan-out while Redis is down ("http://gateway:8001,..."), shared secret
+    GATEWAY_URLS: str = ""
+    GATEWAY_TOKEN: str = ""
     API_SECRET_KEY: str = "supersecretkey"  # Change in production
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
@@ -11,6 +24,50 @@ class Settings(BaseSettings):
     DISCORD_TOKEN: str = ""
     TARGET_CHANNELS: str = ""
 
+    # License DB ("supabase" or "sqlite" for a local stand-in)
+    DB_BACKEND: str = "supabase"
+    SUPABASE_URL: str = ""
+    SUPABASE_KEY: str = ""
+    SQLITE_PATH: str = "licenses.db"
+    DB_MAX_WORKERS: int = 4
+    DB_TIMEOUT: float = 5.0
+
+    # Admission control (token buckets in Redis): rate = tokens/second, burst = bucket size
+    WS_ACCEPT_RATE: float = 50
+    WS_ACCEPT_BURST: float = 100
+    # After a gateway restart the accept rate ramps up from 10% over this many seconds
+    WS_RAMP_SECONDS: float = 30
+    VALIDATE_RATE: float = 20
+    VALIDATE_BURST: float = 50
+    VALIDATE_CLIENT_RATE: float = 0.2
+    VALIDATE_CLIENT_BURST: float = 5
+    INGEST_RATE: float = 50
+    INGEST_BURST: float = 200
+    EXECUTIONS_RATE: float = 100
+    EXECUTIONS_BURST: float = 500
+    EXECUTIONS_CLIENT_RATE: float = 200
+    EXECUTIONS_CLIENT_BURST: float = 1000
+    # Peers whose X-Forwarded-For is believed for per-client limits (comma separated IPs/CIDRs)
+    TRUSTED_PROXIES: str = "127.0.0.0/8,::1,10.0.0.0/8,172.16.0.0/12,192.168.0.0/16"
+    # Execution reports per signal (executions:{id}) are kept this long, and the
+    # executions export only covers signals from this window
+    EXECUTIONS_RETENTION_SECONDS: int = 86400
+
+    # WebSocket presence (app/presence.py): distinct devices per license, 0 = unlimited
+    DEVICE_LIMIT: int = 1
+    # Refuse sockets that don't send ?key= (older clients connect without one)
+    WS_REQUIRE_KEY: bool = True
+    # Risk template (app/risk_templates.json) for licenses without an assignment, "" = client's own risk settings
+    DEFAULT_RISK_TEMPLATE: str = ""
+
+    # Hot-path timing at startup (app/profiling.py), can also be switched at runtime
+    PROFILE_TIMING: bool = False
+
+    # Signal deadlines (seconds after the signal timestamp), see app/deadlines.py
+    SIGNAL_TTL_MARKET: float = 60
+    SIGNAL_TTL_PENDING: float = 3600
+    PROVIDER_TTL: str = "" # per provider override, "provider:seconds,..."
+
     class Config:
         env_file = ".env"
         extra = "ignore"
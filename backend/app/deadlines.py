@@ -0,0 +1,48 @@
+import time
+from typing import Dict, Optional
+from .config import settings
+from .symbols import registry as symbol_registry
+
+# Signal deadlines.
+# Every signal carries an absolute deadline (epoch ms). Past it the signal must
+# not be executed - the price has moved on - so each hop (ingest, gateway
+# broadcast, client pipeline, MT5 bridge, EA) drops it instead of doing work.
+#
+# TTL precedence: provider (PROVIDER_TTL) > symbol ("ttl" in symbols.json) >
+# order type (SIGNAL_TTL_MARKET / SIGNAL_TTL_PENDING), all in seconds.
+
+PENDING_SUFFIXES = ("_LIMIT", "_STOP")
+
+def parse_ttl_map(value: str) -> Dict[str, float]:
+    """"goldpro:60,fxdaily:300" -> {"goldpro": 60.0, "fxdaily": 300.0}"""
+    ttls = {}
+    for entry in value.split(","):
+        name, _, ttl = entry.strip().rpartition(":")
+        if name and ttl:
+            ttls[name] = float(ttl)
+    return ttls
+
+PROVIDER_TTL = parse_ttl_map(settings.PROVIDER_TTL)
+
+def now_ms() -> int:
+    return int(time.time() * 1000)
+
+def ttl_seconds(signal) -> float:
+    provider = signal.provider or signal.source
+    if provider in PROVIDER_TTL:
+        return PROVIDER_TTL[provider]
+    spec = symbol_registry.lookup(signal.symbol)
+    if spec and spec.get("ttl"):
+        return float(spec["ttl"])
+    if signal.type.value.endswith(PENDING_SUFFIXES):
+        return settings.SIGNAL_TTL_PENDING
+    return settings.SIGNAL_TTL_MARKET
+
+def assign_deadline(signal) -> int:
+    """Set signal.deadline from its timestamp if the sender didn't. Returns it."""
+    if signal.deadline is None:
+        signal.deadline = int(signal.timestamp.timestamp() * 1000 + ttl_seconds(signal) * 1000)
+    return signal.deadline
+
+def is_expired(deadline: Optional[int], now: Optional[int] = None) -> bool:
+    return bool(deadline) and (now if now is not None else now_ms()) > deadline
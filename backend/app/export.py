@@ -0,0 +1,44 @@
+import io
+import csv
+import json
+
+# Streaming CSV exports.
+# Each generator pages through the signal history and yields one CSV chunk per page,
+# so memory use stays constant no matter how much history is exported.
+
+SIGNAL_COLUMNS = ["id", "timestamp", "provider", "symbol", "type", "entry_price", "stop_loss",
+                  "take_profit", "take_profit_2", "take_profit_3", "source"]
+EXECUTION_COLUMNS = ["signal_id", "symbol", "leg", "ticket", "retcode", "comment",
+                     "fill_time_ms", "latency_ms", "received_at", "license_key"]
+
+def _rows_to_csv(rows, columns, header=False):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+    if header:
+        writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+async def signals_csv(history, **filters):
+    yield _rows_to_csv([], SIGNAL_COLUMNS, header=True)
+    async for page in history.iter_pages(**filters):
+        yield _rows_to_csv([json.loads(p) for p in page], SIGNAL_COLUMNS)
+
+async def executions_csv(history, redis_client, **filters):
+    yield _rows_to_csv([], EXECUTION_COLUMNS, header=True)
+    async for page in history.iter_pages(**filters):
+        signals = [json.loads(p) for p in page]
+        # One round trip per page for all the execution lists
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for signal in signals:
+                pipe.lrange(f"executions:{signal['id']}", 0, -1)
+            results = await pipe.execute()
+
+        rows = []
+        for signal, executions in zip(signals, results):
+            for raw in executions:
+                row = json.loads(raw)
+                row["symbol"] = signal.get("symbol")
+                rows.append(row)
+        if rows:
+            yield _rows_to_csv(rows, EXECUTION_COLUMNS)
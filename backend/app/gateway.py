@@ -0,0 +1,368 @@
+import asyncio
+import json
+import os
+import time
+import uuid
+import socket
+import logging
+from collections import OrderedDict
+from typing import Dict, Optional, Set
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request, HTTPException, Response
+from .config import settings
+from .ratelimit import limiter
+from .logs import setup_logging
+from .deadlines import is_expired
+from . import live
+from .redis_pool import command_client, subscriber_client, breaker, REDIS_ERRORS
+from . import presence
+from . import profiling
+from .profiling import timed
+from .risk import with_plan
+
+# Realtime gateway: WebSocket fan-out only.
+# No templates, sessions or Supabase here - signals come in through the Redis
+# "signals" channel (published by the API service) and go straight out to clients.
+# Run with: uvicorn app.gateway:app --port 8001
+
+setup_logging("gateway")
+logger = logging.getLogger(__name__)
+
+app = FastAPI(title="CopySignal Gateway", docs_url=None, redoc_url=None, openapi_url=None)
+
+profiling.timings.enabled = settings.PROFILE_TIMING
+
+redis_client = command_client()
+# Pub/sub sits idle between signals, it gets a connection without a read timeout
+subscriber = subscriber_client()
+
+SIGNAL_CHANNEL = "signals"
+
+# Close code for rejected handshakes ("Try Again Later"), the reason carries the hint
+TRY_AGAIN_LATER = 1013
+# Application close codes: license closed by an admin (or missing), device limit reached
+LICENSE_CLOSED = 4001
+DEVICE_LIMIT = 4003
+
+started_at = time.monotonic()
+# Identifies this process in the dashboard's connected-client total
+GATEWAY_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+def accept_limits():
+    """
+    (rate, burst) for WebSocket accepts. Right after a restart every client reconnects
+    at once, so both start at 10% and ramp up linearly over WS_RAMP_SECONDS.
+    """
+    ramp = settings.WS_RAMP_SECONDS
+    factor = min(1.0, max(0.1, (time.monotonic() - started_at) / ramp)) if ramp > 0 else 1.0
+    return settings.WS_ACCEPT_RATE * factor, max(1.0, settings.WS_ACCEPT_BURST * factor)
+
+class ConnectionManager:
+    """
+    Sockets of this process, by connection id, by license key (see app/presence.py)
+    and by risk template (see app/risk.py).
+    """
+
+    # Leaves kept for retry while Redis is down; beyond this the registry TTLs clean up
+    MAX_PENDING_LEAVES = 100000
+
+    def __init__(self):
+        self.active_connections: Dict[str, WebSocket] = {}
+        self.owners: Dict[str, tuple] = {} # conn id -> (license key, hwid)
+        self.by_key: Dict[str, Set[str]] = {}
+        self.templates: Dict[str, Optional[str]] = {} # conn id -> risk template
+        self.by_template: Dict[Optional[str], Set[str]] = {}
+        self.leaves = [] # (conn id, license key) not yet written to Redis
+
+    async def connect(self, websocket: WebSocket, conn_id: str, key: Optional[str] = None, hwid: Optional[str] = None,
+                      template: Optional[str] = None):
+        await websocket.accept()
+        self.active_connections[conn_id] = websocket
+        self._group(conn_id, template)
+        if key:
+            self.owners[conn_id] = (key, hwid)
+            self.by_key.setdefault(key, set()).add(conn_id)
+
+    def _group(self, conn_id: str, template: Optional[str]):
+        self._ungroup(conn_id)
+        self.templates[conn_id] = template
+        self.by_template.setdefault(template, set()).add(conn_id)
+
+    def _ungroup(self, conn_id: str):
+        if conn_id not in self.templates:
+            return
+        template = self.templates.pop(conn_id)
+        conns = self.by_template[template]
+        conns.discard(conn_id)
+        if not conns:
+            del self.by_template[template]
+
+    def disconnect(self, conn_id: str):
+        if self.active_connections.pop(conn_id, None) is None:
+            return
+        self._ungroup(conn_id)
+        owner = self.owners.pop(conn_id, None)
+        if owner:
+            conns = self.by_key.get(owner[0])
+            conns.discard(conn_id)
+            if not conns:
+                del self.by_key[owner[0]]
+            self.leaves.append((conn_id, owner[0]))
+            del self.leaves[:-self.MAX_PENDING_LEAVES]
+
+    def set_template(self, key: str, template: Optional[str]):
+        for conn_id in self.by_key.get(key, ()):
+            if self.templates.get(conn_id) != template:
+                self._group(conn_id, template)
+
+    def sockets(self) -> Dict[str, Dict[str, str]]:
+        """{license key: {conn id: hwid}} for the presence heartbeat."""
+        return {key: {conn: self.owners[conn][1] for conn in conns} for key, conns in self.by_key.items()}
+
+    async def close_license(self, key: str, reason: str):
+        for conn_id in list(self.by_key.get(key, ())):
+            websocket = self.active_connections.get(conn_id)
+            self.disconnect(conn_id)
+            if websocket:
+                try:
+                    await websocket.close(code=LICENSE_CLOSED, reason=reason)
+                except Exception:
+                    pass
+
+    async def _send(self, conn_ids, message: str):
+        # Iterate over a copy, dead sockets get removed as we go
+        for conn_id in list(conn_ids):
+            connection = self.active_connections.get(conn_id)
+            if connection is None:
+                continue
+            try:
+                await connection.send_text(message)
+            except Exception:
+                self.disconnect(conn_id)
+
+    @timed("gateway.broadcast")
+    async def broadcast(self, message: str):
+        await self._send(self.active_connections, message)
+
+    @timed("gateway.broadcast_signal")
+    async def broadcast_signal(self, signal: dict, payload: str):
+        """
+        Send each template group its own legs, serialized once per group. The other
+        templates' legs are stripped; sockets without a template get the bare signal.
+        """
+        plans = signal.pop("template_legs", None)
+        if not plans:
+            await self.broadcast(payload)
+            return
+        base = None
+        for template, conns in list(self.by_template.items()):
+            plan = plans.get(template) if template else None
+            if plan is None:
+                base = base or json.dumps(signal)
+                message = base
+            else:
+                message = json.dumps(with_plan(signal, template, plan))
+            await self._send(conns, message)
+
+manager = ConnectionManager()
+
+# Shared with the API service, see EXPIRED_STATS_KEY in app/main.py
+EXPIRED_STATS_KEY = "stats:expired"
+expired_dropped = 0
+
+# Ids relayed recently. While Redis is flaky the API may deliver a signal both
+# through pub/sub and directly (POST /internal/signals), clients get it once.
+RECENT_IDS = 10000
+recent_ids = OrderedDict()
+
+async def relay(payload: str):
+    """Broadcast one signal unless it was already relayed or is past its deadline (e.g. a backlog after a stall)."""
+    global expired_dropped
+    try:
+        signal = json.loads(payload)
+    except ValueError:
+        signal = None
+    if not isinstance(signal, dict):
+        await manager.broadcast(payload)
+        return
+    signal_id = signal.get("id")
+    if signal_id is not None:
+        if signal_id in recent_ids:
+            return
+        recent_ids[signal_id] = None
+        if len(recent_ids) > RECENT_IDS:
+            recent_ids.popitem(last=False)
+    if is_expired(signal.get("deadline")):
+        expired_dropped += 1
+        if breaker.allow():
+            try:
+                await redis_client.hincrby(EXPIRED_STATS_KEY, "gateway", 1)
+                breaker.success()
+            except REDIS_ERRORS as e:
+                breaker.failure(e)
+        return
+    await manager.broadcast_signal(signal, payload)
+
+async def relay_signals():
+    """Subscribe to Redis and forward every published signal to connected clients."""
+    while True:
+        pubsub = subscriber.pubsub()
+        try:
+            await pubsub.subscribe(SIGNAL_CHANNEL, presence.CONTROL_CHANNEL)
+            logger.info(f"Gateway subscribed to Redis channel '{SIGNAL_CHANNEL}'")
+            async for message in pubsub.listen():
+                if message["type"] != "message":
+                    continue
+                if message["channel"] == SIGNAL_CHANNEL:
+                    await relay(message["data"])
+                else:
+                    await on_control(message["data"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Redis subscription lost: {e}, retrying in 1s")
+            await asyncio.sleep(1)
+        finally:
+            await pubsub.close()
+
+async def on_control(payload: str):
+    """
+    Targeted disconnect published by the API (license revoked/deleted, admin action),
+    or a new risk template for a license's sockets.
+    """
+    try:
+        command = json.loads(payload)
+        key, reason = command["key"], command.get("reason", "disconnected")
+    except (ValueError, KeyError, TypeError):
+        return
+    if command.get("op") == "template":
+        manager.set_template(key, command.get("template") or settings.DEFAULT_RISK_TEMPLATE or None)
+        return
+    if key in manager.by_key:
+        logger.info(f"Closing {len(manager.by_key[key])} socket(s) of a license: {reason}", extra={"key": key})
+        await manager.close_license(key, reason)
+
+async def sync_presence():
+    """Leaves every FLUSH_INTERVAL, a full heartbeat every HEARTBEAT_INTERVAL, each as one pipeline."""
+    last_heartbeat = 0.0
+    while True:
+        if manager.leaves:
+            leaves, manager.leaves = manager.leaves, []
+            if not await presence.registry.flush_leaves(leaves):
+                manager.leaves[:0] = leaves
+        if time.monotonic() - last_heartbeat >= presence.HEARTBEAT_INTERVAL:
+            last_heartbeat = time.monotonic()
+            await presence.registry.heartbeat(GATEWAY_ID, manager.sockets(), len(manager.active_connections))
+            # Re-read template assignments too, a change published while Redis was down is picked up here
+            assigned = await presence.registry.templates_of(list(manager.by_key))
+            for key, template in (assigned or {}).items():
+                manager.set_template(key, template or settings.DEFAULT_RISK_TEMPLATE or None)
+        await asyncio.sleep(presence.FLUSH_INTERVAL)
+
+async def report_clients():
+    """Publish the connected-client count for the admin dashboard (see app/live.py)."""
+    while True:
+        await live.publish(redis_client, "clients", {"gateway": GATEWAY_ID, "clients": len(manager.active_connections)})
+        await asyncio.sleep(live.GATEWAY_REPORT_INTERVAL)
+
+tasks = []
+
+@app.on_event("startup")
+async def startup_event():
+    tasks.extend([asyncio.create_task(relay_signals()), asyncio.create_task(report_clients()),
+                  asyncio.create_task(sync_presence())])
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    for task in tasks:
+        task.cancel()
+    await presence.registry.remove_gateway(GATEWAY_ID)
+
+@app.get("/")
+async def root():
+    return {"message": "CopySignal Gateway Running", "clients": len(manager.active_connections),
+            "expired_dropped": expired_dropped}
+
+def check_token(request: Request):
+    """Internal endpoints take the shared GATEWAY_TOKEN, the gateway has no admin sessions."""
+    if not settings.GATEWAY_TOKEN or request.headers.get("x-gateway-token") != settings.GATEWAY_TOKEN:
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+# Direct fan-out from the API while Redis is down (see app/publisher.py)
+@app.post("/internal/signals")
+async def direct_signals(request: Request):
+    check_token(request)
+    body = await request.json()
+    for payload in body.get("signals", []):
+        await relay(payload)
+    return {"relayed": len(body.get("signals", []))}
+
+# Opt-in profiling of this gateway process (app/profiling.py)
+@app.get("/internal/debug/profile")
+async def debug_profile(request: Request, seconds: float = 10, mode: str = "cprofile"):
+    check_token(request)
+    try:
+        data = await profiling.capture(seconds, mode)
+    except profiling.CaptureBusy:
+        raise HTTPException(status_code=409, detail="A profile is already being captured")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    filename = profiling.capture_filename(f"gateway_{GATEWAY_ID.replace(':', '_')}", mode)
+    return Response(data, media_type="application/octet-stream",
+                    headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+@app.get("/internal/debug/timing")
+async def debug_timing(request: Request):
+    check_token(request)
+    return {"enabled": profiling.timings.enabled, "functions": profiling.timings.table()}
+
+@app.post("/internal/debug/timing")
+async def set_debug_timing(request: Request, enabled: bool, reset: bool = False):
+    check_token(request)
+    if reset:
+        profiling.timings.reset()
+    profiling.timings.enabled = enabled
+    return {"enabled": enabled}
+
+@app.websocket("/ws/signals")
+async def websocket_endpoint(websocket: WebSocket):
+    rate, burst = accept_limits()
+    allowed, retry_after = await limiter.acquire("ws_accept", rate, burst)
+    if not allowed:
+        # Accept then close, a handshake rejection can't carry a reason to the client
+        await websocket.accept()
+        await websocket.close(code=TRY_AGAIN_LATER, reason=f"retry-after={retry_after:.1f}")
+        return
+
+    # Clients identify with ?key=<license>&hwid=<device>, older clients connect without
+    key = websocket.query_params.get("key") or None
+    hwid = websocket.query_params.get("hwid") or None
+    conn_id = uuid.uuid4().hex
+    if not key and settings.WS_REQUIRE_KEY:
+        await websocket.accept()
+        await websocket.close(code=LICENSE_CLOSED, reason="license-required")
+        return
+    if key:
+        # Only a pair that passed /dashboard/validate gets in, so an unvalidated
+        # key can't take up a license's device slots
+        problem = await presence.registry.is_valid(key, hwid)
+        if problem:
+            await websocket.accept()
+            await websocket.close(code=LICENSE_CLOSED, reason=f"license-{problem}")
+            return
+        # A socket without a hwid counts as a device of its own
+        devices = await presence.registry.join(conn_id, key, hwid or conn_id, GATEWAY_ID, settings.DEVICE_LIMIT)
+        if devices is not None:
+            await websocket.accept()
+            await websocket.close(code=DEVICE_LIMIT, reason=f"device-limit={settings.DEVICE_LIMIT}")
+            return
+
+    template = await presence.registry.template(key) if key else None
+    await manager.connect(websocket, conn_id, key, hwid or conn_id, template or settings.DEFAULT_RISK_TEMPLATE or None)
+    try:
+        while True:
+            # Keep connection alive
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        manager.disconnect(conn_id)
@@ -0,0 +1,107 @@
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+# Persistent signal history in Redis.
+# Every signal is kept as signal:{id} and indexed in sorted sets scored by
+# timestamp (ms), so queries are ZREVRANGEBYSCORE range scans - no KEYS/SCAN:
+#   signals:by_time
+#   signals:by_symbol:{symbol}
+#   signals:by_provider:{provider}
+#   signals:by_symbol_provider:{symbol}:{provider}
+
+# Pages are cursor paginated with (score, signal id): ties on a timestamp come
+# back in reverse lexical order of the id, so a page resumes with the members of
+# the cursor's score ranked after its id, then the range strictly below it.
+
+MAX_PAGE_SIZE = 500
+
+def to_ms(value: datetime) -> int:
+    # Naive datetimes (e.g. ?since=2026-01-01) are UTC, like the stored signal timestamps
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp() * 1000)
+
+def encode_cursor(score: float, signal_id: str) -> str:
+    return f"{int(score)}:{signal_id}"
+
+def decode_cursor(cursor: str) -> Tuple[int, str]:
+    score, _, signal_id = cursor.partition(":")
+    return int(score), signal_id
+
+class SignalHistory:
+    def __init__(self, redis_client):
+        self.redis = redis_client
+
+    @staticmethod
+    def index_key(symbol: Optional[str] = None, provider: Optional[str] = None) -> str:
+        if symbol and provider:
+            return f"signals:by_symbol_provider:{symbol}:{provider}"
+        if symbol:
+            return f"signals:by_symbol:{symbol}"
+        if provider:
+            return f"signals:by_provider:{provider}"
+        return "signals:by_time"
+
+    def add(self, pipe, signal, payload: str):
+        """Queue the writes for one signal on an existing pipeline."""
+        score = to_ms(signal.timestamp)
+        provider = signal.provider or signal.source
+        pipe.set(f"signal:{signal.id}", payload)
+        pipe.zadd(self.index_key(), {signal.id: score})
+        pipe.zadd(self.index_key(symbol=signal.symbol), {signal.id: score})
+        pipe.zadd(self.index_key(provider=provider), {signal.id: score})
+        pipe.zadd(self.index_key(symbol=signal.symbol, provider=provider), {signal.id: score})
+
+    async def query(self, symbol: Optional[str] = None, provider: Optional[str] = None,
+                    since: Optional[int] = None, until: Optional[int] = None,
+                    limit: int = 50, cursor: Optional[str] = None) -> Tuple[List[str], Optional[str]]:
+        """
+        Newest first. Returns (signal JSON payloads, next cursor or None).
+        since/until are epoch milliseconds.
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        key = self.index_key(symbol, provider)
+
+        max_score = until if until is not None else "+inf"
+        min_score = since if since is not None else "-inf"
+        rows = []
+        if cursor:
+            cursor_score, cursor_id = decode_cursor(cursor)
+            if until is None or cursor_score <= until:
+                if since is None or cursor_score >= since:
+                    rows = await self._ties_after(key, cursor_score, cursor_id, limit + 1)
+                max_score = f"({cursor_score}"
+
+        if len(rows) <= limit:
+            rows += await self.redis.zrevrangebyscore(key, max_score, min_score, start=0,
+                                                      num=limit + 1 - len(rows), withscores=True)
+
+        page = rows[:limit]
+        next_cursor = encode_cursor(page[-1][1], page[-1][0]) if len(rows) > limit else None
+
+        if not page:
+            return [], None
+        payloads = await self.redis.mget([f"signal:{m}" for m, _ in page])
+        return [p for p in payloads if p], next_cursor
+
+    async def _ties_after(self, key: str, score: int, member: str, num: int) -> List[Tuple[str, float]]:
+        """Up to num members sharing the cursor's score that rank after it (lexically smaller ids)."""
+        rows, offset = [], 0
+        while len(rows) < num:
+            chunk = await self.redis.zrevrangebyscore(key, score, score, start=offset, num=MAX_PAGE_SIZE, withscores=True)
+            rows += [(m, s) for m, s in chunk if m < member]
+            if len(chunk) < MAX_PAGE_SIZE:
+                break
+            offset += len(chunk)
+        return rows[:num]
+
+    async def iter_pages(self, symbol: Optional[str] = None, provider: Optional[str] = None,
+                         since: Optional[int] = None, until: Optional[int] = None, page_size: int = MAX_PAGE_SIZE):
+        """Yield pages of signal payloads (newest first) until the range is exhausted."""
+        cursor = None
+        while True:
+            payloads, cursor = await self.query(symbol, provider, since, until, page_size, cursor)
+            if payloads:
+                yield payloads
+            if not cursor:
+                break
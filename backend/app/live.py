@@ -0,0 +1,225 @@
+import asyncio
+import json
+import time
+import uuid
+import logging
+from collections import deque
+from typing import Optional
+from .history import SignalHistory
+from .redis_pool import command_client, subscriber_client, breaker, REDIS_ERRORS
+
+logger = logging.getLogger(__name__)
+
+# Live admin dashboard feed (server-sent events).
+# One hub per API process subscribes to the Redis "signals" and "dashboard"
+# channels and fans events out to every open /dashboard/events stream. Admin
+# actions publish only the row they changed, so an action costs O(change)
+# instead of a redirect that re-queries and re-renders the whole licenses table.
+# Each event is serialized once and the same frame is queued for every viewer.
+#
+#   license  {"op": "upsert", "license": {...}} or {"op": "delete", "key": ...}
+#   signal   one published signal (trimmed to what the table shows)
+#   signals  the recent signals, sent once when a stream opens
+#   stats    {"clients", "signals_per_min", "signals_total"} every STATS_INTERVAL
+#   resync   the stream can't be resumed (or the viewer fell behind), reload the page
+#
+# Gateways publish their connected-client count on the same channel every
+# GATEWAY_REPORT_INTERVAL; a gateway that stops reporting drops out of the total.
+
+DASHBOARD_CHANNEL = "dashboard"
+SIGNAL_CHANNEL = "signals"
+
+STATS_INTERVAL = 1.0
+GATEWAY_REPORT_INTERVAL = 2.0
+GATEWAY_STALE_S = 10.0
+KEEPALIVE_S = 15.0
+RECENT_SIGNALS = 20
+# License events kept for Last-Event-ID resume after a dropped connection
+REPLAY_EVENTS = 200
+# Frames a viewer may fall behind before it is told to resync
+SUBSCRIBER_QUEUE = 256
+
+SIGNAL_FIELDS = ("id", "timestamp", "symbol", "type", "entry_price", "provider", "source")
+
+def sse(event: str, data, event_id: Optional[str] = None) -> str:
+    frame = f"id: {event_id}\n" if event_id else ""
+    return frame + f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+async def publish(redis_client, event: str, data):
+    """Send one event to the dashboard hubs of every API process. Best effort."""
+    try:
+        await redis_client.publish(DASHBOARD_CHANNEL, json.dumps({"event": event, "data": data}, default=str))
+    except Exception as e:
+        logger.warning(f"Dashboard event '{event}' not published: {e}")
+
+class Subscriber:
+    def __init__(self):
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE)
+
+    def send(self, frame: str) -> bool:
+        try:
+            self.queue.put_nowait(frame)
+            return True
+        except asyncio.QueueFull:
+            # Too slow to keep up: drop what is queued and tell it to reload
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+            return False
+
+class DashboardHub:
+    def __init__(self, redis_client, subscriber):
+        self.redis = redis_client
+        self.subscriber = subscriber
+        self.history = SignalHistory(redis_client)
+        # Event ids are "{instance}:{seq}", a viewer reconnecting to another worker gets a resync
+        self.instance = uuid.uuid4().hex[:8]
+        self.seq = 0
+        self.backlog = deque(maxlen=REPLAY_EVENTS) # (seq, frame)
+        self.subscribers = set()
+        self.recent = deque(maxlen=RECENT_SIGNALS)
+        self.per_second = deque([0] * 60, maxlen=60) # signals per second over the last minute
+        self.second = int(time.monotonic())
+        self.gateways = {} # gateway id -> (clients, last report)
+        self.tasks = []
+
+    async def start(self):
+        try:
+            payloads, _ = await self.history.query(limit=RECENT_SIGNALS)
+            for payload in reversed(payloads):
+                self.recent.append(self._trim(json.loads(payload)))
+        except Exception as e:
+            logger.warning(f"Dashboard hub could not load recent signals: {e}")
+        self.tasks = [asyncio.create_task(self._listen()), asyncio.create_task(self._tick())]
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        self.tasks = []
+
+    @staticmethod
+    def _trim(signal: dict) -> dict:
+        return {k: signal.get(k) for k in SIGNAL_FIELDS}
+
+    def _roll(self):
+        now = int(time.monotonic())
+        for _ in range(min(now - self.second, 60)):
+            self.per_second.append(0)
+        self.second = now
+
+    def _broadcast(self, frame: str):
+        for subscriber in list(self.subscribers):
+            if not subscriber.send(frame):
+                self.subscribers.discard(subscriber)
+
+    def clients(self) -> int:
+        cutoff = time.monotonic() - GATEWAY_STALE_S
+        return sum(count for count, seen in self.gateways.values() if seen >= cutoff)
+
+    def recent_signals(self) -> list:
+        """Newest first."""
+        return list(reversed(self.recent))
+
+    async def stats(self) -> dict:
+        self._roll()
+        total = None
+        if breaker.allow():
+            try:
+                total = await self.redis.zcard(self.history.index_key())
+                breaker.success()
+            except REDIS_ERRORS as e:
+                breaker.failure(e)
+        return {"clients": self.clients(), "signals_per_min": sum(self.per_second), "signals_total": total}
+
+    def _on_signal(self, payload: str):
+        try:
+            signal = self._trim(json.loads(payload))
+        except (ValueError, AttributeError):
+            return
+        self._roll()
+        self.per_second[-1] += 1
+        self.recent.append(signal)
+        if self.subscribers:
+            self._broadcast(sse("signal", signal))
+
+    def _on_event(self, payload: str):
+        try:
+            message = json.loads(payload)
+            event, data = message["event"], message["data"]
+        except (ValueError, KeyError, TypeError):
+            return
+        if event == "clients":
+            self.gateways[data["gateway"]] = (int(data["clients"]), time.monotonic())
+            return
+        self.seq += 1
+        frame = sse(event, data, f"{self.instance}:{self.seq}")
+        self.backlog.append((self.seq, frame))
+        self._broadcast(frame)
+
+    async def _listen(self):
+        while True:
+            pubsub = self.subscriber.pubsub()
+            try:
+                await pubsub.subscribe(SIGNAL_CHANNEL, DASHBOARD_CHANNEL)
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    if message["channel"] == SIGNAL_CHANNEL:
+                        self._on_signal(message["data"])
+                    else:
+                        self._on_event(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Dashboard hub lost its Redis subscription: {e}, retrying in 1s")
+                # Events published meanwhile are gone, open streams must reload
+                self._broadcast(sse("resync", {}))
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.close()
+
+    async def _tick(self):
+        while True:
+            await asyncio.sleep(STATS_INTERVAL)
+            if self.subscribers:
+                self._broadcast(sse("stats", await self.stats()))
+
+    def _resume(self, last_event_id: Optional[str]):
+        """Frames missed since last_event_id, or None if they are no longer available."""
+        instance, _, seq = (last_event_id or "").partition(":")
+        if instance != self.instance or not seq.isdigit():
+            return None
+        seq = int(seq)
+        if seq < self.seq and (not self.backlog or self.backlog[0][0] > seq + 1):
+            return None
+        return [frame for s, frame in self.backlog if s > seq]
+
+    async def stream(self, last_event_id: Optional[str] = None):
+        """SSE frames for one viewer, until it disconnects."""
+        subscriber = Subscriber()
+        self.subscribers.add(subscriber)
+        try:
+            if last_event_id:
+                missed = self._resume(last_event_id)
+                if missed is None:
+                    yield sse("resync", {})
+                    return
+                for frame in missed:
+                    yield frame
+            yield "retry: 3000\n\n"
+            yield sse("signals", self.recent_signals())
+            yield sse("stats", await self.stats())
+            while True:
+                try:
+                    frame = await asyncio.wait_for(subscriber.queue.get(), KEEPALIVE_S)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if frame is None:
+                    yield sse("resync", {})
+                    return
+                yield frame
+        finally:
+            self.subscribers.discard(subscriber)
+
+hub = DashboardHub(command_client(), subscriber_client())
@@ -0,0 +1,130 @@
+import os
+import json
+import queue
+import atexit
+import logging
+import logging.handlers
+from datetime import datetime, timezone
+
+# Shared logging setup for the API, gateway and bot.
+# Callers only pay for putting the record on a queue (QueueHandler); a
+# QueueListener thread formats it and writes to stderr and a rotated JSON-lines
+# file. High-volume DEBUG events are sampled before they are even queued.
+#
+#   from app.logs import setup_logging
+#   setup_logging("bot")
+#   logger.info("signal pushed", extra={"signal_id": ..., "symbol": ...})
+#
+# LOG_LEVEL, LOG_DIR, LOG_MAX_BYTES, LOG_BACKUPS, LOG_ROTATE_WHEN (e.g. "midnight",
+# time-based instead of size-based) and LOG_DEBUG_SAMPLE (keep 1 in N) come from the env.
+
+# Attributes every LogRecord has, anything else came in through `extra`
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "color_message"}
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg plus any `extra` fields."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class ConsoleFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record):
+        text = super().format(record)
+        extra = {k: v for k, v in record.__dict__.items() if k not in _RESERVED and not k.startswith("_")}
+        if extra:
+            text += " " + " ".join(f"{k}={v}" for k, v in extra.items())
+        return text
+
+class SamplingFilter(logging.Filter):
+    """Keeps 1 in `every` DEBUG records per call site. INFO and above always pass."""
+
+    def __init__(self, every):
+        super().__init__()
+        self.every = max(1, every)
+        self.counts = {}
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self.every == 1:
+            return True
+        site = (record.pathname, record.lineno)
+        count = self.counts.get(site, 0)
+        self.counts[site] = count + 1
+        return count % self.every == 0
+
+class LocalQueueHandler(logging.handlers.QueueHandler):
+    # Same-process queue: skip the default prepare(), which formats the message on the caller's thread
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass # never block the caller, a full queue drops the record
+
+_listener = None
+
+def setup_logging(service, level=None, log_dir=None):
+    """Install the queue handler on the root logger (once per process)."""
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    level = level or os.getenv("LOG_LEVEL", "INFO")
+    log_dir = log_dir or os.getenv("LOG_DIR", "logs")
+
+    handlers = []
+    file_error = None
+    console = logging.StreamHandler()
+    console.setFormatter(ConsoleFormatter())
+    handlers.append(console)
+
+    try:
+        os.makedirs(log_dir, exist_ok=True)
+        path = os.path.join(log_dir, f"{service}.log")
+        when = os.getenv("LOG_ROTATE_WHEN")
+        if when:
+            file_handler = logging.handlers.TimedRotatingFileHandler(
+                path, when=when, backupCount=int(os.getenv("LOG_BACKUPS", "7")), utc=True)
+        else:
+            file_handler = logging.handlers.RotatingFileHandler(
+                path, maxBytes=int(os.getenv("LOG_MAX_BYTES", str(20 * 1024 * 1024))),
+                backupCount=int(os.getenv("LOG_BACKUPS", "7")))
+        file_handler.setFormatter(JsonFormatter())
+        handlers.append(file_handler)
+    except OSError as e:
+        file_error = e
+
+    log_queue = queue.Queue(maxsize=int(os.getenv("LOG_QUEUE_SIZE", "10000")))
+    queue_handler = LocalQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(int(os.getenv("LOG_DEBUG_SAMPLE", "100"))))
+
+    root = logging.getLogger()
+    root.handlers[:] = [queue_handler]
+    root.setLevel(level)
+    # uvicorn installs its own synchronous stream handlers, route its loggers through the queue too
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers[:] = []
+        uvicorn_logger.propagate = True
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+    if file_error:
+        logging.getLogger(__name__).warning(f"File logging disabled: {file_error}")
+    return _listener
@@ -1,13 +1,38 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse, JSONResponse, Response
+from typing import Optional
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
-from typing import List
-import json
-import redis.asyncio as redis
+from redis.exceptions import RedisError
+from pydantic import ValidationError
 from .config import settings
-from .models import Signal
+from .models import Signal, SignalBatch, ExecutionBatch, RiskAssignment
+from .symbols import registry as symbol_registry
+from .history import SignalHistory
+from . import export
+from .ratelimit import limiter, rate_limit, too_many_requests, client_ip
+from .logs import setup_logging
+from .deadlines import assign_deadline, is_expired, now_ms
+from .risk import templates as risk_templates, assign_legs
+from .live import hub as dashboard_hub
+from .redis_pool import command_client, breaker
+from .publisher import SignalPublisher
+from .presence import registry as presence
+from . import profiling
+from .profiling import timed
+import json
+import logging
 from app.routers import dashboard
 import os
+from datetime import datetime
+
+# Admin dashboard + license/ingest API.
+# The WebSocket fan-out lives in app/gateway.py and runs as its own service;
+# signals reach it through the Redis "signals" channel.
+setup_logging("api")
+logger = logging.getLogger(__name__)
+# Audit trail of every accepted signal (one structured line per signal)
+audit = logging.getLogger("audit.signals")
 
 app = FastAPI(title="CopySignal Backend")
 
@@ -22,65 +47,277 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Redis Connection
-redis_client = redis.Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT, decode_responses=True)
-
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
-
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
+# Redis Connection (pooled, see app/redis_pool.py)
+redis_client = command_client()
+history = SignalHistory(redis_client)
 
-    def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+# Per-hop counters of signals dropped past their deadline (HINCRBY by hop name)
+EXPIRED_STATS_KEY = "stats:expired"
 
-    async def broadcast(self, message: str):
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message)
-            except:
-                self.disconnect(connection)
+profiling.timings.enabled = settings.PROFILE_TIMING
 
-manager = ConnectionManager()
+publisher = SignalPublisher(redis_client, history, breaker, "signals", EXPIRED_STATS_KEY,
+                            settings.GATEWAY_URLS, settings.GATEWAY_TOKEN, settings.REDIS_BUFFER_SIZE)
 
 @app.on_event("startup")
 async def startup_event():
     # Test Redis connection
     try:
         await redis_client.ping()
-        print("Connected to Redis")
+        logger.info("Connected to Redis")
     except Exception as e:
-        print(f"Failed to connect to Redis: {e}")
+        breaker.failure(e)
+        logger.error(f"Failed to connect to Redis: {e}")
+    await publisher.start()
+    await dashboard_hub.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await dashboard_hub.stop()
+    await publisher.stop()
+    if dashboard.repo:
+        dashboard.repo.close()
 
 @app.get("/")
 async def root():
     return {"message": "CopySignal Backend Running"}
 
-@app.websocket("/ws/signals")
-async def websocket_endpoint(websocket: WebSocket):
-    await manager.connect(websocket)
-    try:
-        while True:
-            # Keep connection alive
-            await websocket.receive_text()
-    except WebSocketDisconnect:
-        manager.disconnect(websocket)
+@app.exception_handler(RedisError)
+async def redis_unavailable(request: Request, exc: RedisError):
+    # Reads (history, exports) can't be served without Redis, fail fast instead of a 500
+    breaker.failure(exc)
+    return JSONResponse(status_code=503, content={"detail": "Signal store unavailable, retry later"})
+
+def audit_signal(signal, expired=False):
+    audit.info("signal expired on ingest" if expired else "signal received",
+               extra={"signal_id": signal.id, "symbol": signal.symbol, "type": signal.type,
+                      "provider": signal.provider or signal.source, "deadline": signal.deadline})
 
 # Internal endpoint for Discord Bot to push signals
-@app.post("/api/v1/signals")
+@app.post("/api/v1/signals", dependencies=[Depends(rate_limit("ingest", settings.INGEST_RATE, settings.INGEST_BURST))])
+@timed("api.push_signal")
 async def push_signal(signal: Signal):
-    # 1. Save to Redis
-    await redis_client.set(f"signal:{signal.id}", signal.json(), ex=3600)
-    
-    # 2. Publish to Redis Channel (for scalability)
-    await redis_client.publish("signals", signal.json())
-    
-    # 3. Broadcast to connected WebSockets
-    await manager.broadcast(signal.json())
-    
-    return {"status": "received", "signal_id": signal.id}
+    assign_deadline(signal)
+    expired = is_expired(signal.deadline)
+    if not expired:
+        assign_legs(signal)
+
+    # Save to history and publish to the gateways in one round trip (or straight to
+    # the gateways while Redis is down). A signal that is already past its deadline
+    # is kept in history only.
+    await publisher.store([(signal, signal.json(), expired)])
+
+    audit_signal(signal, expired)
+    return {"status": "expired" if expired else "received", "signal_id": signal.id}
+
+# Batched push used by the bot's outbox drainer. Delivery is at-least-once, so
+# signals that are already stored (a retry after a lost response) are skipped
+# instead of being published to clients a second time. Each signal is validated
+# on its own: invalid ones are listed in "rejected" (by index) and the rest of
+# the batch goes through.
+@app.post("/api/v1/signals/batch")
+@timed("api.push_signal_batch")
+async def push_signal_batch(batch: SignalBatch):
+    if not batch.signals:
+        return {"status": "received", "accepted": [], "duplicates": [], "expired": [], "rejected": []}
+    allowed, retry_after = await limiter.acquire("ingest", settings.INGEST_RATE, settings.INGEST_BURST,
+                                                 cost=len(batch.signals))
+    if not allowed:
+        raise too_many_requests(retry_after)
+
+    signals, rejected = [], []
+    for index, raw in enumerate(batch.signals):
+        try:
+            signals.append(Signal.parse_obj(raw))
+        except ValidationError as e:
+            rejected.append({"index": index, "id": raw.get("id"), "error": str(e)})
+    if rejected:
+        logger.warning(f"Rejected {len(rejected)} invalid signal(s) in batch")
+    if not signals:
+        return {"status": "received", "accepted": [], "duplicates": [], "expired": [], "rejected": rejected}
+
+    exists = await publisher.seen([signal.id for signal in signals])
+
+    # A backlog drained after an outage may be mostly stale: store it, but only publish live signals
+    now = now_ms()
+    accepted, duplicates, expired, items = [], [], [], []
+    for signal, seen in zip(signals, exists):
+        if seen:
+            duplicates.append(signal.id)
+            continue
+        assign_deadline(signal)
+        is_stale = is_expired(signal.deadline, now)
+        if is_stale:
+            expired.append(signal.id)
+        else:
+            assign_legs(signal)
+        items.append((signal, signal.json(), is_stale))
+        accepted.append(signal.id)
+    if items:
+        await publisher.store(items)
+
+    accepted_ids, expired_ids = set(accepted), set(expired)
+    for signal in signals:
+        if signal.id in accepted_ids:
+            audit_signal(signal, signal.id in expired_ids)
+    if duplicates:
+        logger.info(f"Skipped {len(duplicates)} duplicate signal(s) in batch")
+
+    return {"status": "received", "accepted": accepted, "duplicates": duplicates, "expired": expired,
+            "rejected": rejected}
+
+# Signal history for the dashboard and client backfill (newest first, cursor paginated)
+@app.get("/api/v1/signals")
+async def list_signals(
+    symbol: Optional[str] = None,
+    provider: Optional[str] = None,
+    since: Optional[int] = Query(None, description="Epoch ms, inclusive"),
+    until: Optional[int] = Query(None, description="Epoch ms, inclusive"),
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+):
+    try:
+        payloads, next_cursor = await history.query(symbol.upper() if symbol else None, provider, since, until, limit, cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"signals": [json.loads(p) for p in payloads], "next_cursor": next_cursor}
+
+@app.get("/api/v1/signals/{signal_id}")
+async def get_signal(signal_id: str):
+    payload = await redis_client.get(f"signal:{signal_id}")
+    if not payload:
+        raise HTTPException(status_code=404, detail="Signal not found")
+    executions = await redis_client.lrange(f"executions:{signal_id}", 0, -1)
+    return {"signal": json.loads(payload), "executions": [json.loads(e) for e in executions]}
+
+# --- CSV Export (admin only, streamed page by page) ---
+def require_admin(request: Request):
+    if not dashboard.get_current_user(request):
+        raise HTTPException(status_code=401, detail="Login required")
+
+def csv_response(generator, name, headers=None):
+    filename = f"{name}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.csv"
+    return StreamingResponse(generator, media_type="text/csv",
+                             headers={"Content-Disposition": f'attachment; filename="{filename}"', **(headers or {})})
+
+@app.get("/api/v1/export/signals.csv", dependencies=[Depends(require_admin)])
+async def export_signals(symbol: Optional[str] = None, provider: Optional[str] = None,
+                         since: Optional[int] = None, until: Optional[int] = None):
+    filters = {"symbol": symbol.upper() if symbol else None, "provider": provider, "since": since, "until": until}
+    return csv_response(export.signals_csv(history, **filters), "signals")
+
+@app.get("/api/v1/export/executions.csv", dependencies=[Depends(require_admin)])
+async def export_executions(symbol: Optional[str] = None, provider: Optional[str] = None,
+                            since: Optional[int] = None, until: Optional[int] = None):
+    # Execution reports expire after EXECUTIONS_RETENTION_SECONDS: older signals would come out
+    # without their fills, so the export is clamped to the window and says where it starts
+    window_start = now_ms() - settings.EXECUTIONS_RETENTION_SECONDS * 1000
+    since = max(since, window_start) if since is not None else window_start
+    filters = {"symbol": symbol.upper() if symbol else None, "provider": provider, "since": since, "until": until}
+    return csv_response(export.executions_csv(history, redis_client, **filters), "executions",
+                        headers={"X-Export-Since": str(since)})
+
+# Symbol metadata for the bot and clients
+@app.get("/api/v1/symbols")
+async def list_symbols():
+    return {"symbols": symbol_registry.specs}
+
+# Risk templates and which license gets which (app/risk.py)
+@app.get("/api/v1/risk/templates")
+async def list_risk_templates():
+    return {"templates": risk_templates.specs, "default": settings.DEFAULT_RISK_TEMPLATE or None}
+
+@app.get("/api/v1/risk/assignments", dependencies=[Depends(require_admin)])
+async def list_risk_assignments():
+    return {"assignments": await presence.templates(), "default": settings.DEFAULT_RISK_TEMPLATE or None}
+
+@app.put("/api/v1/risk/assignments/{key}", dependencies=[Depends(require_admin)])
+async def assign_risk_template(key: str, assignment: RiskAssignment):
+    if assignment.template and not risk_templates.get(assignment.template):
+        raise HTTPException(status_code=404, detail="Unknown risk template")
+    await presence.assign_template(key, assignment.template)
+    return {"key": key, "template": assignment.template}
+
+# Signals dropped past their deadline, per hop ("ingest", "gateway")
+@app.get("/api/v1/stats/expired", dependencies=[Depends(require_admin)])
+async def expired_stats():
+    counts = await redis_client.hgetall(EXPIRED_STATS_KEY)
+    return {hop: int(count) for hop, count in counts.items()}
+
+# Redis circuit state, signals waiting to be written and direct fan-out counts
+@app.get("/api/v1/stats/redis", dependencies=[Depends(require_admin)])
+async def redis_stats():
+    return publisher.stats()
+
+# Who is connected, across all gateway processes (app/presence.py)
+@app.get("/api/v1/presence", dependencies=[Depends(require_admin)])
+async def presence_totals():
+    return await presence.totals()
+
+@app.get("/api/v1/presence/{key}", dependencies=[Depends(require_admin)])
+async def presence_license(key: str):
+    return await presence.license(key)
+
+@app.post("/api/v1/presence/{key}/disconnect", dependencies=[Depends(require_admin)])
+async def presence_disconnect(key: str):
+    await presence.disconnect([key], "disconnected-by-admin")
+    return {"status": "sent"}
+
+# Opt-in profiling of this API process (app/profiling.py)
+@app.get("/api/v1/debug/profile", dependencies=[Depends(require_admin)])
+async def debug_profile(seconds: float = Query(10, gt=0, le=profiling.MAX_CAPTURE_S), mode: str = "cprofile"):
+    try:
+        data = await profiling.capture(seconds, mode)
+    except profiling.CaptureBusy:
+        raise HTTPException(status_code=409, detail="A profile is already being captured")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    filename = profiling.capture_filename("api", mode)
+    return Response(data, media_type="application/octet-stream",
+                    headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+@app.get("/api/v1/debug/timing", dependencies=[Depends(require_admin)])
+async def debug_timing():
+    return {"enabled": profiling.timings.enabled, "functions": profiling.timings.table()}
+
+@app.post("/api/v1/debug/timing", dependencies=[Depends(require_admin)])
+async def set_debug_timing(enabled: bool, reset: bool = False):
+    if reset:
+        profiling.timings.reset()
+    profiling.timings.enabled = enabled
+    return {"enabled": enabled}
+
+# Execution reports uploaded by clients (acks written by the EA)
+@app.post("/api/v1/executions")
+async def push_executions(batch: ExecutionBatch, request: Request):
+    # Per address first, so a sender can't spread its load over made-up license keys
+    allowed, retry_after = await limiter.acquire("executions_client", settings.EXECUTIONS_CLIENT_RATE,
+                                                 settings.EXECUTIONS_CLIENT_BURST, cost=len(batch.reports),
+                                                 key=client_ip(request))
+    if not allowed:
+        raise too_many_requests(retry_after)
+    # Reports are stored under the license and exported, only accept a license validated from this device
+    if not batch.license_key or await presence.is_valid(batch.license_key, batch.hwid):
+        raise HTTPException(status_code=403, detail="License not validated on this device")
+    # Per license, so one client's backlog upload doesn't throttle everyone else
+    allowed, retry_after = await limiter.acquire("executions", settings.EXECUTIONS_RATE, settings.EXECUTIONS_BURST,
+                                                 cost=len(batch.reports), key=batch.license_key)
+    if not allowed:
+        raise too_many_requests(retry_after)
+    received_at = now_ms()
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for report in batch.reports:
+            record = report.dict()
+            record["license_key"] = batch.license_key
+            record["received_at"] = received_at
+            payload = json.dumps(record)
+            pipe.rpush(f"executions:{report.signal_id}", payload)
+            pipe.expire(f"executions:{report.signal_id}", settings.EXECUTIONS_RETENTION_SECONDS)
+            pipe.lpush("executions", payload)
+        # Keep the global feed bounded
+        pipe.ltrim("executions", 0, 9999)
+        await pipe.execute()
+    return {"status": "received", "count": len(batch.reports)}
 
 # Include Dashboard Router
 app.include_router(dashboard.router)
@@ -1,7 +1,7 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field, field_validator
+from typing import Optional, List, Dict
 from enum import Enum
-from datetime import datetime
+from datetime import datetime, timezone
 
 class SignalType(str, Enum):
     BUY_LIMIT = "BUY_LIMIT"
@@ -19,9 +19,51 @@ class Signal(BaseModel):
     take_profit: float
     take_profit_2: Optional[float] = None
     take_profit_3: Optional[float] = None
-    timestamp: datetime = datetime.now()
+    digits: Optional[int] = None # from the symbol registry, lets clients skip any lookup
+    pip_size: Optional[float] = None
+    # Evaluated per signal; a deadline based on process start would expire every signal
+    timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     source: str = "discord"
+    provider: Optional[str] = None # signal provider (e.g. Discord channel)
+    deadline: Optional[int] = None # epoch ms, don't execute after this (set on ingest, see app/deadlines.py)
+    template_legs: Optional[Dict[str, dict]] = None # order legs per risk template (set on ingest, see app/risk.py)
+
+    @field_validator("timestamp")
+    @classmethod
+    def timestamp_utc(cls, value: datetime) -> datetime:
+        # Senders without an offset are read as UTC, not as this host's local time
+        return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+class SymbolSpec(BaseModel):
+    symbol: str
+    digits: int
+    pip_size: float
+    tick_size: float
+    contract_size: float = 1
+    aliases: List[str] = []
+    ttl: Optional[float] = None # signal deadline in seconds, overrides the per order type default
+
+class RiskAssignment(BaseModel):
+    template: Optional[str] = None # None = the default template (or the client's own risk settings)
 
 class SignalCreate(BaseModel):
     raw_message: str
     channel_id: str
+
+class SignalBatch(BaseModel):
+    # Validated one by one in push_signal_batch: a bad signal is rejected on its own, not with its batch
+    signals: List[dict]
+
+class ExecutionReport(BaseModel):
+    signal_id: str
+    leg: int = 1
+    ticket: int = 0
+    retcode: int
+    fill_time_ms: int = 0
+    comment: str = ""
+    latency_ms: Optional[int] = None # signal written -> ack seen, measured on the client
+
+class ExecutionBatch(BaseModel):
+    license_key: str = ""
+    hwid: str = "" # must match the device the license was validated from
+    reports: List[ExecutionReport]
@@ -0,0 +1,286 @@
+import json
+import time
+import logging
+from typing import Dict, List, Optional
+from .redis_pool import command_client, breaker, REDIS_ERRORS
+
+logger = logging.getLogger(__name__)
+
+# Cluster-wide WebSocket presence in Redis.
+#   presence:license:{key}  hash conn id -> "hwid|gateway" for every socket of a license
+#   presence:gateways       zset gateway id -> last heartbeat (ms)
+#   presence:counts         hash gateway id -> sockets connected there
+#   presence:online         zset license key -> last heartbeat (ms)
+#   presence:templates      hash license key -> risk template name (see app/risk.py)
+#   presence:valid:{key}    hwid of the last successful /dashboard/validate, expires with the license;
+#                           the gateway only admits a key/hwid pair found here
+#   presence channel        {"key": ..., "reason": ...} asks the gateways to close that license's sockets,
+#                           {"op": "template", "key": ..., "template": ...} to regroup them under another template
+#
+# A join is one atomic script at handshake time: it prunes sockets of dead
+# gateways, counts distinct devices and adds the socket only if the license
+# stays within the device limit, so two gateways can't both let a second device in.
+# Leaves are queued and flushed in one pipeline every FLUSH_INTERVAL. Every
+# HEARTBEAT_INTERVAL a gateway re-writes all its sockets in one pipeline, which
+# refreshes the TTLs and heals the registry after a Redis restart or outage.
+# A gateway that stops heartbeating is ignored after STALE_AFTER.
+
+CONTROL_CHANNEL = "presence"
+LICENSE_KEY = "presence:license:{}"
+GATEWAYS_KEY = "presence:gateways"
+COUNTS_KEY = "presence:counts"
+ONLINE_KEY = "presence:online"
+TEMPLATES_KEY = "presence:templates"
+VALID_KEY = "presence:valid:{}"
+
+HEARTBEAT_INTERVAL = 15.0
+STALE_AFTER = 3 * HEARTBEAT_INTERVAL
+FLUSH_INTERVAL = 1.0
+TTL = int(STALE_AFTER) + 15
+
+# Returns -1 when the socket was added, otherwise the number of devices already connected
+JOIN = """
+local now = tonumber(ARGV[5])
+local stale = tonumber(ARGV[6])
+-- The joining gateway is alive by definition, even before its first heartbeat
+redis.call('ZADD', KEYS[2], now, ARGV[3])
+local devices, count = {}, 0
+local entries = redis.call('HGETALL', KEYS[1])
+for i = 1, #entries, 2 do
+    local hwid, gateway = string.match(entries[i + 1], '^(.*)|([^|]*)$')
+    local seen = tonumber(redis.call('ZSCORE', KEYS[2], gateway or '') or '0')
+    if seen < now - stale then
+        redis.call('HDEL', KEYS[1], entries[i])
+    elseif not devices[hwid] then
+        devices[hwid] = true
+        count = count + 1
+    end
+end
+local limit = tonumber(ARGV[4])
+if limit > 0 and not devices[ARGV[2]] and count >= limit then
+    return count
+end
+redis.call('HSET', KEYS[1], ARGV[1], ARGV[2] .. '|' .. ARGV[3])
+redis.call('EXPIRE', KEYS[1], ARGV[7])
+redis.call('ZADD', KEYS[3], now, ARGV[8])
+return -1
+"""
+
+LEAVE = """
+redis.call('HDEL', KEYS[1], ARGV[1])
+if redis.call('HLEN', KEYS[1]) == 0 then
+    redis.call('DEL', KEYS[1])
+    redis.call('ZREM', KEYS[2], ARGV[2])
+end
+return 0
+"""
+
+def now_ms() -> int:
+    return int(time.time() * 1000)
+
+class PresenceRegistry:
+    def __init__(self, redis_client, breaker):
+        self.redis = redis_client
+        self.breaker = breaker
+        self.join_script = redis_client.register_script(JOIN)
+        self.leave_script = redis_client.register_script(LEAVE)
+
+    async def join(self, conn_id: str, key: str, hwid: str, gateway: str, limit: int) -> Optional[int]:
+        """
+        Register a socket. Returns None if it was added, or the number of devices
+        already connected if the device limit turned it away. Fails open while
+        Redis is unavailable (the next heartbeat registers the socket).
+        """
+        if not self.breaker.allow():
+            return None
+        try:
+            result = await self.join_script(
+                keys=[LICENSE_KEY.format(key), GATEWAYS_KEY, ONLINE_KEY],
+                args=[conn_id, hwid, gateway, limit, now_ms(), int(STALE_AFTER * 1000), TTL, key])
+        except REDIS_ERRORS as e:
+            self.breaker.failure(e)
+            logger.warning(f"Presence join not recorded: {e}")
+            return None
+        self.breaker.success()
+        result = int(result)
+        return None if result < 0 else result
+
+    async def flush_leaves(self, leaves: List[tuple]):
+        """leaves: [(conn_id, key), ...] in one pipeline. Returns False if they must be retried."""
+        if not leaves or not self.breaker.allow():
+            return not leaves
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for conn_id, key in leaves:
+                    await self.leave_script(keys=[LICENSE_KEY.format(key), ONLINE_KEY], args=[conn_id, key], client=pipe)
+                await pipe.execute()
+        except REDIS_ERRORS as e:
+            self.breaker.failure(e)
+            return False
+        self.breaker.success()
+        return True
+
+    async def heartbeat(self, gateway: str, sockets: Dict[str, Dict[str, str]], total: int):
+        """
+        sockets: {license key: {conn id: hwid}} of this gateway; total includes
+        sockets without a key. Re-writes everything in one pipeline.
+        """
+        if not self.breaker.allow():
+            return
+        now = now_ms()
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.zadd(GATEWAYS_KEY, {gateway: now})
+                pipe.hset(COUNTS_KEY, gateway, total)
+                for key, conns in sockets.items():
+                    name = LICENSE_KEY.format(key)
+                    pipe.hset(name, mapping={conn: f"{hwid}|{gateway}" for conn, hwid in conns.items()})
+                    pipe.expire(name, TTL)
+                if sockets:
+                    pipe.zadd(ONLINE_KEY, {key: now for key in sockets})
+                await pipe.execute()
+            await self._reap(now)
+        except REDIS_ERRORS as e:
+            self.breaker.failure(e)
+            logger.warning(f"Presence heartbeat failed: {e}")
+            return
+        self.breaker.success()
+
+    async def _reap(self, now: int):
+        """Forget gateways (and licenses) that stopped heartbeating."""
+        cutoff = now - int(STALE_AFTER * 1000)
+        dead = await self.redis.zrangebyscore(GATEWAYS_KEY, "-inf", f"({cutoff}")
+        async with self.redis.pipeline(transaction=False) as pipe:
+            if dead:
+                pipe.zrem(GATEWAYS_KEY, *dead)
+                pipe.hdel(COUNTS_KEY, *dead)
+            pipe.zremrangebyscore(ONLINE_KEY, "-inf", f"({cutoff}")
+            await pipe.execute()
+
+    async def remove_gateway(self, gateway: str):
+        """Clean shutdown: drop this gateway's count now instead of waiting for STALE_AFTER."""
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.zrem(GATEWAYS_KEY, gateway)
+                pipe.hdel(COUNTS_KEY, gateway)
+                await pipe.execute()
+        except REDIS_ERRORS:
+            pass
+
+    async def template(self, key: str) -> Optional[str]:
+        """Risk template assigned to a license, None if unassigned or Redis is unavailable."""
+        if not self.breaker.allow():
+            return None
+        try:
+            name = await self.redis.hget(TEMPLATES_KEY, key)
+        except REDIS_ERRORS as e:
+            self.breaker.failure(e)
+            return None
+        self.breaker.success()
+        return name
+
+    async def templates_of(self, keys: List[str]) -> Optional[Dict[str, Optional[str]]]:
+        """Assignments of these licenses (one HMGET), None if Redis is unavailable."""
+        if not keys or not self.breaker.allow():
+            return None
+        try:
+            names = await self.redis.hmget(TEMPLATES_KEY, keys)
+        except REDIS_ERRORS as e:
+            self.breaker.failure(e)
+            return None
+        self.breaker.success()
+        return dict(zip(keys, names))
+
+    async def is_valid(self, key: str, hwid: Optional[str]) -> Optional[str]:
+        """
+        Handshake check: None if the license was validated from this device, otherwise
+        "unknown" (never validated, or the entry expired) or "device" (validated from
+        another device). Fails open while Redis is unavailable, like join().
+        """
+        if not self.breaker.allow():
+            return None
+        try:
+            stored = await self.redis.get(VALID_KEY.format(key))
+        except REDIS_ERRORS as e:
+            self.breaker.failure(e)
+            logger.warning(f"License check skipped: {e}")
+            return None
+        self.breaker.success()
+        if stored is None:
+            return "unknown"
+        return None if stored == hwid else "device"
+
+    # --- Queries (API service) ---
+
+    async def _live_gateways(self) -> Dict[str, float]:
+        cutoff = now_ms() - int(STALE_AFTER * 1000)
+        return dict(await self.redis.zrangebyscore(GATEWAYS_KEY, cutoff, "+inf", withscores=True))
+
+    async def license(self, key: str) -> dict:
+        """Live sockets of one license."""
+        entries = await self.redis.hgetall(LICENSE_KEY.format(key))
+        live = await self._live_gateways()
+        sockets = []
+        for conn_id, value in entries.items():
+            hwid, _, gateway = value.rpartition("|")
+            if gateway in live:
+                sockets.append({"conn_id": conn_id, "hwid": hwid, "gateway": gateway})
+        return {"key": key, "connections": len(sockets), "devices": len({s["hwid"] for s in sockets}),
+                "sockets": sockets}
+
+    async def totals(self) -> dict:
+        """Aggregate counts from the per-gateway totals, no per-socket work."""
+        live = await self._live_gateways()
+        counts = await self.redis.hgetall(COUNTS_KEY)
+        cutoff = now_ms() - int(STALE_AFTER * 1000)
+        return {
+            "connections": sum(int(n) for gateway, n in counts.items() if gateway in live),
+            "licenses_online": await self.redis.zcount(ONLINE_KEY, cutoff, "+inf"),
+            "gateways": {gateway: int(counts.get(gateway, 0)) for gateway in live},
+        }
+
+    async def templates(self) -> Dict[str, str]:
+        return await self.redis.hgetall(TEMPLATES_KEY)
+
+    async def assign_template(self, key: str, template: Optional[str]):
+        """Store the assignment and regroup the license's live sockets, in one round trip."""
+        async with self.redis.pipeline(transaction=False) as pipe:
+            if template:
+                pipe.hset(TEMPLATES_KEY, key, template)
+            else:
+                pipe.hdel(TEMPLATES_KEY, key)
+            pipe.publish(CONTROL_CHANNEL, json.dumps({"op": "template", "key": key, "template": template}))
+            await pipe.execute()
+
+    async def mark_valid(self, key: str, hwid: str, expires_at: Optional[int]):
+        """Admit key/hwid at the gateways until expires_at (epoch seconds, None = no expiry)."""
+        name = VALID_KEY.format(key)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.set(name, hwid)
+            if expires_at is not None:
+                pipe.expireat(name, expires_at)
+            await pipe.execute()
+
+    async def set_valid_until(self, expiries: Dict[str, Optional[int]]):
+        """Move the expiry of already validated licenses (e.g. after an extension)."""
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for key, expires_at in expiries.items():
+                if expires_at is None:
+                    pipe.persist(VALID_KEY.format(key))
+                else:
+                    pipe.expireat(VALID_KEY.format(key), expires_at)
+            await pipe.execute()
+
+    async def forget_valid(self, keys: List[str]):
+        """Revoked, deleted or unlocked licenses have to validate again before connecting."""
+        if keys:
+            await self.redis.delete(*(VALID_KEY.format(key) for key in keys))
+
+    async def disconnect(self, keys: List[str], reason: str = "disconnected"):
+        """Ask every gateway to close the sockets of these licenses (one pipeline)."""
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.publish(CONTROL_CHANNEL, json.dumps({"key": key, "reason": reason}))
+            await pipe.execute()
+
+registry = PresenceRegistry(command_client(), breaker)
@@ -0,0 +1,156 @@
+import os
+import sys
+import time
+import marshal
+import asyncio
+import cProfile
+import functools
+import threading
+from collections import Counter, deque
+from typing import Dict, List, Optional
+
+# Opt-in profiling for the API, gateway and bot processes.
+#
+# timed() wraps a hot-path function. While timing is off (the default, see
+# PROFILE_TIMING) the wrapper only checks one attribute before calling through.
+# While it is on, every call's wall time goes into a per-function window of
+# the last WINDOW samples, and table() summarises those windows. Async
+# functions are timed until they return, awaits included.
+#
+# capture() profiles the process for a bounded time and returns a file:
+#   cprofile  deterministic profile of the event loop thread, pstats format (.prof,
+#             open with `python -m pstats` or snakeviz)
+#   sample    stacks of every thread every SAMPLE_INTERVAL, folded format (.folded,
+#             one "frame;frame;frame count" line per stack, for flamegraph tools)
+# Stats and captures are per process; with several workers each keeps its own.
+
+WINDOW = 1000
+MAX_CAPTURE_S = 60
+SAMPLE_INTERVAL = 0.005
+
+class TimingStats:
+    def __init__(self, window: int = WINDOW):
+        self.enabled = False
+        self.window = window
+        self.samples: Dict[str, deque] = {}
+        self.calls: Dict[str, int] = {}
+        # Timed functions also run on executor threads (asyncio.to_thread, run_in_executor)
+        self.lock = threading.Lock()
+
+    def record(self, name: str, seconds: float):
+        with self.lock:
+            samples = self.samples.get(name)
+            if samples is None:
+                samples = self.samples[name] = deque(maxlen=self.window)
+            samples.append(seconds)
+            self.calls[name] = self.calls.get(name, 0) + 1
+
+    def reset(self):
+        with self.lock:
+            self.samples = {}
+            self.calls = {}
+
+    def table(self) -> List[dict]:
+        """Per function over its window: calls since reset, mean and percentiles in ms. Slowest p95 first."""
+        rows = []
+        with self.lock:
+            windows = [(name, list(window)) for name, window in self.samples.items()]
+        for name, window in windows:
+            samples = sorted(window)
+            if not samples:
+                continue
+
+            def pct(p):
+                return round(samples[min(len(samples) - 1, int(p / 100 * len(samples)))] * 1000, 3)
+            rows.append({"name": name, "calls": self.calls.get(name, 0), "window": len(samples),
+                         "mean_ms": round(sum(samples) / len(samples) * 1000, 3),
+                         "p50_ms": pct(50), "p95_ms": pct(95), "p99_ms": pct(99),
+                         "max_ms": round(samples[-1] * 1000, 3)})
+        return sorted(rows, key=lambda row: row["p95_ms"], reverse=True)
+
+    def format_table(self) -> str:
+        lines = [f"{'function':<40}{'calls':>9}{'mean ms':>10}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}"]
+        for row in self.table():
+            lines.append(f"{row['name']:<40}{row['calls']:>9}{row['mean_ms']:>10.3f}{row['p50_ms']:>9.3f}"
+                         f"{row['p95_ms']:>9.3f}{row['p99_ms']:>9.3f}{row['max_ms']:>9.3f}")
+        return "\n".join(lines)
+
+timings = TimingStats()
+
+def timed(name: Optional[str] = None):
+    """Record the wall time of every call while timings.enabled (sync or async functions)."""
+    def decorate(func):
+        label = name or f"{func.__module__}.{func.__qualname__}"
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not timings.enabled:
+                    return await func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    timings.record(label, time.perf_counter() - start)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not timings.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                timings.record(label, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+def sample_stacks(seconds: float, interval: float = SAMPLE_INTERVAL) -> str:
+    """Sample the stacks of every other thread, folded (root first). Blocks for `seconds`."""
+    own = threading.get_ident()
+    names = {thread.ident: thread.name for thread in threading.enumerate()}
+    counts = Counter()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            stack.append(names.get(ident, str(ident)))
+            counts[";".join(reversed(stack))] += 1
+        time.sleep(interval)
+    return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+
+class CaptureBusy(Exception):
+    pass
+
+_capture_lock = asyncio.Lock()
+
+async def capture(seconds: float, mode: str = "cprofile") -> bytes:
+    """Profile this process for `seconds` (capped at MAX_CAPTURE_S). One capture at a time, else CaptureBusy."""
+    if mode not in ("cprofile", "sample"):
+        raise ValueError(f"Unknown profile mode: {mode}")
+    if _capture_lock.locked():
+        raise CaptureBusy()
+    seconds = max(0.1, min(float(seconds), MAX_CAPTURE_S))
+    async with _capture_lock:
+        if mode == "sample":
+            text = await asyncio.to_thread(sample_stacks, seconds)
+            return text.encode("utf-8")
+
+        # Enabled from a coroutine, it profiles the event loop thread: every request/task meanwhile
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profiler.disable()
+        profiler.create_stats()
+        return marshal.dumps(profiler.stats)
+
+def capture_filename(service: str, mode: str) -> str:
+    return f"{service}_{time.strftime('%Y%m%d_%H%M%S')}.{'prof' if mode == 'cprofile' else 'folded'}"
@@ -0,0 +1,155 @@
+import asyncio
+import json
+import logging
+from itertools import islice
+from typing import List, Tuple
+import aiohttp
+from .redis_pool import REDIS_ERRORS
+
+logger = logging.getLogger(__name__)
+
+# Ingest write path: history + publish to the gateways, surviving Redis outages.
+# Normally each batch is one pipelined round trip (history writes + PUBLISH).
+# While the circuit breaker is open, or when that round trip fails, signals
+# are POSTed straight to every gateway in GATEWAY_URLS so clients keep
+# trading, and the history writes wait in a bounded in-memory buffer that is
+# flushed in chunks once Redis answers again. Gateways drop ids they have
+# already relayed, so a signal that went out both ways reaches clients once.
+# Every gateway replica has to be listed: a service name that load-balances
+# (http://gateway:8001 with several replicas) reaches only one of them.
+
+DIRECT_PATH = "/internal/signals"
+DIRECT_TIMEOUT = 1.0
+FLUSH_INTERVAL = 1.0
+FLUSH_CHUNK = 500
+
+Item = Tuple[object, str, bool] # (signal, payload, expired)
+
+class SignalPublisher:
+    def __init__(self, redis_client, history, breaker, channel: str, expired_key: str,
+                 gateway_urls: str = "", gateway_token: str = "", buffer_size: int = 10000):
+        self.redis = redis_client
+        self.history = history
+        self.breaker = breaker
+        self.channel = channel
+        self.expired_key = expired_key
+        self.gateways = [u.strip().rstrip("/") for u in gateway_urls.split(",") if u.strip()]
+        self.gateway_token = gateway_token
+        self.buffer_size = buffer_size
+        self.pending = {} # signal id -> Item, oldest first
+        self.session = None
+        self.flush_task = None
+        # direct: reached every gateway, direct_partial: reached only some of them
+        self.counters = {"direct": 0, "direct_partial": 0, "undelivered": 0, "buffer_dropped": 0}
+
+    async def start(self):
+        if self.gateways and not self.gateway_token:
+            logger.error("GATEWAY_URLS is set without GATEWAY_TOKEN, gateways refuse direct fan-out: "
+                         "signals will not be delivered while Redis is down")
+        self.flush_task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        if self.flush_task:
+            self.flush_task.cancel()
+        if self.pending:
+            logger.warning(f"Shutting down with {len(self.pending)} signal(s) not written to Redis")
+        if self.session:
+            await self.session.close()
+
+    def stats(self) -> dict:
+        return {"breaker": self.breaker.state, "buffered": len(self.pending), **self.counters}
+
+    async def seen(self, ids: List[str]) -> List[bool]:
+        """Which ids are already stored (or waiting in the buffer)."""
+        stored = [False] * len(ids)
+        if self.breaker.allow():
+            try:
+                async with self.redis.pipeline(transaction=False) as pipe:
+                    for signal_id in ids:
+                        pipe.exists(f"signal:{signal_id}")
+                    stored = [bool(n) for n in await pipe.execute()]
+                self.breaker.success()
+            except REDIS_ERRORS as e:
+                self.breaker.failure(e)
+        return [s or signal_id in self.pending for s, signal_id in zip(stored, ids)]
+
+    async def store(self, items: List[Item]) -> bool:
+        """Persist and publish. Returns False if it went the degraded way."""
+        if self.breaker.allow():
+            try:
+                await self._write(items, publish=True)
+                self.breaker.success()
+                return True
+            except REDIS_ERRORS as e:
+                self.breaker.failure(e)
+                logger.warning(f"Redis write failed, fanning out {len(items)} signal(s) directly: {e}")
+        self._buffer(items)
+        await self._fan_out([payload for _, payload, expired in items if not expired])
+        return False
+
+    async def _write(self, items: List[Item], publish: bool):
+        expired = 0
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for signal, payload, is_expired in items:
+                self.history.add(pipe, signal, payload)
+                if is_expired:
+                    expired += 1
+                elif publish:
+                    pipe.publish(self.channel, payload)
+            if expired:
+                pipe.hincrby(self.expired_key, "ingest", expired)
+            await pipe.execute()
+
+    def _buffer(self, items: List[Item]):
+        for item in items:
+            self.pending[item[0].id] = item
+        while len(self.pending) > self.buffer_size:
+            # Oldest history entry goes first, the signal itself was already delivered
+            del self.pending[next(iter(self.pending))]
+            self.counters["buffer_dropped"] += 1
+
+    async def _fan_out(self, payloads: List[str]):
+        if not payloads:
+            return
+        if not self.gateways or not self.gateway_token:
+            self.counters["undelivered"] += len(payloads)
+            logger.error(f"Redis down and no GATEWAY_URLS/GATEWAY_TOKEN set, {len(payloads)} signal(s) not delivered")
+            return
+        if self.session is None:
+            self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=DIRECT_TIMEOUT))
+        body = json.dumps({"signals": payloads})
+        headers = {"Content-Type": "application/json", "X-Gateway-Token": self.gateway_token}
+
+        async def post(url):
+            async with self.session.post(url + DIRECT_PATH, data=body, headers=headers) as response:
+                response.raise_for_status()
+
+        results = await asyncio.gather(*(post(url) for url in self.gateways), return_exceptions=True)
+        failed = 0
+        for url, result in zip(self.gateways, results):
+            if isinstance(result, Exception):
+                failed += 1
+                logger.warning(f"Direct fan-out to {url} failed: {result!r}")
+        if failed == len(self.gateways):
+            self.counters["undelivered"] += len(payloads)
+            logger.error(f"Direct fan-out failed on every gateway, {len(payloads)} signal(s) not delivered")
+        elif failed:
+            self.counters["direct_partial"] += len(payloads)
+        else:
+            self.counters["direct"] += len(payloads)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            while self.pending and self.breaker.allow():
+                chunk = list(islice(self.pending.values(), FLUSH_CHUNK))
+                try:
+                    await self._write(chunk, publish=False)
+                except REDIS_ERRORS as e:
+                    self.breaker.failure(e)
+                    break
+                self.breaker.success()
+                for signal, _, _ in chunk:
+                    self.pending.pop(signal.id, None)
+                if not self.pending:
+                    logger.info("Buffered signals written to Redis")
@@ -0,0 +1,131 @@
+import logging
+import ipaddress
+from typing import Optional, Tuple
+from fastapi import HTTPException, Request
+from .config import settings
+from .redis_pool import command_client, breaker, REDIS_ERRORS
+
+logger = logging.getLogger(__name__)
+
+# Token-bucket admission control shared by all API/gateway processes.
+# Each bucket is a Redis hash {tokens, ts} updated by one Lua script, so
+# check-and-take is atomic across workers. A rejected request gets the time
+# until enough tokens are back, which is sent to clients as Retry-After.
+# The script reads the clock from Redis (TIME), so processes whose clocks
+# disagree can't refill a shared bucket early or drain it late.
+
+TOKEN_BUCKET = """
+local key = KEYS[1]
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+
+local state = redis.call('HMGET', key, 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate / 1000)
+local retry_ms = 0
+if tokens >= cost then
+    tokens = tokens - cost
+else
+    retry_ms = math.ceil((cost - tokens) * 1000 / rate)
+end
+
+redis.call('HSET', key, 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', key, math.ceil(burst * 1000 / rate) + 1000)
+return retry_ms
+"""
+
+class RateLimiter:
+    def __init__(self, redis_client, prefix="ratelimit"):
+        self.redis = redis_client
+        self.prefix = prefix
+        self.script = redis_client.register_script(TOKEN_BUCKET)
+
+    async def acquire(self, name: str, rate: float, burst: float, cost: float = 1,
+                      key: Optional[str] = None) -> Tuple[bool, float]:
+        """
+        Take `cost` tokens from bucket `name` (optionally per `key`, e.g. a client IP).
+        Returns (allowed, retry_after seconds). Fails open if Redis is unavailable,
+        a limiter outage shouldn't take the API down with it. While the Redis circuit is
+        open it doesn't even try, so an outage doesn't add a timeout to every request.
+        """
+        bucket = f"{self.prefix}:{name}:{key}" if key else f"{self.prefix}:{name}"
+        # A request bigger than the bucket could never pass, charge it a full bucket instead
+        cost = min(cost, burst)
+        if not breaker.allow():
+            return True, 0.0
+        try:
+            retry_ms = await self.script(keys=[bucket], args=[rate, burst, cost])
+        except REDIS_ERRORS as e:
+            breaker.failure(e)
+            logger.warning(f"Rate limiter unavailable, allowing request: {e}")
+            return True, 0.0
+        breaker.success()
+        retry_ms = int(retry_ms)
+        return retry_ms == 0, retry_ms / 1000
+
+def retry_after_header(seconds: float) -> str:
+    # Retry-After is whole seconds
+    return str(max(1, int(seconds + 0.999)))
+
+def too_many_requests(retry_after: float) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail="Too many requests, retry later",
+        headers={"Retry-After": retry_after_header(retry_after)},
+    )
+
+def _parse_networks(value: str):
+    networks = []
+    for entry in value.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        try:
+            networks.append(ipaddress.ip_network(entry, strict=False))
+        except ValueError:
+            logger.warning(f"Ignoring invalid TRUSTED_PROXIES entry: {entry}")
+    return networks
+
+TRUSTED_PROXIES = _parse_networks(settings.TRUSTED_PROXIES)
+
+def _is_trusted(host: str) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in TRUSTED_PROXIES)
+
+def client_ip(request: Request) -> str:
+    """
+    Address of the client. X-Forwarded-For is only honoured when the peer is a
+    trusted proxy, otherwise anyone could pick their own rate limit bucket.
+    Walks the header right to left and stops at the first untrusted hop.
+    """
+    host = request.client.host if request.client else "unknown"
+    forwarded = request.headers.get("x-forwarded-for")
+    if not forwarded or not _is_trusted(host):
+        return host
+    for hop in reversed([h.strip() for h in forwarded.split(",") if h.strip()]):
+        host = hop
+        if not _is_trusted(hop):
+            break
+    return host
+
+limiter = RateLimiter(command_client())
+
+def rate_limit(name: str, rate: float, burst: float, per_client: bool = False):
+    """
+    FastAPI dependency: Depends(rate_limit("validate", 20, 40)).
+    Raises 429 with Retry-After when the bucket is empty.
+    """
+    async def dependency(request: Request):
+        key = client_ip(request) if per_client else None
+        allowed, retry_after = await limiter.acquire(name, rate, burst, key=key)
+        if not allowed:
+            raise too_many_requests(retry_after)
+    return dependency
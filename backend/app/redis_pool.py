@@ -0,0 +1,93 @@
+import time
+import logging
+import redis.asyncio as redis
+from redis.exceptions import RedisError
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Redis connections for the API and gateway.
+# Commands go through one explicitly sized, health-checked pool per process
+# with short socket timeouts, so a hung Redis costs REDIS_SOCKET_TIMEOUT
+# instead of the OS TCP timeout. Pub/sub listeners sit idle for long stretches
+# and must not hit a read timeout, they get their own small pool without one.
+#
+# A process-wide circuit breaker sits in front of the hot paths: after
+# REDIS_BREAKER_FAILURES consecutive errors it opens and callers skip Redis
+# entirely (no timeout per signal) until REDIS_BREAKER_RESET seconds have
+# passed, then a single probe decides whether it closes again.
+
+# What a failed Redis call raises: connection/timeout errors are RedisError subclasses,
+# a pool that stays exhausted raises ConnectionError, a dead socket can leak OSError
+REDIS_ERRORS = (RedisError, OSError)
+
+def _pool(**kwargs):
+    return redis.BlockingConnectionPool(
+        host=settings.REDIS_HOST,
+        port=settings.REDIS_PORT,
+        decode_responses=True,
+        socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT,
+        socket_keepalive=True,
+        health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+        **kwargs,
+    )
+
+_command_pool = None
+
+def command_client() -> redis.Redis:
+    """Client on the process-wide command pool."""
+    global _command_pool
+    if _command_pool is None:
+        _command_pool = _pool(
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            timeout=settings.REDIS_POOL_TIMEOUT, # wait for a free connection at most this long
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        )
+    return redis.Redis(connection_pool=_command_pool)
+
+def subscriber_client() -> redis.Redis:
+    return redis.Redis(connection_pool=_pool(max_connections=4, timeout=settings.REDIS_POOL_TIMEOUT))
+
+class CircuitBreaker:
+    def __init__(self, name: str, failures: int, reset_after: float):
+        self.name = name
+        self.threshold = max(1, failures)
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if self.probing else "open"
+
+    def allow(self) -> bool:
+        """True if the caller should try Redis now."""
+        if self.opened_at is None:
+            return True
+        now = time.monotonic()
+        if now - self.opened_at >= self.reset_after:
+            # One probe per window; a probe that never reports back can't wedge the breaker
+            self.opened_at = now
+            self.probing = True
+            return True
+        return False
+
+    def success(self):
+        if self.opened_at is not None:
+            logger.info(f"Circuit '{self.name}' closed, Redis is back")
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def failure(self, error=None):
+        self.failures += 1
+        self.probing = False
+        if self.failures >= self.threshold:
+            if self.opened_at is None:
+                logger.warning(f"Circuit '{self.name}' opened after {self.failures} failures: {error}")
+            self.opened_at = time.monotonic()
+
+breaker = CircuitBreaker("redis", settings.REDIS_BREAKER_FAILURES, settings.REDIS_BREAKER_RESET)
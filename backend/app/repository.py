@@ -0,0 +1,287 @@
+import abc
+import asyncio
+import logging
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from .config import settings
+
+# License data access layer.
+# The supabase client is synchronous, so every call is pushed onto a small
+# bounded thread pool and awaited with a timeout. That keeps the event loop
+# (which also serves /ws/signals) free while the admin dashboard talks to the DB.
+# The timeout only stops the caller waiting: the worker thread stays busy until
+# the driver call itself returns, so a hung DB can still fill the pool. The
+# drivers are given the same timeout (postgrest_client_timeout, sqlite3 busy
+# timeout), which bounds how long a worker can stay stuck to about one timeout.
+# Bulk operations take a whole selection and run as one statement per chunk of
+# IN_CHUNK keys (Supabase filters travel in the URL), not one round trip per key.
+
+logger = logging.getLogger(__name__)
+
+IN_CHUNK = 200
+
+def chunks(items: list, size: int = IN_CHUNK):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+class RepositoryError(Exception):
+    pass
+
+
+class LicenseRepository(abc.ABC):
+    def __init__(self, max_workers: int = 4, timeout: float = 5.0):
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db")
+
+    async def _run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        try:
+            return await asyncio.wait_for(loop.run_in_executor(self.executor, fn, *args), self.timeout)
+        except asyncio.TimeoutError:
+            raise RepositoryError(f"Database request timed out after {self.timeout}s")
+
+    # --- Sync implementations (run inside the executor) ---
+    @abc.abstractmethod
+    def _list(self) -> List[dict]:
+        ...
+
+    @abc.abstractmethod
+    def _get(self, key: str) -> Optional[dict]:
+        ...
+
+    @abc.abstractmethod
+    def _insert(self, data: dict) -> None:
+        ...
+
+    @abc.abstractmethod
+    def _update(self, key: str, fields: dict) -> None:
+        ...
+
+    @abc.abstractmethod
+    def _delete(self, key: str) -> None:
+        ...
+
+    @abc.abstractmethod
+    def _get_many(self, keys: List[str]) -> List[dict]:
+        ...
+
+    @abc.abstractmethod
+    def _insert_many(self, rows: List[dict]) -> None:
+        ...
+
+    @abc.abstractmethod
+    def _update_many(self, keys: List[str], fields: dict) -> None:
+        ...
+
+    @abc.abstractmethod
+    def _update_rows(self, rows: List[dict]) -> None:
+        ...
+
+    # --- Async API used by the routers ---
+    async def list_licenses(self) -> List[dict]:
+        return await self._run(self._list)
+
+    async def get_license(self, key: str) -> Optional[dict]:
+        return await self._run(self._get, key)
+
+    async def create_license(self, data: dict) -> None:
+        await self._run(self._insert, data)
+
+    async def update_license(self, key: str, fields: dict) -> None:
+        await self._run(self._update, key, fields)
+
+    async def delete_license(self, key: str) -> None:
+        await self._run(self._delete, key)
+
+    async def get_licenses(self, keys: List[str]) -> List[dict]:
+        return await self._run(self._get_many, keys)
+
+    async def create_licenses(self, rows: List[dict]) -> None:
+        await self._run(self._insert_many, rows)
+
+    async def update_licenses(self, keys: List[str], fields: dict) -> None:
+        """Same fields for every key (revoke, reset HWID)."""
+        await self._run(self._update_many, keys, fields)
+
+    async def update_rows(self, rows: List[dict]) -> None:
+        """Different fields per row, each row carries its "key" (extend)."""
+        await self._run(self._update_rows, rows)
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+
+class SupabaseLicenseRepository(LicenseRepository):
+    def __init__(self, url: str, key: str, **kwargs):
+        super().__init__(**kwargs)
+        from supabase import create_client, ClientOptions
+
+        # One client for the whole process so the underlying HTTP connections are reused
+        options = ClientOptions(postgrest_client_timeout=self.timeout)
+        self.client = create_client(url, key, options=options)
+
+    def _table(self):
+        return self.client.table("licenses")
+
+    def _list(self):
+        return self._table().select("*").order("created_at", desc=True).execute().data
+
+    def _get(self, key):
+        rows = self._table().select("*").eq("key", key).limit(1).execute().data
+        return rows[0] if rows else None
+
+    def _insert(self, data):
+        self._table().insert(data).execute()
+
+    def _update(self, key, fields):
+        self._table().update(fields).eq("key", key).execute()
+
+    def _delete(self, key):
+        self._table().delete().eq("key", key).execute()
+
+    def _get_many(self, keys):
+        rows = []
+        for chunk in chunks(keys):
+            rows.extend(self._table().select("*").in_("key", chunk).execute().data)
+        return rows
+
+    def _insert_many(self, rows):
+        # One POST with a JSON array is one multi-row INSERT in Postgres
+        self._table().insert(rows).execute()
+
+    def _update_many(self, keys, fields):
+        for chunk in chunks(keys):
+            self._table().update(fields).in_("key", chunk).execute()
+
+    def _update_rows(self, rows):
+        # Rows exist, so the upsert is a single INSERT ... ON CONFLICT (key) DO UPDATE
+        self._table().upsert(rows, on_conflict="key").execute()
+
+
+class SQLiteLicenseRepository(LicenseRepository):
+    """Local stand-in for Supabase (offline dev / tests). Same table layout."""
+
+    COLUMNS = ("key", "status", "note", "hwid", "expires_at", "created_at")
+
+    def __init__(self, path: str = "licenses.db", **kwargs):
+        # sqlite connections are not safe to share between threads, one worker is enough
+        kwargs["max_workers"] = 1
+        super().__init__(**kwargs)
+        self.path = path
+        self._local = threading.local()
+        self.executor.submit(self._init_schema).result()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self):
+        conn = self._conn()
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS licenses (
+                key TEXT PRIMARY KEY,
+                status TEXT NOT NULL DEFAULT 'ACTIVE',
+                note TEXT,
+                hwid TEXT,
+                expires_at TEXT,
+                created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now'))
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_licenses_created ON licenses(created_at)")
+        conn.commit()
+
+    def _list(self):
+        rows = self._conn().execute("SELECT * FROM licenses ORDER BY created_at DESC").fetchall()
+        return [dict(r) for r in rows]
+
+    def _get(self, key):
+        row = self._conn().execute("SELECT * FROM licenses WHERE key = ?", (key,)).fetchone()
+        return dict(row) if row else None
+
+    def _insert(self, data):
+        cols = [c for c in self.COLUMNS if c in data]
+        conn = self._conn()
+        conn.execute(
+            f"INSERT INTO licenses ({', '.join(cols)}) VALUES ({', '.join('?' for _ in cols)})",
+            [data[c] for c in cols],
+        )
+        conn.commit()
+
+    def _update(self, key, fields):
+        cols = [c for c in self.COLUMNS if c in fields and c != "key"]
+        if not cols:
+            return
+        conn = self._conn()
+        conn.execute(
+            f"UPDATE licenses SET {', '.join(f'{c} = ?' for c in cols)} WHERE key = ?",
+            [fields[c] for c in cols] + [key],
+        )
+        conn.commit()
+
+    def _delete(self, key):
+        conn = self._conn()
+        conn.execute("DELETE FROM licenses WHERE key = ?", (key,))
+        conn.commit()
+
+    def _get_many(self, keys):
+        rows = []
+        for chunk in chunks(keys):
+            rows.extend(self._conn().execute(
+                f"SELECT * FROM licenses WHERE key IN ({', '.join('?' for _ in chunk)})", chunk).fetchall())
+        return [dict(r) for r in rows]
+
+    def _insert_many(self, rows):
+        cols = [c for c in self.COLUMNS if c in rows[0]]
+        conn = self._conn()
+        with conn: # one transaction, rolled back as a whole if any key already exists
+            conn.executemany(
+                f"INSERT INTO licenses ({', '.join(cols)}) VALUES ({', '.join('?' for _ in cols)})",
+                [[row.get(c) for c in cols] for row in rows],
+            )
+
+    def _update_many(self, keys, fields):
+        cols = [c for c in self.COLUMNS if c in fields and c != "key"]
+        if not cols:
+            return
+        conn = self._conn()
+        with conn:
+            for chunk in chunks(keys):
+                conn.execute(
+                    f"UPDATE licenses SET {', '.join(f'{c} = ?' for c in cols)} "
+                    f"WHERE key IN ({', '.join('?' for _ in chunk)})",
+                    [fields[c] for c in cols] + chunk,
+                )
+
+    def _update_rows(self, rows):
+        cols = [c for c in self.COLUMNS if c in rows[0] and c != "key"]
+        conn = self._conn()
+        with conn:
+            conn.executemany(
+                f"UPDATE licenses SET {', '.join(f'{c} = ?' for c in cols)} WHERE key = ?",
+                [[row.get(c) for c in cols] + [row["key"]] for row in rows],
+            )
+
+
+def create_repository() -> Optional[LicenseRepository]:
+    opts = {"max_workers": settings.DB_MAX_WORKERS, "timeout": settings.DB_TIMEOUT}
+
+    if settings.DB_BACKEND == "sqlite":
+        return SQLiteLicenseRepository(settings.SQLITE_PATH, **opts)
+
+    if settings.SUPABASE_URL and settings.SUPABASE_KEY:
+        try:
+            return SupabaseLicenseRepository(settings.SUPABASE_URL, settings.SUPABASE_KEY, **opts)
+        except Exception as e:
+            logger.error(f"Failed to initialize Supabase: {e}")
+    return None
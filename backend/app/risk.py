@@ -0,0 +1,94 @@
+import os
+import json
+import math
+from typing import Dict, List, Optional
+
+# Named risk templates (fixed lot or risk %, split across TP1..TP3, lot cap).
+# Licenses are assigned a template (see TEMPLATES_KEY in app/presence.py). On
+# ingest the order legs of a signal are computed once per template and carried
+# on the signal as template_legs; the gateway sends every socket only the legs
+# of its license's template, so neither the client nor the EA splits or sizes.
+#
+#   template_legs = {template name: {"risk_type", "risk_value", "legs": [leg, ...]}}
+#   leg           = {"leg": 1, "tp": price, "value": lots or risk %, "max_lots": cap, 0 = none}
+#
+# FIXED legs carry final lots. PERCENT legs carry their share of the risk % and
+# of the lot cap: the lot size depends on the account balance, which only the
+# EA knows, so it still converts risk % to lots per leg.
+# Kept free of FastAPI/pydantic imports like app/symbols.py.
+
+TEMPLATES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "risk_templates.json")
+
+RISK_TYPES = ("FIXED", "PERCENT")
+MAX_LEGS = 3
+DEFAULT_LOT_STEP = 0.01
+
+def floor_step(value: float, step: float) -> float:
+    # The epsilon keeps 0.3 / 0.01 from flooring to 29 steps
+    return round(math.floor(value / step + 1e-9) * step, 8)
+
+class RiskTemplates:
+    def __init__(self, specs: List[dict]):
+        self.specs = specs
+        self.by_name: Dict[str, dict] = {}
+        # Split ratios renormalized for 1..MAX_LEGS take profits, computed once per template
+        self.ratios: Dict[str, Dict[int, List[float]]] = {}
+        for spec in specs:
+            name = spec["name"]
+            if spec["risk_type"] not in RISK_TYPES:
+                raise ValueError(f"Risk template {name!r}: unknown risk_type {spec['risk_type']!r}")
+            splits = [float(s) for s in spec.get("splits") or [1]][:MAX_LEGS]
+            if any(s <= 0 for s in splits):
+                raise ValueError(f"Risk template {name!r}: splits must be positive")
+            self.by_name[name] = spec
+            self.ratios[name] = {n: [s / sum(splits[:n]) for s in splits[:n]] for n in range(1, MAX_LEGS + 1)}
+
+    @classmethod
+    def from_file(cls, path: str = TEMPLATES_PATH):
+        with open(path, "r") as f:
+            return cls(json.load(f))
+
+    def get(self, name: Optional[str]) -> Optional[dict]:
+        return self.by_name.get(name) if name else None
+
+    def legs(self, name: str, take_profits: List[float]) -> dict:
+        """Order legs of one template for the take profits a signal has (0 = none)."""
+        spec = self.by_name[name]
+        targets = [tp for tp in take_profits if tp][:len(spec.get("splits") or [1])] or [0.0]
+        ratios = self.ratios[name][len(targets)]
+        max_lots = float(spec.get("max_lots") or 0)
+        risk_value = float(spec["risk_value"])
+
+        if spec["risk_type"] == "PERCENT":
+            legs = [{"leg": i + 1, "tp": tp, "value": round(risk_value * r, 4),
+                     "max_lots": round(max_lots * r, 2)} for i, (tp, r) in enumerate(zip(targets, ratios))]
+            return {"risk_type": "PERCENT", "risk_value": risk_value, "legs": legs}
+
+        step = float(spec.get("lot_step") or DEFAULT_LOT_STEP)
+        min_lot = float(spec.get("min_lot") or step)
+        total = min(risk_value, max_lots) if max_lots else risk_value
+        sizes = [floor_step(total * r, step) for r in ratios]
+        # Rounding remainder goes to the first leg, legs below the min lot are folded into it
+        sizes[0] = round(sizes[0] + total - sum(sizes), 8)
+        for i in range(len(sizes) - 1, 0, -1):
+            if sizes[i] < min_lot:
+                sizes[0] = round(sizes[0] + sizes.pop(i), 8)
+                targets.pop(i)
+        sizes[0] = max(sizes[0], min_lot)
+        legs = [{"leg": i + 1, "tp": tp, "value": size, "max_lots": 0}
+                for i, (tp, size) in enumerate(zip(targets, sizes))]
+        return {"risk_type": "FIXED", "risk_value": total, "legs": legs}
+
+    def legs_for(self, signal) -> Dict[str, dict]:
+        """{template name: legs} for every template, once per signal."""
+        take_profits = [signal.take_profit, signal.take_profit_2 or 0, signal.take_profit_3 or 0]
+        return {name: self.legs(name, take_profits) for name in self.by_name}
+
+def with_plan(signal: dict, template: str, plan: dict) -> dict:
+    """The signal as a socket of `template` gets it: risk_template, risk_type, risk_value and legs on top."""
+    return dict(signal, risk_template=template, **plan)
+
+def assign_legs(signal):
+    signal.template_legs = templates.legs_for(signal) or None
+
+templates = RiskTemplates.from_file()
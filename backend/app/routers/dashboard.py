@@ -1,28 +1,31 @@
-from fastapi import APIRouter, Request, Form, Depends, HTTPException, status
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi import APIRouter, Request, Form, Depends, HTTPException, UploadFile, File, status
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, StreamingResponse, Response
+from typing import List
 from fastapi.templating import Jinja2Templates
-from supabase import create_client, Client
 import os
+import logging
 from dotenv import load_dotenv
-from datetime import datetime, timedelta
-import uuid
+from datetime import datetime, timezone
+from app import bulk
+from app.repository import create_repository, RepositoryError
+from app.config import settings
+from app.ratelimit import rate_limit
+from app.live import hub, publish
+from app.presence import registry as presence
+from app.redis_pool import REDIS_ERRORS
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+# Audit trail: license changes and every validation outcome
+audit = logging.getLogger("audit.licenses")
+
 router = APIRouter(prefix="/dashboard", tags=["dashboard"])
 # Adjust template directory to be relative to the backend folder
 templates = Jinja2Templates(directory="templates")
 
-# Supabase Setup
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-supabase: Client = None
-
-if SUPABASE_URL and SUPABASE_KEY:
-    try:
-        supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
-    except Exception as e:
-        print(f"Failed to initialize Supabase: {e}")
+# License DB (Supabase, or SQLite when DB_BACKEND=sqlite)
+repo = create_repository()
 
 # Admin Credentials (Hardcoded for now, move to DB later)
 ADMIN_USER = os.getenv("ADMIN_USER", "admin")
@@ -34,6 +37,30 @@ def get_current_user(request: Request):
         return None
     return user
 
+async def close_sockets(keys, reason: str):
+    """Drop the live connections of licenses that were revoked or deleted, and keep them from reconnecting."""
+    try:
+        await presence.forget_valid(keys)
+        await presence.disconnect(keys, reason)
+    except REDIS_ERRORS as e:
+        logger.warning(f"Could not disconnect {len(keys)} license(s): {e}")
+
+def expiry_epoch(value):
+    expires = bulk.parse_expiry(value)
+    return int(expires.replace(tzinfo=timezone.utc).timestamp()) if expires else None
+
+async def update_gateway_access(method, *args):
+    """Mirror a license change into the gateways' handshake check (presence.mark_valid etc.)."""
+    try:
+        await method(*args)
+    except REDIS_ERRORS as e:
+        logger.warning(f"Could not update gateway access ({method.__name__}): {e}")
+
+def wants_json(request: Request):
+    # The dashboard page submits actions with fetch() and applies the change in place,
+    # plain form posts still get the redirect
+    return "application/json" in request.headers.get("accept", "")
+
 @router.get("/login", response_class=HTMLResponse)
 async def login_page(request: Request):
     return templates.TemplateResponse("login.html", {"request": request})
@@ -56,38 +83,51 @@ async def dashboard(request: Request):
     if not user:
         return RedirectResponse(url="/dashboard/login")
     
-    if not supabase:
+    if not repo:
         return HTMLResponse("Supabase not configured. Please set SUPABASE_URL and SUPABASE_KEY in .env")
 
     try:
         # Fetch Licenses
-        response = supabase.table("licenses").select("*").order("created_at", desc=True).execute()
-        licenses = response.data
+        licenses = await repo.list_licenses()
         
-        # Calculate Stats
-        total = len(licenses)
-        active = sum(1 for l in licenses if l['status'] == 'ACTIVE')
-        expired = sum(1 for l in licenses if l['status'] == 'EXPIRED')
+        # Calculate Stats (the page keeps them current from the event stream afterwards)
+        stats = await hub.stats()
+        stats.update({
+            "total_licenses": len(licenses),
+            "active_licenses": sum(1 for l in licenses if l['status'] == 'ACTIVE'),
+            "expired_licenses": sum(1 for l in licenses if l['status'] == 'EXPIRED'),
+        })
 
         return templates.TemplateResponse("dashboard.html", {
             "request": request,
             "user": user,
             "licenses": licenses,
-            "total_licenses": total,
-            "active_licenses": active,
-            "expired_licenses": expired
+            "stats": stats,
+            "recent_signals": hub.recent_signals(),
         })
     except Exception as e:
-        return HTMLResponse(f"Error connecting to Supabase: {str(e)}")
+        return HTMLResponse(f"Error connecting to database: {str(e)}")
+
+@router.get("/events")
+async def dashboard_events(request: Request):
+    """Server-sent events for the dashboard page, see app/live.py."""
+    if not get_current_user(request):
+        raise HTTPException(status_code=401, detail="Not logged in")
+    return StreamingResponse(
+        hub.stream(request.headers.get("last-event-id")),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @router.post("/licenses")
 async def create_license(request: Request, note: str = Form(None), days: int = Form(30)):
     user = get_current_user(request)
     if not user:
         return RedirectResponse(url="/dashboard/login")
+    require_days(days)
 
-    key = f"TRADER-{str(uuid.uuid4())[:8].upper()}"
-    expires_at = (datetime.utcnow() + timedelta(days=days)).isoformat()
+    key = bulk.new_key()
+    expires_at = bulk.expiry(days)
 
     data = {
         "key": key,
@@ -97,10 +137,18 @@ async def create_license(request: Request, note: str = Form(None), days: int = F
     }
     
     try:
-        supabase.table("licenses").insert(data).execute()
+        await repo.create_license(data)
+        audit.info("license created", extra={"key": key, "by": user, "expires_at": expires_at})
     except Exception as e:
-        print(f"Error creating license: {e}")
-        
+        logger.error(f"Error creating license: {e}")
+        if wants_json(request):
+            return JSONResponse({"detail": "Could not create license"}, status_code=500)
+        return RedirectResponse(url="/dashboard", status_code=status.HTTP_303_SEE_OTHER)
+
+    data["hwid"] = None
+    await publish(hub.redis, "license", {"op": "upsert", "license": data})
+    if wants_json(request):
+        return JSONResponse(data, status_code=201)
     return RedirectResponse(url="/dashboard", status_code=status.HTTP_303_SEE_OTHER)
 
 @router.post("/licenses/{key}/delete")
@@ -110,12 +158,128 @@ async def delete_license(request: Request, key: str):
         return RedirectResponse(url="/dashboard/login")
     
     try:
-        supabase.table("licenses").delete().eq("key", key).execute()
+        await repo.delete_license(key)
+        audit.info("license deleted", extra={"key": key, "by": user})
     except Exception as e:
-        print(f"Error deleting license: {e}")
+        logger.error(f"Error deleting license: {e}")
+        if wants_json(request):
+            return JSONResponse({"detail": "Could not delete license"}, status_code=500)
+        return RedirectResponse(url="/dashboard", status_code=status.HTTP_303_SEE_OTHER)
 
+    await publish(hub.redis, "license", {"op": "delete", "key": key})
+    await close_sockets([key], "license-deleted")
+    if wants_json(request):
+        return JSONResponse({"deleted": key})
     return RedirectResponse(url="/dashboard", status_code=status.HTTP_303_SEE_OTHER)
 
+# --- Bulk operations: one batched DB call per request, the outcome is a CSV download ---
+
+def require_days(days: int):
+    if not bulk.valid_days(days):
+        raise HTTPException(status_code=400, detail=f"Days must be between 1 and {bulk.MAX_DAYS}")
+
+def csv_download(text: str, name: str):
+    filename = f"{name}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.csv"
+    return Response(text, media_type="text/csv",
+                    headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+@router.post("/licenses/bulk")
+async def bulk_create_licenses(request: Request, count: int = Form(...), days: int = Form(30), note: str = Form(None)):
+    user = get_current_user(request)
+    if not user:
+        return RedirectResponse(url="/dashboard/login")
+    if not 1 <= count <= bulk.MAX_BULK:
+        raise HTTPException(status_code=400, detail=f"Count must be between 1 and {bulk.MAX_BULK}")
+    require_days(days)
+
+    rows = bulk.new_licenses(count, days, note)
+    try:
+        await repo.create_licenses(rows)
+    except Exception as e:
+        logger.error(f"Error creating {count} licenses: {e}")
+        raise HTTPException(status_code=500, detail="Could not create licenses")
+    audit.info("licenses created", extra={"count": count, "by": user, "note": note, "expires_at": rows[0]["expires_at"]})
+
+    for row in rows:
+        row.update(hwid=None, result="created")
+    await publish(hub.redis, "license", {"op": "upsert_many", "licenses": rows})
+    return csv_download(bulk.result_csv(rows), "licenses_created")
+
+@router.post("/licenses/import")
+async def import_licenses(request: Request, file: UploadFile = File(...), days: int = Form(30)):
+    user = get_current_user(request)
+    if not user:
+        return RedirectResponse(url="/dashboard/login")
+    require_days(days)
+    try:
+        rows, rejected = bulk.parse_import(await file.read(), days)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        existing = {l["key"] for l in await repo.get_licenses([r["key"] for r in rows])} if rows else set()
+        fresh = [r for r in rows if r["key"] not in existing]
+        if fresh:
+            await repo.create_licenses(fresh)
+    except Exception as e:
+        logger.error(f"Error importing licenses: {e}")
+        raise HTTPException(status_code=500, detail="Could not import licenses")
+    audit.info("licenses imported", extra={"count": len(fresh), "by": user, "file": file.filename,
+                                           "skipped": len(rows) - len(fresh) + len(rejected)})
+
+    for row in rows:
+        row.update(hwid=None, result="already exists" if row["key"] in existing else "created")
+    if fresh:
+        await publish(hub.redis, "license", {"op": "upsert_many", "licenses": fresh})
+    return csv_download(bulk.result_csv(rows + rejected), "licenses_imported")
+
+@router.post("/licenses/batch")
+async def batch_update_licenses(request: Request, action: str = Form(...), keys: List[str] = Form(...),
+                                days: int = Form(30)):
+    """extend / revoke / reset_hwid for the selected keys."""
+    user = get_current_user(request)
+    if not user:
+        return RedirectResponse(url="/dashboard/login")
+    if action not in bulk.ACTIONS:
+        raise HTTPException(status_code=400, detail=f"Unknown action '{action}'")
+    keys = bulk.split_keys(keys)
+    if not 1 <= len(keys) <= bulk.MAX_BULK:
+        raise HTTPException(status_code=400, detail=f"Select between 1 and {bulk.MAX_BULK} licenses")
+    if action == "extend":
+        require_days(days)
+
+    updates = []
+    try:
+        found = {l["key"]: l for l in await repo.get_licenses(keys)}
+        if found and action == "extend":
+            updates = [bulk.extended(l, days) for l in found.values()]
+            await repo.update_rows(updates)
+        elif found:
+            fields = {"status": "REVOKED"} if action == "revoke" else {"hwid": None}
+            await repo.update_licenses(list(found), fields)
+            updates = [dict(fields, key=key) for key in found]
+    except Exception as e:
+        logger.error(f"Error running '{action}' on {len(keys)} licenses: {e}")
+        raise HTTPException(status_code=500, detail="Could not update licenses")
+    audit.info(f"licenses {action}", extra={"count": len(found), "by": user, "days": days if action == "extend" else None})
+
+    changed = []
+    for update in updates:
+        license = found[update["key"]]
+        license.update(update)
+        changed.append(license)
+    if changed:
+        await publish(hub.redis, "license", {"op": "upsert_many", "licenses": changed})
+    if action == "revoke" and found:
+        await close_sockets(list(found), "license-revoked")
+    elif action == "extend" and updates:
+        await update_gateway_access(presence.set_valid_until, {u["key"]: expiry_epoch(u["expires_at"]) for u in updates})
+    elif action == "reset_hwid" and found:
+        # The next device to validate takes the license over
+        await update_gateway_access(presence.forget_valid, list(found))
+    results = [dict(found[k], result=action) if k in found else {"key": k, "result": "not found"} for k in keys]
+    return csv_download(bulk.result_csv(results), f"licenses_{action}")
+
 # --- Public API for Client App ---
 
 from pydantic import BaseModel
@@ -124,22 +288,35 @@ class LicenseCheck(BaseModel):
     key: str
     hwid: str
 
-@router.post("/validate")
+# Clients re-validate on every start, so a mass restart must not stampede the license DB.
+# Per-client bucket first, so one noisy client can't drain the shared one.
+@router.post("/validate", dependencies=[
+    Depends(rate_limit("validate_client", settings.VALIDATE_CLIENT_RATE, settings.VALIDATE_CLIENT_BURST, per_client=True)),
+    Depends(rate_limit("validate", settings.VALIDATE_RATE, settings.VALIDATE_BURST)),
+])
 async def validate_license(data: LicenseCheck):
-    if not supabase:
+    result = await check_license(data)
+    if result["valid"]:
+        await update_gateway_access(presence.mark_valid, data.key, data.hwid, expiry_epoch(result.get("expires_at")))
+    audit.info("license validated", extra={"key": data.key, "hwid": data.hwid,
+                                           "valid": result["valid"], "reason": result["message"]})
+    return result
+
+async def check_license(data: LicenseCheck):
+    if not repo:
         raise HTTPException(status_code=500, detail="Database not connected")
 
     # 1. Check if license exists
     try:
-        response = supabase.table("licenses").select("*").eq("key", data.key).execute()
+        license_data = await repo.get_license(data.key)
+    except RepositoryError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-    if not response.data:
+    if not license_data:
         return {"valid": False, "message": "License key not found"}
 
-    license_data = response.data[0]
-
     # 2. Check status
     if license_data['status'] != 'ACTIVE':
         return {"valid": False, "message": f"License is {license_data['status']}"}
@@ -149,13 +326,13 @@ async def validate_license(data: LicenseCheck):
         expires = datetime.fromisoformat(license_data['expires_at'].replace('Z', '+00:00'))
         if datetime.now(expires.tzinfo) > expires:
             # Auto-expire in DB
-            supabase.table("licenses").update({"status": "EXPIRED"}).eq("key", data.key).execute()
+            await repo.update_license(data.key, {"status": "EXPIRED"})
             return {"valid": False, "message": "License has expired"}
 
     # 4. HWID Lock
     if not license_data['hwid']:
         # First time use, lock to this HWID
-        supabase.table("licenses").update({"hwid": data.hwid}).eq("key", data.key).execute()
+        await repo.update_license(data.key, {"hwid": data.hwid})
     elif license_data['hwid'] != data.hwid:
         return {"valid": False, "message": "License is locked to another device"}
 
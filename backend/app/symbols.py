@@ -0,0 +1,56 @@
+import os
+import re
+import json
+from typing import Dict, List, Optional
+
+# Symbol metadata registry (digits, pip size, tick size, contract size, aliases).
+# Loaded once into a dict keyed by every name and alias, so lookups are O(1).
+# Kept free of FastAPI/pydantic imports because the Discord bot uses it too.
+
+SYMBOLS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "symbols.json")
+
+# Broker suffixes like XAUUSD.m, XAUUSD-pro, XAUUSD_i
+_SUFFIX = r"[.\-_#][A-Z0-9]*"
+_SUFFIX_RE = re.compile(_SUFFIX + "$")
+
+class SymbolRegistry:
+    def __init__(self, specs: List[dict]):
+        self.specs = specs
+        self.by_name: Dict[str, dict] = {}
+        for spec in specs:
+            self.by_name[spec["symbol"].upper()] = spec
+            for alias in spec.get("aliases", []):
+                self.by_name[alias.upper()] = spec
+
+        # Longest names first so NAS100 wins over a shorter overlapping alias. A name
+        # must be a whole word (GOLD, not the start of GOLDEN), optionally followed by
+        # a broker suffix, which lookup() strips.
+        names = sorted(self.by_name, key=len, reverse=True)
+        self.pattern = re.compile(r"(?<![A-Z0-9])(?:" + "|".join(re.escape(n) for n in names) + r")"
+                                  r"(?:" + _SUFFIX + r")?(?![A-Z0-9])")
+
+    @classmethod
+    def from_file(cls, path: str = SYMBOLS_PATH):
+        with open(path, "r") as f:
+            return cls(json.load(f))
+
+    def lookup(self, name: str) -> Optional[dict]:
+        name = name.upper()
+        spec = self.by_name.get(name)
+        if spec is None:
+            # Try without the broker suffix, then cache the alias
+            stripped = _SUFFIX_RE.sub("", name)
+            spec = self.by_name.get(stripped)
+            if spec is not None:
+                self.by_name[name] = spec
+        return spec
+
+    def find_in_text(self, text: str) -> Optional[dict]:
+        """Return the spec of the first symbol mentioned in (uppercased) text."""
+        match = self.pattern.search(text)
+        return self.lookup(match.group(0)) if match else None
+
+    def round_price(self, spec: dict, price: float) -> float:
+        return round(price, spec["digits"])
+
+registry = SymbolRegistry.from_file()
@@ -0,0 +1,96 @@
+"""
+Fake Discord gateway for load-testing the ingestion path without Discord.
+
+Feeds synthetic messages through bot.main.handle_message (channel filter,
+parse workers, backend push, counters) at a fixed rate.
+
+    python -m bot.fake_gateway --rate 200 --count 5000 --channels 1,2,3 [--dry-run]
+
+--dry-run replaces the backend POST with a counter, so only the bot side is measured.
+Without it, signals go through the outbox (bot/outbox.py) and the run waits for it to drain.
+"""
+import asyncio
+import argparse
+import random
+import time
+from app.logs import setup_logging
+from bot import main as bot
+
+SAMPLE_MESSAGES = [
+    "XAUUSD SELL LIMIT @ 2050\nSL: 2060\nTP: 2040",
+    "XAUUSD BUY AREA 2031- 2034\nSL 2025\nTP 1 50 PIPS\nTP 2 100 PIPS",
+    "EURUSD BUY STOP @ 1.0850\nSL: 1.0820\nTP1 1.0900\nTP2 1.0950",
+    "GBPUSD SELL @ 1.2650 SL 1.2700 TP 1.2600",
+    "GOLD buy now @ 2045 SL 2038 TP 30 pips",
+    "good morning traders, market is choppy today",
+    "NAS100 SELL LIMIT @ 18250 SL 18320 TP 18100",
+    "results this week: +320 pips",
+]
+
+class FakeChannel:
+    def __init__(self, channel_id):
+        self.id = channel_id
+
+class FakeMessage:
+    next_id = 1
+
+    def __init__(self, content, channel_id):
+        self.id = FakeMessage.next_id
+        FakeMessage.next_id += 1
+        self.content = content
+        self.channel = FakeChannel(channel_id)
+        self.author = None
+        self.reactions = []
+
+    async def add_reaction(self, emoji):
+        self.reactions.append(emoji)
+
+    async def remove_reaction(self, emoji, member):
+        if emoji in self.reactions:
+            self.reactions.remove(emoji)
+
+async def run(rate, count, channels, dry_run):
+    if dry_run:
+        async def fake_push(signal_data, message):
+            bot.stats.incr("pushed")
+            await message.add_reaction("✅")
+        bot.push_signal = fake_push
+
+    bot.start_parse_pool()
+    interval = 1.0 / rate if rate > 0 else 0
+    tasks = []
+    start = time.perf_counter()
+
+    for i in range(count):
+        message = FakeMessage(random.choice(SAMPLE_MESSAGES), random.choice(channels))
+        tasks.append(asyncio.create_task(bot.handle_message(message)))
+        if interval:
+            await asyncio.sleep(interval)
+
+    await asyncio.gather(*tasks)
+    if bot.outbox is not None:
+        while len(bot.outbox):
+            await asyncio.sleep(0.05)
+    elapsed = time.perf_counter() - start
+    bot.stats.report()
+    print(f"Fed {count} messages in {elapsed:.2f}s ({count / elapsed:.0f} msg/s)")
+
+    if bot.parse_pool:
+        bot.parse_pool.shutdown()
+    if bot.http_session:
+        await bot.http_session.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fake Discord gateway event source")
+    parser.add_argument("--rate", type=float, default=100, help="Messages per second (0 = as fast as possible)")
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--channels", default="1", help="Comma separated channel ids to post from")
+    parser.add_argument("--dry-run", action="store_true", help="Don't POST to the backend")
+    args = parser.parse_args(argv)
+    setup_logging("fake_gateway")
+
+    channels = [int(c) for c in args.channels.split(",") if c.strip()]
+    asyncio.run(run(args.rate, args.count, channels, args.dry_run))
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,76 @@
 import discord
 import aiohttp
+import asyncio
+import logging
 import os
 import re
+import time
 import uuid
-from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from app.symbols import SymbolRegistry, registry as default_registry
+from app.logs import setup_logging
+from app.profiling import timed, timings
+from bot.outbox import Outbox, OutboxDrainer
+
+logger = logging.getLogger("bot")
+# Audit trail: every parsed signal and its delivery outcome
+audit = logging.getLogger("audit.bot")
+
+def parse_channel_map(value: str):
+    """
+    TARGET_CHANNELS: comma separated channel ids, optionally with a provider name.
+    e.g. "123456789:goldpro,987654321:fxdaily,555" (provider defaults to the channel id)
+    """
+    channels = {}
+    for entry in value.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        channel_id, _, provider = entry.partition(":")
+        channels[int(channel_id)] = provider.strip() or channel_id.strip()
+    return channels
 
 # Configuration
 DISCORD_TOKEN = os.getenv("DISCORD_TOKEN")
 BACKEND_URL = os.getenv("BACKEND_URL", "http://localhost:8000/api/v1/signals")
-TARGET_CHANNELS = [int(id) for id in os.getenv("TARGET_CHANNELS", "").split(",") if id]
+TARGET_CHANNELS = parse_channel_map(os.getenv("TARGET_CHANNELS", "")) # channel id -> provider
+SYMBOLS_URL = BACKEND_URL.rsplit("/signals", 1)[0] + "/symbols"
+
+# Sharding: SHARD_COUNT is the total number of gateway shards, SHARD_IDS the ones this
+# process runs (e.g. two processes with SHARD_COUNT=4 and SHARD_IDS=0,1 / 2,3).
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", "0"))
+SHARD_IDS = [int(i) for i in os.getenv("SHARD_IDS", "").split(",") if i.strip()]
+# Parse worker processes (0 = parse on the event loop)
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", "0"))
+STATS_INTERVAL = int(os.getenv("STATS_INTERVAL", "60"))
+# Hot-path timing (app/profiling.py), logged with the stats every STATS_INTERVAL
+timings.enabled = os.getenv("PROFILE_TIMING", "").lower() in ("1", "true", "yes")
+
+# Durable outbox: signals are stored here before delivery and retried while the backend is down.
+# Each process needs its own file, so the name includes the shard set.
+OUTBOX_DIR = os.getenv("OUTBOX_DIR", ".")
+OUTBOX_PATH = os.getenv("OUTBOX_PATH") or os.path.join(
+    OUTBOX_DIR, f"outbox-{'-'.join(map(str, SHARD_IDS))}.db" if SHARD_IDS else "outbox.db")
+BATCH_URL = BACKEND_URL.rstrip("/") + "/batch"
+# Max age (seconds) before an undelivered signal is dropped. Market orders go stale much faster.
+MAX_AGE_MARKET = float(os.getenv("MAX_AGE_MARKET", "120"))
+MAX_AGE_PENDING = float(os.getenv("MAX_AGE_PENDING", "900"))
+
+# Symbol metadata, bundled copy until the backend's registry is fetched in on_ready
+symbols = default_registry
 
 intents = discord.Intents.default()
 intents.message_content = True
 
-client = discord.Client(intents=intents)
+def create_client():
+    if SHARD_COUNT:
+        return discord.AutoShardedClient(intents=intents, shard_count=SHARD_COUNT, shard_ids=SHARD_IDS or None)
+    return discord.Client(intents=intents)
 
-def parse_signal(content: str):
+client = create_client()
+
+def parse_signal(content: str, registry: SymbolRegistry = None):
     """
     Advanced parser for signals.
     Supports:
@@ -30,12 +85,13 @@ def parse_signal(content: str):
     # content = re.sub(r'[^\w\s\d\.\-\:\@]', '', content) 
     
     content = content.upper()
+    registry = registry or symbols
     
-    # 1. Extract Symbol
-    symbol_match = re.search(r"(XAUUSD|EURUSD|GBPUSD|BTCUSD|US30|NAS100)", content)
-    if not symbol_match:
+    # 1. Extract Symbol (any symbol or alias in the registry, e.g. GOLD -> XAUUSD)
+    spec = registry.find_in_text(content)
+    if not spec:
         return None
-    symbol = symbol_match.group(1)
+    symbol = spec["symbol"]
 
     # 2. Extract Type
     type_str = "MARKET_EXECUTION"
@@ -72,10 +128,8 @@ def parse_signal(content: str):
     tp1 = 0.0
     tp2 = 0.0
     
-    # Pip Value Logic
-    pip_value = 0.0001
-    if "XAU" in symbol or "JPY" in symbol:
-        pip_value = 0.1 # Standard for Gold/JPY (0.1 / 0.01 depending on digits, using 0.1 safe baseline for Gold)
+    # Pip size comes from the symbol registry
+    pip_value = spec["pip_size"]
 
     def calculate_tp(price_or_pips, is_pips):
         if not is_pips:
@@ -110,13 +164,12 @@ def parse_signal(content: str):
             is_pips = bool(tp_match.group(3))
             tp1 = calculate_tp(val, is_pips)
 
-    # Rounding
-    if pip_value == 0.1:
-        tp1 = round(tp1, 2)
-        tp2 = round(tp2, 2)
-    else:
-        tp1 = round(tp1, 5)
-        tp2 = round(tp2, 5)
+    # Rounding to the symbol's digits
+    digits = spec["digits"]
+    entry_price = round(entry_price, digits)
+    sl = round(sl, digits)
+    tp1 = round(tp1, digits)
+    tp2 = round(tp2, digits)
 
     if symbol and entry_price > 0 and sl > 0 and tp1 > 0:
         return {
@@ -127,46 +180,217 @@ def parse_signal(content: str):
             "stop_loss": sl,
             "take_profit": tp1,      # Primary TP
             "take_profit_2": tp2,    # Secondary TP (0.0 if not found)
-            "timestamp": datetime.now().isoformat(),
+            "digits": digits,
+            "pip_size": pip_value,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
             "source": "discord"
         }
     return None
 
-@client.event
-async def on_ready():
-    print(f'We have logged in as {client.user}')
+# --- Throughput counters (per process) ---
+class IngestStats:
+    def __init__(self, name):
+        self.name = name
+        self.counters = {"messages": 0, "monitored": 0, "signals": 0, "pushed": 0, "push_failed": 0,
+                         "delayed": 0, "expired": 0}
+        self.parse_ms = 0.0
+        self.last_report = time.monotonic()
+        self.last_counters = dict(self.counters)
 
-@client.event
-async def on_message(message):
-    if message.author == client.user:
+    def incr(self, key, n=1):
+        self.counters[key] += n
+
+    def report(self):
+        now = time.monotonic()
+        elapsed = max(now - self.last_report, 1e-6)
+        rates = {k: (v - self.last_counters[k]) / elapsed for k, v in self.counters.items()}
+        avg_parse = self.parse_ms / self.counters["monitored"] if self.counters["monitored"] else 0.0
+        logger.info(f"[stats {self.name}] " + " ".join(f"{k}={v} ({rates[k]:.1f}/s)" for k, v in self.counters.items())
+                    + f" avg_parse={avg_parse:.2f}ms")
+        self.last_report = now
+        self.last_counters = dict(self.counters)
+        if timings.enabled and timings.samples:
+            logger.info(f"[timing {self.name}]\n{timings.format_table()}")
+
+def stats_name():
+    shards = ",".join(map(str, SHARD_IDS)) if SHARD_IDS else ("all" if SHARD_COUNT else "-")
+    return f"pid={os.getpid()} shards={shards}"
+
+stats = IngestStats(stats_name())
+
+async def report_stats():
+    while True:
+        await asyncio.sleep(STATS_INTERVAL)
+        stats.report()
+
+# --- Parse worker pool ---
+parse_pool = None
+
+def init_parse_worker(specs):
+    # Runs in each worker process: use the same registry as the main process
+    global symbols
+    symbols = SymbolRegistry(specs)
+
+def start_parse_pool():
+    global parse_pool
+    if PARSE_WORKERS > 0 and parse_pool is None:
+        parse_pool = ProcessPoolExecutor(max_workers=PARSE_WORKERS, initializer=init_parse_worker, initargs=(symbols.specs,))
+        logger.info(f"Started {PARSE_WORKERS} parse workers")
+
+# Timed here rather than on parse_signal: with PARSE_WORKERS that runs in worker
+# processes, whose stats never reach this process. Includes the worker round trip.
+@timed("bot.parse")
+async def parse(content: str):
+    # Cheap pre-filter on the loop: no known symbol means no signal, skip the worker round trip
+    if not symbols.find_in_text(content.upper()):
+        return None
+    if parse_pool:
+        return await asyncio.get_running_loop().run_in_executor(parse_pool, parse_signal, content)
+    return parse_signal(content)
+
+# --- Backend push ---
+http_session = None
+
+async def get_http_session():
+    # One session for the process so connections to the backend are reused
+    global http_session
+    if http_session is None or http_session.closed:
+        http_session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10))
+    return http_session
+
+def signal_max_age(signal_data):
+    sig_type = signal_data.get("type", "")
+    return MAX_AGE_PENDING if sig_type.endswith(("_LIMIT", "_STOP")) else MAX_AGE_MARKET
+
+outbox = None
+drainer = None
+# Messages from this process waiting on delivery, for reaction updates.
+# Entries recovered from disk after a restart are looked up through the client.
+pending_messages = {} # signal id -> message
+
+def start_outbox():
+    global outbox, drainer
+    if outbox is None:
+        outbox = Outbox(OUTBOX_PATH)
+        drainer = OutboxDrainer(outbox, BATCH_URL, get_http_session, on_delivery_result, on_delivery_delayed)
+        asyncio.create_task(drainer.run())
+        backlog = len(outbox)
+        if backlog:
+            logger.info(f"Outbox has {backlog} undelivered signal(s), resuming delivery")
+
+def message_for(entry):
+    message = pending_messages.get(entry.signal_id)
+    if message is None and entry.channel_id and entry.message_id:
+        channel = client.get_channel(entry.channel_id)
+        if channel is not None:
+            message = channel.get_partial_message(entry.message_id)
+    return message
+
+async def react(message, add, remove=None):
+    if message is None:
         return
+    try:
+        if remove:
+            await message.remove_reaction(remove, client.user)
+        await message.add_reaction(add)
+    except Exception as e:
+        logger.warning(f"Failed to update reaction: {e}")
+
+async def on_delivery_delayed(entries):
+    for entry in entries:
+        stats.incr("delayed")
+        await react(message_for(entry), "⚠️")
+
+async def on_delivery_result(entry, outcome):
+    message = message_for(entry)
+    pending_messages.pop(entry.signal_id, None)
+    delayed = entry.attempts > 0
+    if outcome == "delivered":
+        stats.incr("pushed")
+        audit.info("signal delivered", extra={"signal_id": entry.signal_id, "attempts": entry.attempts})
+        await react(message, "✅", "⚠️" if delayed else None)
+    elif outcome == "expired":
+        stats.incr("expired")
+        audit.warning("signal expired before the backend was reachable", extra={"signal_id": entry.signal_id})
+        await react(message, "⌛", "⚠️" if delayed else None)
+    else:
+        stats.incr("push_failed")
+        audit.warning("signal rejected by the backend", extra={"signal_id": entry.signal_id})
+        await react(message, "❌", "⚠️" if delayed else None)
+
+@timed("bot.push_signal")
+async def push_signal(signal_data, message):
+    # Stored before any network I/O: from here on a backend outage only delays the signal
+    start_outbox()
+    outbox.append(signal_data, signal_max_age(signal_data), message.channel.id, getattr(message, "id", None))
+    pending_messages[signal_data["id"]] = message
+    drainer.notify()
+
+async def handle_message(message):
+    """Everything after the author check, shared by on_message and the fake gateway."""
+    stats.incr("messages")
 
     # Check if channel is monitored (if TARGET_CHANNELS is set)
-    if TARGET_CHANNELS and message.channel.id not in TARGET_CHANNELS:
-        return
+    if TARGET_CHANNELS:
+        provider = TARGET_CHANNELS.get(message.channel.id)
+        if provider is None:
+            return
+    else:
+        provider = str(message.channel.id)
+    stats.incr("monitored")
+
+    # Sampled (LOG_DEBUG_SAMPLE), busy channels would otherwise flood the log
+    logger.debug("message received", extra={"channel_id": message.channel.id, "content": message.content})
+
+    start = time.perf_counter()
+    signal_data = await parse(message.content)
+    stats.parse_ms += (time.perf_counter() - start) * 1000
 
-    print(f"Received message: {message.content}")
-    
-    signal_data = parse_signal(message.content)
-    
     if signal_data:
-        print(f"Parsed Signal: {signal_data}")
+        stats.incr("signals")
+        signal_data["provider"] = provider
+        audit.info("signal parsed", extra={
+            "signal_id": signal_data["id"], "symbol": signal_data["symbol"], "type": signal_data["type"],
+            "provider": provider, "message_id": getattr(message, "id", None)})
         # Send to Backend
+        await push_signal(signal_data, message)
+
+stats_task = None
+
+async def load_symbols():
+    """Replace the bundled symbol registry with the backend's copy (loaded once)."""
+    global symbols
+    try:
         async with aiohttp.ClientSession() as session:
-            try:
-                async with session.post(BACKEND_URL, json=signal_data) as response:
-                    if response.status == 200:
-                        print("Signal sent to backend successfully")
-                        await message.add_reaction("✅")
-                    else:
-                        print(f"Failed to send signal: {response.status}")
-                        await message.add_reaction("❌")
-            except Exception as e:
-                print(f"Error sending to backend: {e}")
-                await message.add_reaction("⚠️")
+            async with session.get(SYMBOLS_URL, timeout=aiohttp.ClientTimeout(total=10)) as response:
+                response.raise_for_status()
+                data = await response.json()
+        symbols = SymbolRegistry(data["symbols"])
+        logger.info(f"Loaded {len(symbols.specs)} symbols from backend")
+    except Exception as e:
+        logger.warning(f"Using bundled symbol registry ({e})")
+
+@client.event
+async def on_ready():
+    global stats_task
+    logger.info(f'We have logged in as {client.user} ({stats.name})')
+    # on_ready fires again after reconnects, only start things once
+    if stats_task is None:
+        start_outbox()
+        await load_symbols()
+        start_parse_pool()
+        stats_task = asyncio.create_task(report_stats())
+
+@client.event
+async def on_message(message):
+    if message.author == client.user:
+        return
+    await handle_message(message)
 
 if __name__ == "__main__":
+    setup_logging("bot")
     if not DISCORD_TOKEN:
-        print("Error: DISCORD_TOKEN not found in environment variables.")
+        logger.error("DISCORD_TOKEN not found in environment variables.")
     else:
-        client.run(DISCORD_TOKEN)
+        # log_handler=None: discord.py logs go through our queue handler instead of its own
+        client.run(DISCORD_TOKEN, log_handler=None)
@@ -0,0 +1,231 @@
+"""
+Durable outbox for parsed signals.
+
+Every signal is appended to a local SQLite database (WAL mode) before the bot
+tries to deliver it, so a backend outage or redeploy only delays signals.
+OutboxDrainer delivers pending entries oldest first, in batches, and backs off
+exponentially while the backend is unreachable. The backend validates every
+signal of a batch on its own and lists the invalid ones, so one bad signal is
+dropped without the valid signals sharing its batch. Entries carry their own
+expiry time: a signal that couldn't be delivered within its max age is dropped
+instead of being sent late, when the price has long moved.
+"""
+import json
+import logging
+import sqlite3
+import time
+import asyncio
+import random
+import aiohttp
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    signal_id TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    channel_id INTEGER,
+    message_id INTEGER,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0
+)
+"""
+
+OutboxEntry = namedtuple("OutboxEntry", "seq signal_id signal channel_id message_id expires_at attempts")
+
+class Outbox:
+    """Append-only queue of undelivered signals. Delivered/expired rows are deleted."""
+
+    def __init__(self, path):
+        self.db = sqlite3.connect(path, isolation_level=None) # autocommit, one statement = one transaction
+        self.db.execute("PRAGMA journal_mode=WAL")
+        # Survives a process crash; only an OS crash can lose the last commits
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(SCHEMA)
+
+    def append(self, signal_data, max_age, channel_id=None, message_id=None):
+        now = time.time()
+        self.db.execute(
+            "INSERT INTO outbox (signal_id, payload, channel_id, message_id, created_at, expires_at)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (signal_data["id"], json.dumps(signal_data), channel_id, message_id, now, now + max_age),
+        )
+
+    def peek(self, limit):
+        """Oldest pending entries (OutboxEntry, signal decoded)."""
+        rows = self.db.execute(
+            "SELECT seq, signal_id, payload, channel_id, message_id, expires_at, attempts"
+            " FROM outbox ORDER BY seq LIMIT ?",
+            (limit,),
+        ).fetchall()
+        return [OutboxEntry(row[0], row[1], json.loads(row[2]), *row[3:]) for row in rows]
+
+    def remove(self, seqs):
+        if seqs:
+            self.db.executemany("DELETE FROM outbox WHERE seq = ?", [(s,) for s in seqs])
+
+    def mark_attempt(self, seqs):
+        if seqs:
+            self.db.executemany("UPDATE outbox SET attempts = attempts + 1 WHERE seq = ?", [(s,) for s in seqs])
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    def close(self):
+        self.db.close()
+
+class OutboxDrainer:
+    """
+    Delivers outbox entries to the backend's batch endpoint.
+
+    on_result(entry, outcome) is awaited for every entry that leaves the outbox,
+    outcome is "delivered", "rejected" (invalid, won't succeed on retry) or "expired".
+    401/403 are treated like an outage (misconfigured credentials or proxy), not as a
+    verdict on the signals. Any other 4xx for a whole batch (e.g. an older backend
+    that validates the batch as a whole) makes the drainer resend its signals one
+    by one, so only the signal the backend refuses is rejected.
+    on_delayed(entries) is awaited for entries whose first delivery attempt failed.
+    """
+
+    def __init__(self, outbox, batch_url, get_session, on_result, on_delayed,
+                 batch_size=50, min_backoff=0.5, max_backoff=30.0):
+        self.outbox = outbox
+        self.batch_url = batch_url
+        self.get_session = get_session
+        self.on_result = on_result
+        self.on_delayed = on_delayed
+        self.batch_size = batch_size
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.backoff = 0.0
+        self.retry_after = 0.0 # server hint from a 429/503 Retry-After header
+        self.retry_after_header = None # Retry-After of the last response
+        self.wakeup = asyncio.Event()
+
+    def notify(self):
+        """Call after append() so a healthy backend gets the signal right away."""
+        self.wakeup.set()
+
+    async def run(self):
+        while True:
+            try:
+                sent = await self.drain_once()
+            except Exception as e:
+                logger.error(f"Outbox drain error: {e}")
+                sent = None
+
+            if sent is None:
+                # Backend down: exponential backoff with jitter, a new signal doesn't cut it short.
+                # A Retry-After hint from the backend's admission control takes precedence.
+                self.backoff = min(self.max_backoff, max(self.min_backoff, self.backoff * 2))
+                delay = max(self.backoff * random.uniform(0.5, 1.0), self.retry_after)
+                self.retry_after = 0.0
+                await asyncio.sleep(delay)
+                continue
+
+            self.backoff = 0.0
+            if sent == 0:
+                self.wakeup.clear()
+                await self.wakeup.wait()
+
+    async def drain_once(self):
+        """Send one batch. Returns the number of entries handled, or None if delivery failed."""
+        entries = self.outbox.peek(self.batch_size)
+        if not entries:
+            return 0
+
+        now = time.time()
+        expired = [e for e in entries if e.expires_at < now]
+        live = [e for e in entries if e.expires_at >= now]
+        self.outbox.remove([e.seq for e in expired])
+        for entry in expired:
+            await self.on_result(entry, "expired")
+        if not live:
+            return len(expired)
+
+        self.outbox.mark_attempt([e.seq for e in live])
+        try:
+            status, body = await self._post(live)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+            logger.warning(f"Backend unreachable, {len(self.outbox)} signal(s) queued: {exc}")
+            await self.on_delayed([e for e in live if e.attempts == 0])
+            return None
+
+        if status == 200:
+            # Indexes of signals the backend found invalid, delivered otherwise
+            rejected = {item.get("index") for item in (body or {}).get("rejected") or ()}
+            await self._settle([(e, "rejected" if i in rejected else "delivered") for i, e in enumerate(live)])
+            if rejected:
+                logger.error(f"Backend rejected {len(rejected)} invalid signal(s)")
+            return len(entries)
+
+        if self._is_permanent(status) and len(live) > 1:
+            logger.warning(f"Backend refused a batch of {len(live)} with {status}, resending one by one")
+            handled = await self._send_each(live)
+            return None if handled is None else len(expired) + handled
+
+        if self._is_permanent(status):
+            logger.error(f"Backend rejected signal {live[0].signal_id}: {status}")
+            await self._settle([(live[0], "rejected")])
+            return len(entries)
+
+        await self._delay(live, status)
+        return None
+
+    async def _post(self, entries):
+        """(status, JSON body or None). Raises aiohttp.ClientError/TimeoutError when the backend is unreachable."""
+        session = await self.get_session()
+        async with session.post(self.batch_url, json={"signals": [e.signal for e in entries]}) as response:
+            self.retry_after_header = response.headers.get("Retry-After")
+            try:
+                body = await response.json(content_type=None) if response.status == 200 else None
+            except ValueError:
+                body = None
+            return response.status, body if isinstance(body, dict) else None
+
+    @staticmethod
+    def _is_permanent(status):
+        # 408/429 are load/timeouts; 401/403 mean the bot or proxy is misconfigured, retry until fixed
+        return 400 <= status < 500 and status not in (401, 403, 408, 429)
+
+    async def _send_each(self, entries):
+        """Send entries one at a time, in order. Returns how many left the outbox, None if it had to stop."""
+        handled = 0
+        for entry in entries:
+            try:
+                status, body = await self._post([entry])
+            except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+                logger.warning(f"Backend unreachable, {len(self.outbox)} signal(s) queued: {exc}")
+                return None
+            if status == 200:
+                rejected = bool((body or {}).get("rejected"))
+                await self._settle([(entry, "rejected" if rejected else "delivered")])
+            elif self._is_permanent(status):
+                logger.error(f"Backend rejected signal {entry.signal_id}: {status}")
+                await self._settle([(entry, "rejected")])
+            else:
+                await self._delay([entry], status)
+                return None
+            handled += 1
+        return handled
+
+    async def _settle(self, results):
+        self.outbox.remove([entry.seq for entry, _ in results])
+        for entry, outcome in results:
+            await self.on_result(entry, outcome)
+
+    async def _delay(self, entries, status):
+        retry_after = self.retry_after_header
+        try:
+            self.retry_after = min(self.max_backoff, float(retry_after)) if retry_after else 0.0
+        except ValueError:
+            self.retry_after = 0.0
+        if status in (401, 403):
+            logger.error(f"Backend refused the bot's requests ({status}), check its credentials or proxy; "
+                         f"{len(self.outbox)} signal(s) queued")
+        else:
+            logger.warning(f"Backend returned {status}, {len(self.outbox)} signal(s) queued")
+        await self.on_delayed([e for e in entries if e.attempts == 0])
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Tests import the service packages the way the Dockerfiles run them, from backend/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
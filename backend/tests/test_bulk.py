@@ -0,0 +1,29 @@
+import pytest
+
+from app import bulk
+
+
+def test_import_keeps_keys_as_written():
+    rows, rejected = bulk.parse_import(b"key,note\nTrader-abc,vip\nTRADER-ABC,other\n", 30)
+    assert [r["key"] for r in rows] == ["Trader-abc", "TRADER-ABC"]
+    assert rejected == []
+
+
+def test_import_rejects_days_below_one():
+    rows, rejected = bulk.parse_import(b"key,days\nA,0\nB,-5\nC,x\nD,7\n", 30)
+    assert [r["key"] for r in rows] == ["D"]
+    assert [(r["key"], r["result"]) for r in rejected] == [("A", "invalid days"), ("B", "invalid days"), ("C", "invalid days")]
+
+
+def test_import_duplicates_compare_exact_keys():
+    rows, rejected = bulk.parse_import(b"key\nA\nA\n", 30)
+    assert len(rows) == 1 and rejected[0]["result"] == "duplicate in file"
+
+
+@pytest.mark.parametrize("days, ok", [(0, False), (1, True), (bulk.MAX_DAYS, True), (bulk.MAX_DAYS + 1, False)])
+def test_valid_days(days, ok):
+    assert bulk.valid_days(days) is ok
+
+
+def test_split_keys_keeps_case():
+    assert bulk.split_keys(["Trader-a, TRADER-B", "Trader-a"]) == ["Trader-a", "TRADER-B"]
@@ -0,0 +1,48 @@
+import os
+import re
+
+import pytest
+
+jinja2 = pytest.importorskip("jinja2")
+
+# The directory Jinja2Templates and the Dockerfile serve from
+TEMPLATES = os.path.join(os.path.dirname(__file__), "..", "templates")
+
+
+def render(**context):
+    env = jinja2.Environment(loader=jinja2.FileSystemLoader(TEMPLATES))
+    defaults = {
+        "request": None,
+        "user": "admin",
+        "licenses": [{"key": "TRADER-0A1B2C3D", "status": "ACTIVE", "note": "vip", "hwid": None,
+                      "expires_at": "2030-01-01T00:00:00"}],
+        "stats": {"total_licenses": 7, "active_licenses": 5, "expired_licenses": 2,
+                  "clients": 3, "signals_per_min": 4, "signals_total": 120},
+        "recent_signals": [],
+    }
+    defaults.update(context)
+    return env.get_template("dashboard.html").render(**defaults)
+
+
+def text_of(html, element_id):
+    return re.search(rf'id="{element_id}"[^>]*>([^<]*)<', html).group(1).strip()
+
+
+def test_stat_cards_show_the_stats():
+    html = render()
+    assert text_of(html, "stat-licenses") == "7"
+    assert text_of(html, "stat-active") == "5"
+    assert text_of(html, "stat-expired") == "2"
+    assert text_of(html, "stat-clients") == "3"
+    assert text_of(html, "stat-total") == "120"
+
+
+def test_live_updates_are_wired():
+    assert "new EventSource('/dashboard/events')" in render()
+
+
+def test_bulk_forms_are_present():
+    html = render()
+    for action in ("/dashboard/licenses/bulk", "/dashboard/licenses/import", "/dashboard/licenses/batch"):
+        assert f'action="{action}"' in html
+    assert 'name="keys" value="TRADER-0A1B2C3D" form="batch-form"' in html
@@ -0,0 +1,38 @@
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+pytest.importorskip("pydantic")
+
+from app.deadlines import assign_deadline, ttl_seconds
+from app.models import Signal
+
+
+def signal(**fields):
+    data = {"id": "s1", "symbol": "XAUUSD", "type": "MARKET_EXECUTION",
+            "entry_price": 2050, "stop_loss": 2060, "take_profit": 2040}
+    data.update(fields)
+    return Signal.parse_obj(data)
+
+
+def test_default_timestamp_is_taken_per_signal():
+    first = signal()
+    time.sleep(0.01)
+    assert signal().timestamp > first.timestamp
+    assert first.timestamp.tzinfo is not None
+
+
+def test_deadline_without_timestamp_starts_now():
+    s = signal()
+    deadline = assign_deadline(s)
+    expected = time.time() * 1000 + ttl_seconds(s) * 1000
+    assert abs(deadline - expected) < 1000
+
+
+def test_naive_timestamp_is_utc():
+    naive = signal(timestamp="2026-01-01T12:00:00")
+    aware = signal(timestamp="2026-01-01T12:00:00+00:00")
+    assert naive.timestamp == aware.timestamp
+    assert assign_deadline(naive) == assign_deadline(aware)
+    assert naive.timestamp == datetime(2026, 1, 1, 12, tzinfo=timezone.utc)
@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+from app.history import SignalHistory
+
+
+class FakeRedis:
+    """The sorted set and key reads SignalHistory.query uses, with Redis ordering rules."""
+
+    def __init__(self):
+        self.zsets = {}
+        self.values = {}
+
+    def add(self, key, member, score):
+        self.zsets.setdefault(key, {})[member] = score
+        self.values[f"signal:{member}"] = member
+
+    @staticmethod
+    def _bound(value, upper):
+        if value in ("+inf", "-inf"):
+            return float(value), False
+        if isinstance(value, str) and value.startswith("("):
+            return float(value[1:]), True
+        return float(value), False
+
+    async def zrevrangebyscore(self, key, max_score, min_score, start=0, num=None, withscores=False):
+        high, high_open = self._bound(max_score, True)
+        low, low_open = self._bound(min_score, False)
+        rows = [(m, s) for m, s in self.zsets.get(key, {}).items()
+                if (s < high or (not high_open and s == high)) and (s > low or (not low_open and s == low))]
+        # Descending score, ties in reverse lexical order
+        rows.sort(key=lambda row: (row[1], row[0]), reverse=True)
+        return rows[start:start + num] if num is not None else rows[start:]
+
+    async def mget(self, keys):
+        return [self.values.get(k) for k in keys]
+
+
+def collect(history, **kwargs):
+    async def run():
+        ids = []
+        async for page in history.iter_pages(**kwargs):
+            ids += page
+        return ids
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def redis():
+    return FakeRedis()
+
+
+def test_pages_through_more_ties_than_a_page(redis):
+    # 1200 signals on one millisecond, plus some before and after
+    for i in range(1200):
+        redis.add("signals:by_time", f"tie-{i:05d}", 1000)
+    for i in range(30):
+        redis.add("signals:by_time", f"new-{i:02d}", 2000 + i)
+        redis.add("signals:by_time", f"old-{i:02d}", 10 + i)
+
+    ids = collect(SignalHistory(redis), page_size=50)
+    assert len(ids) == 1260
+    assert len(set(ids)) == 1260
+    assert ids[:2] == ["new-29", "new-28"]
+    assert ids[30:32] == ["tie-01199", "tie-01198"]
+    assert ids[-1] == "old-00"
+
+
+def test_page_boundaries_inside_ties(redis):
+    for i in range(7):
+        redis.add("signals:by_time", f"s{i}", 500)
+    history = SignalHistory(redis)
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = asyncio.run(history.query(limit=3, cursor=cursor))
+        seen += page
+        if not cursor:
+            break
+    assert seen == [f"s{i}" for i in range(6, -1, -1)]
+
+
+def test_since_until_with_cursor(redis):
+    for score in range(100, 200):
+        redis.add("signals:by_time", f"id{score}", score)
+    ids = collect(SignalHistory(redis), since=120, until=150, page_size=7)
+    assert ids == [f"id{s}" for s in range(150, 119, -1)]
+
+
+def test_cursor_above_until_is_clamped(redis):
+    for score in range(100, 110):
+        redis.add("signals:by_time", f"id{score}", score)
+    page, cursor = asyncio.run(SignalHistory(redis).query(until=104, limit=10, cursor="109:id109"))
+    assert page == ["id104", "id103", "id102", "id101", "id100"]
+    assert cursor is None
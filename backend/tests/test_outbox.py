@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from bot.outbox import Outbox, OutboxDrainer
+
+
+class FakeResponse:
+    def __init__(self, status, body=None):
+        self.status = status
+        self.body = body
+        self.headers = {}
+
+    async def json(self, content_type=None):
+        return self.body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeSession:
+    """Answers each POST with reply(signals) and records the batches it got."""
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.batches = []
+
+    def post(self, url, json):
+        ids = [s["id"] for s in json["signals"]]
+        self.batches.append(ids)
+        return FakeResponse(*self.reply(ids))
+
+
+def run(session, ids):
+    outbox = Outbox(":memory:")
+    for signal_id in ids:
+        outbox.append({"id": signal_id}, max_age=60)
+    results = []
+    delayed = []
+
+    async def get_session():
+        return session
+
+    async def on_result(entry, outcome):
+        results.append((entry.signal_id, outcome))
+
+    async def on_delayed(entries):
+        delayed.extend(e.signal_id for e in entries)
+
+    drainer = OutboxDrainer(outbox, "http://backend/batch", get_session, on_result, on_delayed)
+    handled = asyncio.run(drainer.drain_once())
+    return handled, results, delayed, len(outbox)
+
+
+def test_rejected_items_only_drop_themselves():
+    session = FakeSession(lambda ids: (200, {"rejected": [{"index": 1, "id": ids[1]}]}))
+    handled, results, _, left = run(session, ["a", "b", "c"])
+    assert handled == 3 and left == 0
+    assert results == [("a", "delivered"), ("b", "rejected"), ("c", "delivered")]
+
+
+def test_batch_4xx_falls_back_to_single_sends():
+    def reply(ids):
+        if len(ids) > 1:
+            return (422, None)
+        return (422, None) if ids == ["b"] else (200, {"rejected": []})
+
+    session = FakeSession(reply)
+    handled, results, _, left = run(session, ["a", "b", "c"])
+    assert session.batches == [["a", "b", "c"], ["a"], ["b"], ["c"]]
+    assert handled == 3 and left == 0
+    assert results == [("a", "delivered"), ("b", "rejected"), ("c", "delivered")]
+
+
+def test_single_send_stops_on_outage_and_keeps_the_rest():
+    def reply(ids):
+        if len(ids) > 1:
+            return (400, None)
+        return (503, None) if ids == ["b"] else (200, {})
+
+    session = FakeSession(reply)
+    handled, results, _, left = run(session, ["a", "b", "c"])
+    assert handled is None
+    assert results == [("a", "delivered")]
+    assert left == 2
+
+
+@pytest.mark.parametrize("status", [401, 403])
+def test_auth_errors_are_retried(status):
+    session = FakeSession(lambda ids: (status, None))
+    handled, results, delayed, left = run(session, ["a", "b"])
+    assert handled is None
+    assert results == []
+    assert delayed == ["a", "b"] and left == 2
@@ -0,0 +1,44 @@
+import asyncio
+
+from app.presence import PresenceRegistry, VALID_KEY
+
+
+class FakeBreaker:
+    def allow(self):
+        return True
+
+    def success(self):
+        pass
+
+    def failure(self, error):
+        pass
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+
+    def register_script(self, script):
+        return None
+
+    async def get(self, name):
+        return self.values.get(name)
+
+
+def is_valid(values, key, hwid):
+    redis = FakeRedis()
+    redis.values.update(values)
+    return asyncio.run(PresenceRegistry(redis, FakeBreaker()).is_valid(key, hwid))
+
+
+def test_validated_device_is_admitted():
+    assert is_valid({VALID_KEY.format("TRADER-1"): "hw-a"}, "TRADER-1", "hw-a") is None
+
+
+def test_unvalidated_key_is_refused():
+    assert is_valid({}, "TRADER-1", "hw-a") == "unknown"
+
+
+def test_other_device_is_refused():
+    assert is_valid({VALID_KEY.format("TRADER-1"): "hw-a"}, "TRADER-1", "hw-b") == "device"
+    assert is_valid({VALID_KEY.format("TRADER-1"): "hw-a"}, "TRADER-1", None) == "device"
@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from app.publisher import SignalPublisher
+
+
+class FakeResponse:
+    def __init__(self, ok):
+        self.ok = ok
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise RuntimeError("502")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeSession:
+    def __init__(self, down=()):
+        self.down = set(down)
+        self.urls = []
+
+    def post(self, url, data, headers):
+        self.urls.append(url)
+        return FakeResponse(not any(url.startswith(d) for d in self.down))
+
+
+def fan_out(urls, token="secret", down=()):
+    publisher = SignalPublisher(None, None, None, "signals", "stats:expired", urls, token)
+    publisher.session = FakeSession(down)
+    asyncio.run(publisher._fan_out(["{}", "{}"]))
+    return publisher.counters, publisher.session.urls
+
+
+def test_delivered_to_every_gateway():
+    counters, urls = fan_out("http://a:8001,http://b:8001")
+    assert counters["direct"] == 2 and counters["undelivered"] == 0
+    assert len(urls) == 2
+
+
+def test_some_gateways_failed():
+    counters, _ = fan_out("http://a:8001,http://b:8001", down=["http://b"])
+    assert counters["direct"] == 0 and counters["direct_partial"] == 2
+
+
+def test_every_gateway_failed_counts_as_undelivered():
+    counters, _ = fan_out("http://a:8001", down=["http://a"])
+    assert counters["direct"] == 0 and counters["undelivered"] == 2
+
+
+def test_missing_token_is_not_sent():
+    counters, urls = fan_out("http://a:8001", token="")
+    assert counters["undelivered"] == 2 and urls == []
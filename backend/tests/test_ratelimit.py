@@ -0,0 +1,29 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from app.ratelimit import client_ip
+
+
+def request(peer, forwarded=None):
+    headers = {"x-forwarded-for": forwarded} if forwarded else {}
+    return SimpleNamespace(client=SimpleNamespace(host=peer), headers=headers)
+
+
+def test_direct_peer_cannot_pick_its_address():
+    assert client_ip(request("203.0.113.7", "198.51.100.1")) == "203.0.113.7"
+
+
+def test_trusted_proxy_forwards_client_address():
+    assert client_ip(request("127.0.0.1", "198.51.100.1")) == "198.51.100.1"
+
+
+@pytest.mark.parametrize("forwarded", ["6.6.6.6, 198.51.100.1", "6.6.6.6, 198.51.100.1, 10.0.0.5"])
+def test_spoofed_hops_left_of_the_first_untrusted_one_are_ignored(forwarded):
+    assert client_ip(request("172.18.0.1", forwarded)) == "198.51.100.1"
+
+
+def test_no_peer():
+    assert client_ip(SimpleNamespace(client=None, headers={})) == "unknown"
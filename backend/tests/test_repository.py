@@ -0,0 +1,87 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from app.repository import LicenseRepository, SQLiteLicenseRepository
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = SQLiteLicenseRepository(str(tmp_path / "licenses.db"), timeout=2.0)
+    yield repo
+    repo.close()
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_base_class_is_abstract():
+    with pytest.raises(TypeError):
+        LicenseRepository()
+
+
+def test_create_get_update_delete(repo):
+    run(repo.create_license({"key": "CS-ABC", "status": "ACTIVE", "note": "first"}))
+
+    row = run(repo.get_license("CS-ABC"))
+    assert row["key"] == "CS-ABC"
+    assert row["status"] == "ACTIVE"
+    assert row["note"] == "first"
+    assert row["hwid"] is None
+    assert row["created_at"]
+
+    run(repo.update_license("CS-ABC", {"hwid": "HW1", "status": "REVOKED", "unknown": "ignored"}))
+    row = run(repo.get_license("CS-ABC"))
+    assert (row["hwid"], row["status"]) == ("HW1", "REVOKED")
+
+    run(repo.delete_license("CS-ABC"))
+    assert run(repo.get_license("CS-ABC")) is None
+
+
+def test_get_missing_is_none(repo):
+    assert run(repo.get_license("nope")) is None
+
+
+def test_list_newest_first(repo):
+    run(repo.create_license({"key": "A", "created_at": "2024-01-01T00:00:00"}))
+    run(repo.create_license({"key": "B", "created_at": "2024-02-01T00:00:00"}))
+    run(repo.create_license({"key": "C", "created_at": "2024-03-01T00:00:00"}))
+    assert [r["key"] for r in run(repo.list_licenses())] == ["C", "B", "A"]
+
+
+def test_bulk_insert_and_get_many(repo):
+    rows = [{"key": f"K{i}", "status": "ACTIVE", "expires_at": "2030-01-01T00:00:00"} for i in range(450)]
+    run(repo.create_licenses(rows))
+    # More keys than one IN chunk
+    found = run(repo.get_licenses([f"K{i}" for i in range(0, 450, 2)] + ["missing"]))
+    assert sorted(r["key"] for r in found) == sorted(f"K{i}" for i in range(0, 450, 2))
+
+
+def test_bulk_insert_is_atomic(repo):
+    run(repo.create_license({"key": "DUP"}))
+    with pytest.raises(sqlite3.IntegrityError):
+        run(repo.create_licenses([{"key": "NEW1"}, {"key": "DUP"}, {"key": "NEW2"}]))
+    assert run(repo.get_license("NEW1")) is None
+    assert len(run(repo.list_licenses())) == 1
+
+
+def test_update_many_same_fields(repo):
+    run(repo.create_licenses([{"key": k, "hwid": "HW"} for k in ("A", "B", "C")]))
+    run(repo.update_licenses(["A", "C"], {"hwid": None}))
+    rows = {r["key"]: r for r in run(repo.list_licenses())}
+    assert (rows["A"]["hwid"], rows["B"]["hwid"], rows["C"]["hwid"]) == (None, "HW", None)
+
+
+def test_update_rows_per_row_fields(repo):
+    run(repo.create_licenses([{"key": "A", "expires_at": "2030-01-01"}, {"key": "B", "expires_at": "2030-01-01"}]))
+    run(repo.update_rows([{"key": "A", "expires_at": "2031-01-01"}, {"key": "B", "expires_at": "2032-01-01"}]))
+    rows = {r["key"]: r["expires_at"] for r in run(repo.list_licenses())}
+    assert rows == {"A": "2031-01-01", "B": "2032-01-01"}
+
+
+def test_keys_are_case_sensitive(repo):
+    run(repo.create_license({"key": "MixedCase"}))
+    assert run(repo.get_license("MixedCase")) is not None
+    assert run(repo.get_license("MIXEDCASE")) is None
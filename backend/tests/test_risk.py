@@ -0,0 +1,106 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.risk import RiskTemplates, floor_step, with_plan
+
+
+def plan(spec, take_profits):
+    spec = dict({"name": "t"}, **spec)
+    return RiskTemplates([spec]).legs("t", take_profits)
+
+
+def values(result):
+    return [leg["value"] for leg in result["legs"]]
+
+
+def test_floor_step_doesnt_lose_a_step_to_float_error():
+    assert floor_step(0.3, 0.01) == 0.3
+    assert floor_step(0.0375, 0.01) == 0.03
+
+
+def test_fixed_split_across_three_take_profits():
+    result = plan({"risk_type": "FIXED", "risk_value": 0.10, "splits": [0.5, 0.3, 0.2]}, [1, 2, 3])
+    assert values(result) == [0.05, 0.03, 0.02]
+    assert [leg["tp"] for leg in result["legs"]] == [1, 2, 3]
+    assert all(leg["max_lots"] == 0 for leg in result["legs"])
+
+
+def test_fixed_rounding_remainder_goes_to_leg_one():
+    # Two of three take profits: ratios renormalize to 0.625 / 0.375
+    result = plan({"risk_type": "FIXED", "risk_value": 0.10, "splits": [0.5, 0.3, 0.2]}, [1, 2, 0])
+    assert values(result) == [0.07, 0.03]
+    assert round(sum(values(result)), 8) == 0.10
+
+
+def test_fixed_single_take_profit_gets_everything():
+    result = plan({"risk_type": "FIXED", "risk_value": 0.10, "splits": [0.5, 0.3, 0.2]}, [1, 0, 0])
+    assert result["legs"] == [{"leg": 1, "tp": 1, "value": 0.10, "max_lots": 0}]
+
+
+def test_fixed_without_take_profit_is_one_leg():
+    result = plan({"risk_type": "FIXED", "risk_value": 0.05, "splits": [0.5, 0.5]}, [0, 0, 0])
+    assert result["legs"] == [{"leg": 1, "tp": 0.0, "value": 0.05, "max_lots": 0}]
+
+
+def test_fixed_legs_below_min_lot_fold_into_leg_one():
+    result = plan({"risk_type": "FIXED", "risk_value": 0.01, "splits": [0.5, 0.5]}, [1, 2, 0])
+    assert values(result) == [0.01]
+    assert [leg["tp"] for leg in result["legs"]] == [1]
+
+
+def test_fixed_total_below_min_lot_is_raised_to_it():
+    result = plan({"risk_type": "FIXED", "risk_value": 0.005, "splits": [0.5, 0.5], "min_lot": 0.01}, [1, 2, 0])
+    assert values(result) == [0.01]
+
+
+def test_fixed_coarse_lot_step():
+    result = plan({"risk_type": "FIXED", "risk_value": 0.3, "splits": [1, 1, 1], "lot_step": 0.1}, [1, 2, 3])
+    assert values(result) == [0.1, 0.1, 0.1]
+
+
+def test_fixed_is_capped_by_max_lots():
+    result = plan({"risk_type": "FIXED", "risk_value": 2, "splits": [0.5, 0.5], "max_lots": 1}, [1, 2, 0])
+    assert result["risk_value"] == 1
+    assert values(result) == [0.5, 0.5]
+
+
+def test_percent_shares_risk_and_cap():
+    result = plan({"risk_type": "PERCENT", "risk_value": 2.0, "splits": [0.4, 0.3, 0.3], "max_lots": 10}, [1, 2, 3])
+    assert result["risk_type"] == "PERCENT" and result["risk_value"] == 2.0
+    assert values(result) == [0.8, 0.6, 0.6]
+    assert [leg["max_lots"] for leg in result["legs"]] == [4.0, 3.0, 3.0]
+
+
+def test_percent_single_take_profit():
+    result = plan({"risk_type": "PERCENT", "risk_value": 1.0, "splits": [0.5, 0.5], "max_lots": 5}, [1, 0, 0])
+    assert result["legs"] == [{"leg": 1, "tp": 1, "value": 1.0, "max_lots": 5.0}]
+
+
+@pytest.mark.parametrize("spec", [
+    {"risk_type": "LOTS", "risk_value": 1},
+    {"risk_type": "FIXED", "risk_value": 1, "splits": [0.5, 0]},
+])
+def test_invalid_templates_are_refused(spec):
+    with pytest.raises(ValueError):
+        RiskTemplates([dict({"name": "bad"}, **spec)])
+
+
+def test_legs_for_covers_every_template():
+    templates = RiskTemplates([
+        {"name": "fixed", "risk_type": "FIXED", "risk_value": 0.02, "splits": [1]},
+        {"name": "pct", "risk_type": "PERCENT", "risk_value": 1.0, "splits": [1]},
+    ])
+    signal = SimpleNamespace(take_profit=1.5, take_profit_2=None, take_profit_3=None)
+    assert set(templates.legs_for(signal)) == {"fixed", "pct"}
+
+
+def test_plan_is_merged_onto_the_signal_the_client_reads():
+    signal = {"id": "s1", "symbol": "XAUUSD", "take_profit": 1.5}
+    result = plan({"risk_type": "FIXED", "risk_value": 0.02, "splits": [1]}, [1.5, 0, 0])
+    message = with_plan(signal, "t", result)
+    assert message["risk_template"] == "t"
+    assert message["risk_type"] == "FIXED" and message["risk_value"] == 0.02
+    assert message["legs"] == result["legs"]
+    assert message["symbol"] == "XAUUSD"
+    assert "legs" not in signal
@@ -0,0 +1,43 @@
+import pytest
+
+from app.symbols import SymbolRegistry, registry
+
+
+def symbol_in(text):
+    spec = registry.find_in_text(text.upper())
+    return spec["symbol"] if spec else None
+
+
+@pytest.mark.parametrize("text, symbol", [
+    ("XAUUSD BUY 2000", "XAUUSD"),
+    ("Gold buy now @ 2000", "XAUUSD"),
+    ("SELL GBPJPY 190.50", "GBPJPY"),
+    ("nas100 sell limit", "NAS100"),
+    ("BUY XAUUSD.m 2000", "XAUUSD"),
+    ("buy gold-pro 2000", "XAUUSD"),
+    ("US30_i sell", "US30"),
+    ("Take GOLD.", "XAUUSD"),
+])
+def test_find_in_text(text, symbol):
+    assert symbol_in(text) == symbol
+
+
+@pytest.mark.parametrize("text", [
+    "GOLDEN OPPORTUNITY TODAY",
+    "SILVERWARE on sale",
+    "MYGOLD is up",
+    "US300 index",
+])
+def test_names_inside_words_are_not_symbols(text):
+    assert symbol_in(text) is None
+
+
+def test_later_whole_word_still_found():
+    assert symbol_in("Golden setup on SILVER, buy 25.10") == "XAGUSD"
+
+
+def test_lookup_strips_suffix_and_caches():
+    reg = SymbolRegistry([{"symbol": "EURUSD", "digits": 5, "pip_size": 0.0001, "aliases": []}])
+    assert reg.lookup("eurusd.pro")["symbol"] == "EURUSD"
+    assert "EURUSD.PRO" in reg.by_name
+    assert reg.lookup("EURUSDX") is None
@@ -0,0 +1,136 @@
+import os
+import time
+import queue
+import logging
+import threading
+
+# Execution acknowledgements: EA -> client -> backend.
+# The EA appends one line per order leg to MQL5/Files/BenssHelpTools/Acks.csv:
+#   SIGNAL_ID|LEG|TICKET|RETCODE|FILL_TIME_MS|COMMENT
+# AckReader tails that file from the last byte offset, and ExecutionReporter
+# uploads the parsed records to the backend in batches from a background thread.
+
+# EXECUTIONS_URL = "http://127.0.0.1:8000/api/v1/executions"
+EXECUTIONS_URL = "https://api.thetrader.id/api/v1/executions"
+
+ACK_FILE = os.path.join("BenssHelpTools", "Acks.csv")
+
+# MT5 trade server return codes that mean the order was accepted
+# (TRADE_RETCODE_PLACED, TRADE_RETCODE_DONE, TRADE_RETCODE_DONE_PARTIAL)
+SUCCESS_RETCODES = {10008, 10009, 10010}
+
+logger = logging.getLogger(__name__)
+
+def parse_ack_line(line):
+    parts = line.rstrip("\r\n").split("|", 5)
+    if len(parts) < 5:
+        return None
+    try:
+        return {
+            "signal_id": parts[0],
+            "leg": int(parts[1]),
+            "ticket": int(parts[2]),
+            "retcode": int(parts[3]),
+            "fill_time_ms": int(parts[4]),
+            "comment": parts[5] if len(parts) > 5 else "",
+        }
+    except ValueError:
+        return None
+
+class AckReader:
+    """Incrementally reads new ack records, only consuming complete lines."""
+
+    def __init__(self, mt5_files_path, skip_existing=True):
+        self.path = os.path.join(mt5_files_path, ACK_FILE)
+        self.offset = 0
+        if skip_existing:
+            # Acks from before this session were already reported
+            try:
+                self.offset = os.path.getsize(self.path)
+            except OSError:
+                pass
+
+    def read_new(self):
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return []
+
+        if size < self.offset:
+            # File was truncated/rotated, start from the top
+            self.offset = 0
+        if size == self.offset:
+            return []
+
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            chunk = f.read(size - self.offset)
+
+        # Leave a partially written last line for the next poll
+        end = chunk.rfind(b"\n")
+        if end == -1:
+            return []
+        self.offset += end + 1
+
+        records = []
+        for raw in chunk[:end].decode("utf-8", errors="replace").splitlines():
+            record = parse_ack_line(raw)
+            if record:
+                records.append(record)
+        return records
+
+class ExecutionReporter:
+    """Batches execution reports and POSTs them to the backend off the GUI thread."""
+
+    def __init__(self, license_key="", hwid="", url=EXECUTIONS_URL, batch_size=50, flush_interval=2.0):
+        self.license_key = license_key
+        self.hwid = hwid # the backend only takes reports from the device the license was validated on
+        self.url = url
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=10000)
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def report(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            logger.warning("Execution report queue full, dropping report")
+
+    def stop(self):
+        self.running = False
+
+    def run(self):
+        import requests
+        from backoff import Backoff, retry_after
+        session = requests.Session() # keep-alive between batches
+        backoff = Backoff(base=self.flush_interval, cap=60.0)
+        batch = []
+
+        while self.running:
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            if not batch:
+                continue
+
+            response = None
+            try:
+                response = session.post(self.url, json={"license_key": self.license_key, "hwid": self.hwid, "reports": batch}, timeout=10)
+                response.raise_for_status()
+                batch = []
+                backoff.reset()
+            except Exception as e:
+                # Keep the batch and retry later (capped so it can't grow forever)
+                logger.warning(f"Failed to upload {len(batch)} execution reports: {e}")
+                batch = batch[-1000:]
+                time.sleep(backoff.next(retry_after(response)))
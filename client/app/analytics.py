@@ -0,0 +1,215 @@
+import os
+import logging
+import threading
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from PySide6.QtCore import QObject, Signal
+
+# Trade history analytics.
+# History.csv (written by the EA) is read incrementally into columnar NumPy arrays,
+# and the stats are recomputed with vectorized ops on a worker thread.
+# Line format: TIME|SYMBOL|TYPE|VOLUME|PROFIT  (TIME = "yyyy.mm.dd hh:mi")
+# TIME is the trade server's wall clock. It is parsed and bucketed as UTC
+# throughout, so a deal lands on the day it was written with, whatever the
+# time zone of this PC.
+
+HISTORY_FILE = os.path.join("BenssHelpTools", "History.csv")
+TIME_FORMATS = ("%Y.%m.%d %H:%M", "%Y.%m.%d %H:%M:%S", "%Y.%m.%d")
+
+logger = logging.getLogger(__name__)
+
+def parse_history_line(line):
+    """Returns (time str, epoch seconds, symbol, type, volume, profit) or None."""
+    parts = line.strip().strip('"').split("|")
+    if len(parts) < 5:
+        return None
+    timestamp = None
+    for fmt in TIME_FORMATS:
+        try:
+            timestamp = int(datetime.strptime(parts[0].strip(), fmt).replace(tzinfo=timezone.utc).timestamp())
+            break
+        except ValueError:
+            continue
+    try:
+        volume = float(parts[3])
+        profit = float(parts[4])
+    except ValueError:
+        return None
+    if timestamp is None:
+        return None
+    return parts[0].strip(), timestamp, parts[1].strip(), parts[2].strip(), volume, profit
+
+class TradeHistory:
+    """Append-only columnar store of closed deals."""
+
+    def __init__(self, capacity=1024):
+        self.n = 0
+        self.time = np.empty(capacity, dtype=np.int64)
+        self.symbol = np.empty(capacity, dtype=np.int32)
+        self.is_buy = np.empty(capacity, dtype=np.bool_)
+        self.volume = np.empty(capacity, dtype=np.float64)
+        self.profit = np.empty(capacity, dtype=np.float64)
+        self.equity = np.empty(capacity, dtype=np.float64) # running sum of profit
+        self.peak = np.empty(capacity, dtype=np.float64) # running max of equity (>= 0)
+        self.symbols = [] # code -> name
+        self.symbol_codes = {} # name -> code
+
+    def _grow(self, needed):
+        capacity = len(self.time)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in ("time", "symbol", "is_buy", "volume", "profit", "equity", "peak"):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self.n] = old[:self.n]
+            setattr(self, name, new)
+
+    def _code(self, symbol):
+        code = self.symbol_codes.get(symbol)
+        if code is None:
+            code = len(self.symbols)
+            self.symbols.append(symbol)
+            self.symbol_codes[symbol] = code
+        return code
+
+    def append(self, rows):
+        """rows: parsed history lines. Only the new part of equity/peak is computed."""
+        if not rows:
+            return
+        start, end = self.n, self.n + len(rows)
+        self._grow(end)
+
+        self.time[start:end] = [r[1] for r in rows]
+        self.symbol[start:end] = [self._code(r[2]) for r in rows]
+        self.is_buy[start:end] = ["BUY" in r[3] for r in rows]
+        self.volume[start:end] = [r[4] for r in rows]
+        self.profit[start:end] = [r[5] for r in rows]
+
+        last_equity = self.equity[start - 1] if start else 0.0
+        last_peak = self.peak[start - 1] if start else 0.0
+        self.equity[start:end] = last_equity + np.cumsum(self.profit[start:end])
+        self.peak[start:end] = np.maximum(np.maximum.accumulate(self.equity[start:end]), last_peak)
+        self.n = end
+
+    def stats(self, max_days=30, max_curve_points=500):
+        n = self.n
+        if n == 0:
+            return {"trades": 0}
+
+        profit = self.profit[:n]
+        wins = profit > 0
+        gross_profit = profit[wins].sum()
+        gross_loss = -profit[profit < 0].sum()
+
+        drawdown = self.peak[:n] - self.equity[:n]
+
+        # Per symbol
+        codes = self.symbol[:n]
+        sym_pnl = np.bincount(codes, weights=profit, minlength=len(self.symbols))
+        sym_trades = np.bincount(codes, minlength=len(self.symbols))
+        sym_wins = np.bincount(codes, weights=wins, minlength=len(self.symbols))
+        per_symbol = sorted(
+            ((self.symbols[i], float(sym_pnl[i]), int(sym_trades[i]), float(sym_wins[i] / sym_trades[i]))
+             for i in range(len(self.symbols)) if sym_trades[i]),
+            key=lambda r: r[1], reverse=True,
+        )
+
+        # Per day (UTC day buckets, see TIME above)
+        days, day_index = np.unique(self.time[:n] // 86400, return_inverse=True)
+        day_pnl = np.bincount(day_index, weights=profit)
+        day_trades = np.bincount(day_index)
+        per_day = [
+            (datetime.fromtimestamp(int(d) * 86400, timezone.utc).strftime("%Y-%m-%d"), float(p), int(c))
+            for d, p, c in zip(days[-max_days:], day_pnl[-max_days:], day_trades[-max_days:])
+        ][::-1]
+
+        # Downsampled equity curve for the chart
+        step = max(1, n // max_curve_points)
+        curve = self.equity[:n:step]
+
+        return {
+            "trades": n,
+            "net_profit": float(self.equity[n - 1]),
+            "win_rate": float(wins.mean()),
+            "profit_factor": float(gross_profit / gross_loss) if gross_loss else float("inf"),
+            "max_drawdown": float(drawdown.max()),
+            "per_symbol": per_symbol,
+            "per_day": per_day,
+            "equity_curve": curve.tolist(),
+        }
+
+class AnalyticsWorker(QObject):
+    """Tails History.csv and recomputes stats off the GUI thread."""
+    updated = Signal(object, list) # stats dict, new rows (oldest first)
+
+    def __init__(self):
+        super().__init__()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="analytics")
+        self.lock = threading.Lock()
+        self.busy = False
+        self.reset(None)
+
+    def reset(self, mt5_path):
+        with self.lock:
+            self.path = os.path.join(mt5_path, HISTORY_FILE) if mt5_path else None
+            self.offset = 0
+            self.history = TradeHistory()
+            self.was_reset = True
+
+    def refresh(self):
+        # Skip if the previous refresh is still running, the next timer tick catches up
+        with self.lock:
+            if self.busy or not self.path:
+                return
+            self.busy = True
+        self.executor.submit(self._refresh)
+
+    def _refresh(self):
+        try:
+            with self.lock:
+                rows = self._read_new()
+                if not rows:
+                    return
+                self.history.append(rows)
+                stats = self.history.stats()
+                # Tells the UI to clear its table before adding rows
+                stats["reset"], self.was_reset = self.was_reset, False
+            self.updated.emit(stats, rows)
+        except Exception as e:
+            logger.error(f"Error updating analytics: {e}")
+        finally:
+            self.busy = False
+
+    def _read_new(self):
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return []
+        if size < self.offset:
+            # File replaced, rebuild from scratch
+            self.offset = 0
+            self.history = TradeHistory()
+            self.was_reset = True
+        if size == self.offset:
+            return []
+
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            chunk = f.read(size - self.offset)
+        end = chunk.rfind(b"\n")
+        if end == -1:
+            return []
+        self.offset += end + 1
+
+        rows = []
+        for line in chunk[:end].decode("utf-8", errors="replace").splitlines():
+            row = parse_history_line(line)
+            if row:
+                rows.append(row)
+        return rows
+
+    def close(self):
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,51 @@
+import random
+import re
+
+# Reconnect/retry delays.
+# Decorrelated jitter: each delay is drawn between the base and 3x the previous
+# one (capped), so clients that failed together spread out instead of retrying
+# in lockstep. A Retry-After hint from the server's admission control is a
+# lower bound, with a little jitter on top so hinted clients don't return at
+# the same instant either.
+
+class Backoff:
+    def __init__(self, base=1.0, cap=60.0):
+        self.base = base
+        self.cap = cap
+        self.delay = base
+
+    def next(self, hint=None):
+        self.delay = min(self.cap, random.uniform(self.base, self.delay * 3))
+        if hint:
+            return min(self.cap, max(self.delay, hint + random.uniform(0, self.base)))
+        return self.delay
+
+    def reset(self):
+        self.delay = self.base
+
+def retry_after(response):
+    """Retry-After header of a requests response in seconds, or None."""
+    value = response.headers.get("Retry-After") if response is not None else None
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+_WS_HINT = re.compile(r"retry-after=([\d.]+)")
+
+def ws_close_code(error):
+    """Close code the server sent with a closed WebSocket, or None."""
+    close = getattr(error, "rcvd", None)
+    return getattr(close, "code", None)
+
+def ws_close_reason(error):
+    """Reason the server sent with a closed WebSocket, "" if none."""
+    close = getattr(error, "rcvd", None)
+    return getattr(close, "reason", None) or ""
+
+def ws_retry_after(error):
+    """Hint from a WebSocket close (code 1013, reason "retry-after=N"), or None."""
+    close = getattr(error, "rcvd", None)
+    reason = getattr(close, "reason", None) or getattr(error, "reason", "") or ""
+    match = _WS_HINT.search(reason)
+    return float(match.group(1)) if match else None
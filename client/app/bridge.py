@@ -1,20 +1,53 @@
 import os
 import json
+import time
 import logging
+import envelope
+import deadlines
+import ring
+from profiling import timed
+
+# Fallback price digits per symbol. Signals from the backend carry "digits" and
+# "pip_size" from its symbol registry, this is only used when they don't.
+SYMBOL_DIGITS = {
+    "XAUUSD": 2,
+    "BTCUSD": 2,
+    "US30": 1,
+    "NAS100": 1,
+}
+
+def symbol_digits(symbol: str) -> int:
+    if symbol in SYMBOL_DIGITS:
+        return SYMBOL_DIGITS[symbol]
+    return 3 if "JPY" in symbol else envelope.DEFAULT_DIGITS
+
+# A .tmp file older than this was left by a crashed write
+ORPHAN_TMP_AGE_S = 60
 
 class MT5Bridge:
-    def __init__(self, mt5_files_path: str):
+    def __init__(self, mt5_files_path: str, format: str = "envelope"):
         self.mt5_files_path = mt5_files_path
+        # "envelope" (.sig, read by the EA's fast path), "ring" (shared memory, see ring.py) or "json" (legacy)
+        self.format = format
+        self.ring = None
         self.logger = logging.getLogger(__name__)
 
+    @timed("client.write_signal")
     def write_signal(self, signal_data: dict):
         """
-        Writes the signal to a JSON file in the MT5 Common/Files or MQL5/Files directory.
+        Writes the signal to the MT5 Common/Files or MQL5/Files directory.
+        The file is written under a temp name and renamed, so the EA never sees a partial signal.
         """
+        if deadlines.drop_if_expired(signal_data, "bridge"):
+            return False
+
         if not os.path.exists(self.mt5_files_path):
             self.logger.error(f"MT5 Path does not exist: {self.mt5_files_path}")
             return False
 
+        if self.format == "ring":
+            return self._write_ring(signal_data)
+
         # Ensure Signals subdirectory exists to match EA default
         signals_dir = os.path.join(self.mt5_files_path, "Signals")
         if not os.path.exists(signals_dir):
@@ -24,15 +57,72 @@ class MT5Bridge:
                 self.logger.error(f"Failed to create Signals dir: {e}")
                 return False
 
-        # Filename: signal_{id}.json
-        filename = f"signal_{signal_data['id']}.json"
-        filepath = os.path.join(signals_dir, filename)
-
         try:
-            with open(filepath, 'w') as f:
-                json.dump(signal_data, f)
+            # Filename: signal_{id}.sig (or .json)
+            if self.format == "json":
+                filename = f"signal_{signal_data['id']}.json"
+                content = json.dumps(signal_data)
+            else:
+                filename = f"signal_{signal_data['id']}.sig"
+                content = envelope.encode(signal_data, signal_data.get("digits") or symbol_digits(signal_data["symbol"]))
+
+            filepath = os.path.join(signals_dir, filename)
+            tmp_path = filepath + ".tmp"
+            with open(tmp_path, 'w') as f:
+                f.write(content)
+            os.replace(tmp_path, filepath)
             self.logger.info(f"Signal written to {filepath}")
             return True
         except Exception as e:
             self.logger.error(f"Failed to write signal: {e}")
             return False
+
+    def _write_ring(self, signal_data: dict):
+        """Copy the envelope into the shared ring: no file is created or deleted."""
+        try:
+            content = envelope.encode(signal_data, signal_data.get("digits") or symbol_digits(signal_data["symbol"]))
+            if self.ring is None:
+                self.ring = ring.open_ring(self.mt5_files_path)
+            if not self.ring.write(content.encode("ascii")):
+                self.logger.error(f"Signal ring full ({self.ring.capacity} unread), is the EA running? {self.ring.path}")
+                return False
+            return True
+        except (OSError, ValueError, KeyError) as e:
+            self.logger.error(f"Failed to write signal to ring: {e}")
+            return False
+
+    def sweep(self):
+        """
+        Remove spool files the EA should never act on: signals past their deadline
+        (e.g. written while MT5 was closed) and orphaned .tmp files. Returns the count.
+        """
+        signals_dir = os.path.join(self.mt5_files_path, "Signals")
+        try:
+            names = os.listdir(signals_dir)
+        except OSError:
+            return 0
+
+        now = deadlines.now_ms()
+        removed = 0
+        for name in names:
+            path = os.path.join(signals_dir, name)
+            try:
+                if name.endswith(".tmp"):
+                    stale = time.time() - os.path.getmtime(path) > ORPHAN_TMP_AGE_S
+                elif name.endswith((".sig", ".json")):
+                    with open(path, "r") as f:
+                        content = f.read()
+                    data = envelope.decode(content) if name.endswith(".sig") else json.loads(content)
+                    stale = deadlines.is_expired(data, now)
+                else:
+                    continue
+                if stale:
+                    os.remove(path)
+                    removed += 1
+            except (OSError, ValueError):
+                continue # being written/consumed right now, or not ours to judge
+
+        if removed:
+            deadlines.dropped.incr("sweep", removed)
+            self.logger.warning(f"Swept {removed} stale file(s) from {signals_dir}")
+        return removed
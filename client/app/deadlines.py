@@ -0,0 +1,56 @@
+import time
+import threading
+import logging
+
+# Signal deadlines on the client.
+# The backend stamps every signal with "deadline" (epoch ms). A signal past it
+# is dropped wherever it is found - held behind the license gate, waiting in the
+# fan-out pool, about to be written by the bridge, or already sitting in the
+# Signals folder - so a reconnect or an MT5 restart doesn't replay stale orders.
+
+# Tolerated clock difference between this PC and the server
+CLOCK_SKEW_MS = 2000
+
+logger = logging.getLogger(__name__)
+
+def now_ms():
+    return int(time.time() * 1000)
+
+def is_expired(signal_data, now=None):
+    deadline = signal_data.get("deadline") if signal_data else None
+    if not deadline:
+        return False
+    return (now if now is not None else now_ms()) > int(deadline) + CLOCK_SKEW_MS
+
+def late_by_s(signal_data, now=None):
+    return ((now if now is not None else now_ms()) - int(signal_data.get("deadline") or 0)) / 1000
+
+class DropCounters:
+    """Expired signals dropped per stage ("gate", "pipeline", "fanout", "bridge", "sweep")."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = {}
+
+    def incr(self, stage, n=1):
+        with self.lock:
+            self.counts[stage] = self.counts.get(stage, 0) + n
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.counts)
+
+    def total(self):
+        with self.lock:
+            return sum(self.counts.values())
+
+dropped = DropCounters()
+
+def drop_if_expired(signal_data, stage):
+    """True (and counted/logged) if the signal is past its deadline."""
+    if not is_expired(signal_data):
+        return False
+    dropped.incr(stage)
+    logger.warning(f"Dropped expired signal {str(signal_data.get('id', ''))[:8]} at {stage} "
+                   f"({late_by_s(signal_data):.0f}s late)")
+    return True
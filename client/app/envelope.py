@@ -0,0 +1,126 @@
+"""
+Flat signal envelope written by MT5Bridge and read by the EA (reference codec).
+
+One line, pipe separated, fields always in the same order:
+
+    CS4|<payload length>|<checksum>|<payload>
+
+    payload = id|symbol|type|digits|pip_size|entry|sl|tp1|tp2|tp3|risk_type|risk_value|deadline|legs
+
+- prices are pre-rounded to the symbol's digits
+- digits/pip_size come from the backend symbol registry (carried on the signal),
+  so the EA doesn't have to guess pips per symbol
+- type and risk_type are small ints (indexes into SIGNAL_TYPES / RISK_TYPES)
+- checksum is the byte sum of the payload mod 65536, cheap to compute in MQL5
+- deadline is epoch ms (UTC) after which the EA must not execute the signal, 0 = none
+- legs are the order legs of a server-side risk template (backend app/risk.py),
+  "value:tp:max_lots;..." - lots for FIXED, risk % for PERCENT (max_lots 0 = no cap).
+  Empty = no template, the EA sizes risk_value and splits across the TPs itself.
+- CS3 (no legs field) and CS2 (no deadline either) envelopes are still decoded.
+- the line is ASCII (MQL5 reads it as ANSI): text fields are transliterated,
+  characters without an ASCII form are dropped
+
+The EA decodes it with a single StringSplit, see DecodeEnvelope in ea/BenssHelpTools.mq5.
+"""
+import unicodedata
+
+VERSION = "CS4"
+# Decoded, never written: version -> number of fields it has
+LEGACY_VERSIONS = {"CS3": 13, "CS2": 12}
+SEPARATOR = "|"
+LEG_SEPARATOR = ";"
+LEG_FIELD_SEPARATOR = ":"
+
+# Order matters, the EA uses the same tables
+SIGNAL_TYPES = ["MARKET_EXECUTION", "BUY_LIMIT", "SELL_LIMIT", "BUY_STOP", "SELL_STOP", "BUY", "SELL"]
+RISK_TYPES = ["FIXED", "PERCENT"]
+
+FIELDS = ("id", "symbol", "type", "digits", "pip_size", "entry_price", "stop_loss",
+          "take_profit", "take_profit_2", "take_profit_3", "risk_type", "risk_value", "deadline", "legs")
+PRICE_FIELDS = ("entry_price", "stop_loss", "take_profit", "take_profit_2", "take_profit_3")
+
+DEFAULT_DIGITS = 5
+
+def checksum(payload: str) -> int:
+    return sum(payload.encode("ascii")) & 0xFFFF
+
+def _clean(text) -> str:
+    # The separator and line breaks can't appear inside a field
+    text = unicodedata.normalize("NFKD", str(text)).encode("ascii", "ignore").decode("ascii")
+    return text.replace(SEPARATOR, "").replace("\r", "").replace("\n", "").strip()
+
+def default_pip_size(digits: int) -> float:
+    # 10 points, same as the EA's old heuristic (0.0001 on 5 digits, 0.1 on gold)
+    return 10 * 10 ** -digits
+
+def _format_price(value, digits):
+    return f"{float(value or 0.0):.{digits}f}"
+
+def encode_legs(legs, digits: int) -> str:
+    return LEG_SEPARATOR.join(
+        f"{float(leg['value']):.4f}{LEG_FIELD_SEPARATOR}{_format_price(leg.get('tp'), digits)}"
+        f"{LEG_FIELD_SEPARATOR}{float(leg.get('max_lots') or 0.0):.2f}"
+        for leg in legs or ())
+
+def decode_legs(text: str) -> list:
+    legs = []
+    for number, entry in enumerate(filter(None, text.split(LEG_SEPARATOR)), 1):
+        value, tp, max_lots = entry.split(LEG_FIELD_SEPARATOR)
+        legs.append({"leg": number, "value": float(value), "tp": float(tp), "max_lots": float(max_lots)})
+    return legs
+
+def encode(signal_data: dict, digits: int = None) -> str:
+    if digits is None:
+        digits = int(signal_data.get("digits") or DEFAULT_DIGITS)
+
+    sig_type = signal_data.get("type", "MARKET_EXECUTION")
+    risk_type = signal_data.get("risk_type", "FIXED")
+
+    fields = [
+        _clean(signal_data["id"]),
+        _clean(signal_data["symbol"]),
+        str(SIGNAL_TYPES.index(sig_type) if sig_type in SIGNAL_TYPES else 0),
+        str(digits),
+        _format_price(signal_data.get("pip_size") or default_pip_size(digits), digits),
+    ]
+    fields += [_format_price(signal_data.get(name), digits) for name in PRICE_FIELDS]
+    fields += [
+        str(RISK_TYPES.index(risk_type) if risk_type in RISK_TYPES else 0),
+        f"{float(signal_data.get('risk_value') or 0.0):.2f}",
+        str(int(signal_data.get("deadline") or 0)),
+        encode_legs(signal_data.get("legs"), digits),
+    ]
+
+    payload = SEPARATOR.join(fields)
+    return f"{VERSION}{SEPARATOR}{len(payload)}{SEPARATOR}{checksum(payload)}{SEPARATOR}{payload}"
+
+def decode(line: str) -> dict:
+    """Parse an envelope line. Raises ValueError if it is malformed or corrupted."""
+    line = line.strip()
+    if not line.isascii():
+        raise ValueError("Envelope is not ASCII")
+    version, length, check, payload = (line.split(SEPARATOR, 3) + ["", "", ""])[:4]
+
+    if version != VERSION and version not in LEGACY_VERSIONS:
+        raise ValueError(f"Unsupported envelope version: {version!r}")
+    if len(payload) != int(length):
+        raise ValueError(f"Length mismatch: header {length}, payload {len(payload)}")
+    if checksum(payload) != int(check):
+        raise ValueError("Checksum mismatch")
+
+    parts = payload.split(SEPARATOR)
+    fields = FIELDS if version == VERSION else FIELDS[:LEGACY_VERSIONS[version]]
+    if len(parts) != len(fields):
+        raise ValueError(f"Expected {len(fields)} fields, got {len(parts)}")
+
+    data = dict(zip(fields, (p.strip() for p in parts)))
+    data["type"] = SIGNAL_TYPES[int(data["type"])]
+    data["digits"] = int(data["digits"])
+    data["pip_size"] = float(data["pip_size"])
+    data["risk_type"] = RISK_TYPES[int(data["risk_type"])]
+    data["risk_value"] = float(data["risk_value"])
+    data["deadline"] = int(data.get("deadline") or 0)
+    data["legs"] = decode_legs(data.get("legs") or "")
+    for name in PRICE_FIELDS:
+        data[name] = float(data[name])
+    return data
@@ -0,0 +1,129 @@
+import os
+import csv
+import json
+import logging
+import threading
+from PySide6.QtCore import QObject, Signal
+
+# Background CSV export for the client tables, the trade history file and the
+# log files. Table cells are copied on the GUI thread in one pass before
+# anything is written, so rows added or dropped meanwhile can't shift the rows
+# being exported; files are streamed. Writing happens on a worker thread.
+
+CHUNK_ROWS = 500
+LOG_COLUMNS = ["ts", "level", "logger", "msg"]
+
+logger = logging.getLogger(__name__)
+
+class CsvExporter(QObject):
+    progress = Signal(int) # rows written so far
+    finished = Signal(str, int) # path, rows
+    failed = Signal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.busy = False
+
+    def export_table(self, table, path):
+        """Export a QTableWidget (headers + text of every cell) as it is right now."""
+        if self.busy:
+            return False
+        self.busy = True
+
+        columns = range(table.columnCount())
+        headers = [table.horizontalHeaderItem(c).text() if table.horizontalHeaderItem(c) else "" for c in columns]
+        rows = []
+        for r in range(table.rowCount()):
+            rows.append([table.item(r, c).text() if table.item(r, c) else "" for c in columns])
+        threading.Thread(target=self._write_rows, args=(path, headers, rows), daemon=True).start()
+        return True
+
+    def _write_rows(self, path, headers, rows):
+        written = 0
+        try:
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow(headers)
+                for start in range(0, len(rows), CHUNK_ROWS):
+                    chunk = rows[start:start + CHUNK_ROWS]
+                    writer.writerows(chunk)
+                    written += len(chunk)
+                    self.progress.emit(written)
+            self.finished.emit(path, written)
+        except Exception as e:
+            logger.error(f"Export failed: {e}")
+            self.failed.emit(str(e))
+        finally:
+            self.busy = False
+
+    def export_history(self, history_path, path):
+        """Stream History.csv (EA format) to a standard CSV file."""
+        if self.busy:
+            return False
+        self.busy = True
+        threading.Thread(target=self._write_history, args=(history_path, path), daemon=True).start()
+        return True
+
+    def _write_history(self, history_path, path):
+        from analytics import parse_history_line
+
+        written = 0
+        try:
+            with open(history_path, "r", encoding="utf-8", errors="replace") as src, \
+                 open(path, "w", newline="", encoding="utf-8") as dst:
+                writer = csv.writer(dst)
+                writer.writerow(["Time", "Symbol", "Type", "Volume", "Profit"])
+                for line in src:
+                    row = parse_history_line(line)
+                    if not row:
+                        continue
+                    time_str, _, symbol, deal_type, volume, profit = row
+                    writer.writerow([time_str, symbol, deal_type, volume, profit])
+                    written += 1
+                    if written % 10000 == 0:
+                        self.progress.emit(written)
+            self.finished.emit(path, written)
+        except Exception as e:
+            logger.error(f"Export failed: {e}")
+            self.failed.emit(str(e))
+        finally:
+            self.busy = False
+
+    def export_logs(self, log_path, path):
+        """Stream a JSON-lines log and its rotated backups (oldest first) to CSV."""
+        if self.busy:
+            return False
+        self.busy = True
+        threading.Thread(target=self._write_logs, args=(log_path, path), daemon=True).start()
+        return True
+
+    def _write_logs(self, log_path, path):
+        # RotatingFileHandler: client.log.N is the oldest, client.log the newest
+        backups = []
+        n = 1
+        while os.path.exists(f"{log_path}.{n}"):
+            backups.append(f"{log_path}.{n}")
+            n += 1
+        sources = backups[::-1] + ([log_path] if os.path.exists(log_path) else [])
+
+        written = 0
+        try:
+            with open(path, "w", newline="", encoding="utf-8") as dst:
+                writer = csv.DictWriter(dst, fieldnames=LOG_COLUMNS, extrasaction="ignore")
+                writer.writeheader()
+                for source in sources:
+                    with open(source, "r", encoding="utf-8", errors="replace") as src:
+                        for line in src:
+                            try:
+                                writer.writerow(json.loads(line))
+                            except ValueError:
+                                continue
+                            written += 1
+                            if written % 10000 == 0:
+                                self.progress.emit(written)
+            self.finished.emit(path, written)
+        except Exception as e:
+            logger.error(f"Export failed: {e}")
+            self.failed.emit(str(e))
+        finally:
+            self.busy = False
@@ -0,0 +1,117 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from PySide6.QtCore import QObject, Signal
+from bridge import MT5Bridge
+import deadlines
+
+# Multi-terminal fan-out.
+# Every incoming signal is written to all terminal targets in parallel on a
+# worker pool, so one slow or missing data folder doesn't hold up the others.
+# Results come back to the GUI thread through Qt signals.
+
+RISK_TYPES = {"Fixed Lot": "FIXED", "Risk % per Trade": "PERCENT"}
+# Settings label -> MT5Bridge format ("Shared memory" needs the EA's UseSignalRing and DLL imports)
+BRIDGE_FORMATS = {"Signal files": "envelope", "Shared memory": "ring"}
+
+def parse_risk_type(text):
+    text = str(text).strip()
+    if text in RISK_TYPES:
+        return RISK_TYPES[text]
+    return "PERCENT" if "%" in text or text.upper() == "PERCENT" else "FIXED"
+
+class TerminalTarget:
+    def __init__(self, name, mt5_path, risk_type="FIXED", risk_value=0.01, bridge_format="envelope"):
+        self.name = name
+        self.mt5_path = mt5_path
+        self.risk_type = risk_type
+        self.risk_value = risk_value
+        self.bridge = MT5Bridge(mt5_path, bridge_format)
+
+        # Health state, updated after every write; pool threads may write the same target concurrently
+        self.lock = threading.Lock()
+        self.healthy = True
+        self.last_error = ""
+        self.last_ms = 0.0
+        self.failures = 0
+
+    def record(self, ok, ms, error=""):
+        with self.lock:
+            self.last_ms = ms
+            if ok:
+                self.healthy = True
+                self.last_error = ""
+                self.failures = 0
+            else:
+                self.healthy = False
+                self.last_error = error or "write failed"
+                self.failures += 1
+
+    def write(self, signal_data):
+        """Write one signal to this terminal. Returns (ok, ms) of this write."""
+        data = dict(signal_data)
+        # A signal sized by a server-side risk template (legs) keeps its own risk
+        if not data.get("legs"):
+            data["risk_type"] = self.risk_type
+            data["risk_value"] = self.risk_value
+
+        start = time.perf_counter()
+        ok = self.bridge.write_signal(data)
+        ms = (time.perf_counter() - start) * 1000
+        self.record(ok, ms)
+        return ok, ms
+
+class FanOut(QObject):
+    target_done = Signal(str, str, bool, float) # signal id, target name, ok, ms
+    signal_done = Signal(str, list, float) # signal id, [(target name, ok, ms), ...], total ms (ok None = expired)
+
+    def __init__(self, max_workers=8):
+        super().__init__()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fanout")
+        self.lock = threading.Lock()
+        self.pending = {} # signal id -> [remaining count, results, start time]
+
+    def dispatch(self, signal_data, targets):
+        signal_id = signal_data["id"]
+        if not targets:
+            return
+        with self.lock:
+            self.pending[signal_id] = [len(targets), [], time.perf_counter()]
+        for target in targets:
+            self.executor.submit(self._write, signal_id, signal_data, target)
+
+    def _write(self, signal_id, signal_data, target):
+        # The deadline can pass while the write waits for a pool thread
+        if deadlines.drop_if_expired(signal_data, "fanout"):
+            self._finish(signal_id, target.name, None, 0.0)
+            return
+        start = time.perf_counter()
+        try:
+            ok, ms = target.write(signal_data)
+        except Exception as e:
+            ok, ms = False, (time.perf_counter() - start) * 1000
+            target.record(False, ms, str(e))
+        self.target_done.emit(signal_id, target.name, ok, ms)
+        self._finish(signal_id, target.name, ok, ms)
+
+    def _finish(self, signal_id, target_name, ok, ms):
+        with self.lock:
+            entry = self.pending.get(signal_id)
+            if entry is None:
+                return
+            entry[0] -= 1
+            entry[1].append((target_name, ok, ms))
+            if entry[0] > 0:
+                return
+            del self.pending[signal_id]
+            results = entry[1]
+            total_ms = (time.perf_counter() - entry[2]) * 1000
+        self.signal_done.emit(signal_id, results, total_ms)
+
+    def sweep(self, targets):
+        """Clear stale spool files of every target, on the pool (bridge.sweep reads files)."""
+        for target in targets:
+            self.executor.submit(target.bridge.sweep)
+
+    def close(self):
+        self.executor.shutdown(wait=False)
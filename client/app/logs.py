@@ -0,0 +1,120 @@
+import os
+import json
+import queue
+import logging
+import logging.handlers
+from collections import deque
+from datetime import datetime, timezone
+
+# Client logging, same JSON-lines format as backend/app/logs.py (timestamps in
+# UTC) so client and server logs can be merged. The client ships without the
+# backend package, hence its own copy. Besides the rotated file, the listener
+# thread fills a bounded buffer that the Activity Logs table drains on a timer.
+#
+# The "activity" logger is what MainWindow.log_message writes to; the UI shows
+# it plus warnings/errors from any module.
+
+LOG_DIR = os.path.join(os.getenv("LOCALAPPDATA", os.path.expanduser("~")), "BenssHelpTools", "logs")
+ACTIVITY_LOGGER = "activity"
+MAX_BYTES = 5 * 1024 * 1024
+BACKUPS = 5
+DEBUG_SAMPLE = 50 # keep 1 in N debug records per call site
+UI_CAPACITY = 1000
+
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class SamplingFilter(logging.Filter):
+    def __init__(self, every):
+        super().__init__()
+        self.every = max(1, every)
+        self.counts = {}
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self.every == 1:
+            return True
+        site = (record.pathname, record.lineno)
+        count = self.counts.get(site, 0)
+        self.counts[site] = count + 1
+        return count % self.every == 0
+
+class UiLogBuffer(logging.Handler):
+    """Keeps the newest records for the UI. Filled on the listener thread, drained on the GUI thread."""
+
+    def __init__(self, capacity=UI_CAPACITY):
+        super().__init__()
+        self.records = deque(maxlen=capacity) # oldest are dropped when the UI falls behind
+
+    def emit(self, record):
+        if record.name == ACTIVITY_LOGGER or record.levelno >= logging.WARNING:
+            self.records.append((record.created, record.levelname, record.getMessage()))
+
+    def drain(self):
+        """[(created, level, message), ...] oldest first."""
+        items = []
+        try:
+            while True:
+                items.append(self.records.popleft())
+        except IndexError:
+            return items
+
+class LocalQueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+_listener = None
+ui_buffer = UiLogBuffer()
+
+def setup_logging(level=logging.INFO, log_dir=LOG_DIR):
+    """Route all logging through the queue. Returns the UI buffer."""
+    global _listener
+    if _listener is not None:
+        return ui_buffer
+
+    handlers = [ui_buffer]
+    try:
+        os.makedirs(log_dir, exist_ok=True)
+        file_handler = logging.handlers.RotatingFileHandler(
+            os.path.join(log_dir, "client.log"), maxBytes=MAX_BYTES, backupCount=BACKUPS, encoding="utf-8")
+        file_handler.setFormatter(JsonFormatter())
+        handlers.append(file_handler)
+    except OSError:
+        pass # no file log, the UI view still works
+
+    log_queue = queue.Queue(maxsize=10000)
+    queue_handler = LocalQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(DEBUG_SAMPLE))
+
+    root = logging.getLogger()
+    root.handlers[:] = [queue_handler]
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers)
+    _listener.start()
+    return ui_buffer
+
+def shutdown_logging():
+    global _listener
+    if _listener is not None:
+        _listener.stop() # flushes what is still queued
+        _listener = None
@@ -1,32 +1,135 @@
 import sys
 import json
+import time
 import asyncio
+import logging
 import threading
 import subprocess
-import requests
 import os
 from PySide6.QtWidgets import QApplication, QDialog, QVBoxLayout, QLabel, QLineEdit, QPushButton, QMessageBox
-from PySide6.QtCore import QObject, Signal, Slot, Qt
-import websockets
-from ui import MainWindow
-from updater import Updater
+from PySide6.QtCore import QObject, Signal, Slot, Qt, QTimer
+
+# NOTE: requests, websockets and the updater are imported lazily where they are used,
+# so the window can be shown before those modules are loaded.
+
+# Use local URL for dev, update to production URL for release
+# API_URL = "http://127.0.0.1:8000/dashboard/validate" 
+API_URL = "https://api.thetrader.id/dashboard/validate"
+# Served by the gateway service (port 8001); the reverse proxy routes /ws/signals there, see README
+# SIGNAL_WS_URL=ws://localhost:8001/ws/signals for a local gateway
+WS_URL = os.getenv("SIGNAL_WS_URL", "wss://api.thetrader.id/ws/signals")
+
+# A WebSocket session shorter than this doesn't reset the reconnect backoff
+STABLE_CONNECTION_SECONDS = 30
+# Gateway close codes: license revoked/deleted or missing, license in use on too many devices
+LICENSE_CLOSED = 4001
+DEVICE_LIMIT = 4003
+
+logger = logging.getLogger(__name__)
+
+# --- Startup Timing ---
+class StartupTimer:
+    """Records how long each startup phase takes (relative to process start)."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases = []
+
+    def mark(self, phase):
+        elapsed_ms = (time.perf_counter() - self.start) * 1000
+        self.phases.append((phase, elapsed_ms))
+        logger.info(f"[startup] {phase}: {elapsed_ms:.0f} ms")
+        return elapsed_ms
+
+    def summary(self):
+        return ", ".join(f"{name} {ms:.0f}ms" for name, ms in self.phases)
 
 # --- License Logic ---
+HWID_CACHE_PATH = os.path.join(os.getenv("LOCALAPPDATA", os.path.expanduser("~")), "BenssHelpTools", "hwid")
+_hwid = None
+
 def get_hwid():
+    # wmic takes ~1s to spawn, so the result is cached in memory and on disk
+    global _hwid
+    if _hwid:
+        return _hwid
+
+    try:
+        with open(HWID_CACHE_PATH, 'r') as f:
+            _hwid = f.read().strip()
+        if _hwid:
+            return _hwid
+    except OSError:
+        pass
+
     try:
         # Windows only
         cmd = 'wmic csproduct get uuid'
-        uuid = str(subprocess.check_output(cmd).decode().split('\n')[1].strip())
-        return uuid
+        flags = getattr(subprocess, "CREATE_NO_WINDOW", 0)
+        uuid = str(subprocess.check_output(cmd, creationflags=flags).decode().split('\n')[1].strip())
     except:
         return "UNKNOWN_HWID"
 
+    _hwid = uuid
+    try:
+        os.makedirs(os.path.dirname(HWID_CACHE_PATH), exist_ok=True)
+        with open(HWID_CACHE_PATH, 'w') as f:
+            f.write(uuid)
+    except OSError:
+        pass
+    return _hwid
+
+def check_license(key, attempts=4):
+    """
+    Validate a license key against the server. Returns (valid, message).
+    Only an answer from the server can reject the key: whenever no verdict
+    comes back (unreachable, timeout, busy, 5xx or a non-JSON reply) the saved
+    license is kept, so a server outage doesn't lock out activated clients.
+    """
+    import requests
+    from backoff import Backoff, retry_after
+
+    backoff = Backoff(base=1.0, cap=30.0)
+    for attempt in range(attempts):
+        try:
+            response = requests.post(API_URL, json={"key": key, "hwid": get_hwid()}, timeout=10)
+        except requests.exceptions.RequestException as e:
+            return True, f"Could not reach license server ({type(e).__name__}), using saved license"
+        if response.status_code != 429:
+            break
+        # Server is shedding load (e.g. everyone restarted at once): wait as told and retry
+        if attempt == attempts - 1:
+            return True, "License server busy, using saved license"
+        time.sleep(backoff.next(retry_after(response)))
+
+    if response.status_code >= 500:
+        return True, f"License server error ({response.status_code}), using saved license"
+    try:
+        data = response.json()
+    except ValueError:
+        return True, f"Unexpected license server response ({response.status_code}), using saved license"
+
+    if response.status_code == 200 and data.get("valid"):
+        return True, f"License active (expires {data.get('expires_at')})"
+    return False, data.get("message") or data.get("detail") or "Unknown validation error"
+
+class LicenseCheckWorker(QObject):
+    finished = Signal(bool, str)
+
+    def __init__(self, key):
+        super().__init__()
+        self.key = key
+
+    def run(self):
+        valid, message = check_license(self.key)
+        self.finished.emit(valid, message)
+
 class LicenseDialog(QDialog):
-    def __init__(self, settings_path):
+    def __init__(self, settings):
         super().__init__()
         self.setWindowTitle("Activate License")
         self.setFixedSize(450, 280)
-        self.settings_path = settings_path
+        self.settings = settings # SettingsStore
         
         # Modern Dark Theme Styling
         self.setStyleSheet("""
@@ -100,21 +203,12 @@ class LicenseDialog(QDialog):
         self.setLayout(self.layout)
         
         # Load saved key
-        self.settings = self.load_settings()
-        if "license_key" in self.settings:
-            self.input.setText(self.settings["license_key"])
-
-    def load_settings(self):
-        try:
-            with open(self.settings_path, 'r') as f:
-                return json.load(f)
-        except:
-            return {}
+        if self.settings.get("license_key"):
+            self.input.setText(self.settings.get("license_key"))
 
     def save_key(self, key):
-        self.settings["license_key"] = key
-        with open(self.settings_path, 'w') as f:
-            json.dump(self.settings, f)
+        self.settings.set("license_key", key)
+        self.settings.flush()
 
     def validate(self):
         key = self.input.text().strip()
@@ -125,10 +219,8 @@ class LicenseDialog(QDialog):
         self.btn.setEnabled(False)
         self.btn.setText("Checking...")
         
+        import requests
         hwid = get_hwid()
-        # Use local URL for dev, update to production URL for release
-        # API_URL = "http://127.0.0.1:8000/dashboard/validate" 
-        API_URL = "https://api.thetrader.id/dashboard/validate"
 
         try:
             response = requests.post(API_URL, json={"key": key, "hwid": hwid}, timeout=10)
@@ -149,6 +241,9 @@ class LicenseDialog(QDialog):
             else:
                 # Support both 'message' (our API) and 'detail' (FastAPI default error)
                 error_msg = data.get("message") or data.get("detail") or "Unknown validation error"
+                if response.status_code == 429:
+                    from backoff import retry_after
+                    error_msg = f"Server is busy, please try again in {retry_after(response) or 5:.0f} seconds."
                 QMessageBox.critical(self, "Activation Failed", f"{error_msg}")
                 self.btn.setEnabled(True)
                 self.btn.setText("Activate License")
@@ -168,19 +263,36 @@ class SignalWorker(QObject):
     status_changed = Signal(str)
     log_message = Signal(str)
 
-    def __init__(self, ws_url):
+    def __init__(self, ws_url, identity=None, revalidate=None):
         super().__init__()
         self.ws_url = ws_url
+        # () -> (license key, hwid), read on every connect since the key can change in the dialog
+        self.identity = identity
+        # () -> (valid, message), blocking; the gateway only admits keys validated from this device
+        self.revalidate = revalidate
         self.running = True
 
+    def url(self):
+        from urllib.parse import urlencode
+        key, hwid = self.identity() if self.identity else (None, None)
+        if not key:
+            return self.ws_url
+        return f"{self.ws_url}?{urlencode({'key': key, 'hwid': hwid})}"
+
     def run(self):
         asyncio.run(self.connect_ws())
 
     async def connect_ws(self):
+        import websockets
+        from backoff import Backoff, ws_retry_after, ws_close_code, ws_close_reason
+
+        backoff = Backoff(base=1.0, cap=60.0)
         while self.running:
+            connected_at = None
             try:
                 self.status_changed.emit("Connecting...")
-                async with websockets.connect(self.ws_url) as websocket:
+                async with websockets.connect(self.url()) as websocket:
+                    connected_at = time.monotonic()
                     self.status_changed.emit("Connected")
                     self.log_message.emit("Connected to Signal Server")
                     
@@ -192,42 +304,164 @@ class SignalWorker(QObject):
                         
             except Exception as e:
                 self.status_changed.emit("Disconnected")
-                self.log_message.emit(f"Connection Error: {e}")
-                await asyncio.sleep(5) # Retry delay
+                # Only a connection that stayed up resets the backoff; the gateway
+                # accepts and immediately closes (1013) when it is shedding load.
+                if connected_at and time.monotonic() - connected_at > STABLE_CONNECTION_SECONDS:
+                    backoff.reset()
+                code = ws_close_code(e)
+                if code == LICENSE_CLOSED and ws_close_reason(e) == "license-unknown" and self.revalidate:
+                    # The gateway has no record of this device's validation (first start after
+                    # an upgrade, or the record expired): validate again, then retry normally
+                    valid, message = await asyncio.to_thread(self.revalidate)
+                    self.log_message.emit(f"License re-validated for the signal server: {message}")
+                    delay = backoff.next() if valid else backoff.next(backoff.cap)
+                    await asyncio.sleep(delay)
+                    continue
+                if code in (LICENSE_CLOSED, DEVICE_LIMIT):
+                    # Retrying quickly won't help, wait the longest delay
+                    delay = backoff.next(backoff.cap)
+                    reason = ("License is in use on another device" if code == DEVICE_LIMIT
+                              else "License was closed by the server")
+                    self.log_message.emit(f"{reason}, retrying in {delay:.0f}s")
+                else:
+                    delay = backoff.next(ws_retry_after(e))
+                    self.log_message.emit(f"Connection Error: {e}, retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+class LicenseGate(QObject):
+    """
+    Holds incoming signals until the background license check has passed,
+    so the WebSocket can connect while the check is still running.
+    """
+    signal_ready = Signal(dict)
+
+    def __init__(self):
+        super().__init__()
+        self.licensed = False
+        self.pending = []
+
+    @Slot(dict)
+    def on_signal(self, data):
+        if self.licensed:
+            self.signal_ready.emit(data)
+        else:
+            self.pending.append(data)
+
+    def open(self):
+        import deadlines
+        self.licensed = True
+        pending, self.pending = self.pending, []
+        # Signals held during a slow license check may be stale by now
+        for data in pending:
+            if not deadlines.drop_if_expired(data, "gate"):
+                self.signal_ready.emit(data)
+
+    def close(self):
+        self.licensed = False
+        self.pending = []
+
+class StartupController(QObject):
+    """Startup steps that react to background threads. Lives on the GUI thread, so its slots may open dialogs."""
+
+    def __init__(self, app, window, settings, worker, gate, timer):
+        super().__init__()
+        self.app = app
+        self.window = window
+        self.settings = settings
+        self.worker = worker
+        self.gate = gate
+        self.timer = timer
+        self.connected_once = False
+
+    @Slot(str)
+    def on_first_status(self, status):
+        if status == "Connected" and not self.connected_once:
+            self.connected_once = True
+            self.timer.mark("ws_connected")
+            self.window.log_message(f"Startup: {self.timer.summary()}")
+
+    @Slot(bool, str)
+    def on_license_checked(self, valid, message):
+        self.timer.mark("license_checked")
+        if valid:
+            self.window.log_message(message)
+            self.gate.open()
+            return
+
+        self.gate.close()
+        self.window.log_message(f"License check failed: {message}")
+        QMessageBox.critical(self.window, "License Invalid", message)
+        license_dialog = LicenseDialog(self.settings)
+        if license_dialog.exec() == QDialog.Accepted:
+            self.gate.open()
+        else:
+            self.worker.running = False
+            self.app.quit()
 
 def main():
+    timer = StartupTimer()
+    from logs import setup_logging, shutdown_logging
+    log_buffer = setup_logging()
+
     app = QApplication(sys.argv)
     app.setStyle("Fusion")
+    timer.mark("qt_init")
 
-    # 1. License Check
-    settings_path = "settings.json"
-    license_dialog = LicenseDialog(settings_path)
-    
-    # Show dialog if not activated or just to be safe
-    if license_dialog.exec() != QDialog.Accepted:
-        sys.exit()
+    # 1. License: only block on the dialog when there is no saved key yet,
+    # otherwise the saved key is re-validated in the background.
+    from settings_store import SettingsStore
+    settings = SettingsStore("settings.json")
+    app.aboutToQuit.connect(settings.close)
+    app.aboutToQuit.connect(shutdown_logging)
+    saved_key = settings.get("license_key")
+    if not saved_key:
+        license_dialog = LicenseDialog(settings)
+        if license_dialog.exec() != QDialog.Accepted:
+            sys.exit()
+        timer.mark("license_dialog")
 
     # 2. Main App
-    window = MainWindow()
+    from ui import MainWindow
+    window = MainWindow(settings, log_buffer)
+    window.execution_reporter.hwid = get_hwid()
     window.show()
+    timer.mark("window_shown")
+
+    gate = LicenseGate()
+    gate.signal_ready.connect(window.process_signal)
 
-    # 3. Auto-Updater Check
-    updater = Updater(window)
-    updater.check_for_updates(silent=True)
+    # 3. Worker Thread for WebSocket (connects while the license check runs)
+    worker = SignalWorker(WS_URL, identity=lambda: (settings.get("license_key"), get_hwid()),
+                          revalidate=lambda: check_license(settings.get("license_key")))
 
-    # 4. Worker Thread for WebSocket
-    # ws_url = "ws://localhost:8000/ws/signals" # Localhost
-    ws_url = "wss://api.thetrader.id/ws/signals" # VPS Production
-    worker = SignalWorker(ws_url)
-    
     # Connect signals
-    worker.signal_received.connect(window.process_signal)
+    worker.signal_received.connect(gate.on_signal)
     worker.status_changed.connect(window.update_status)
     worker.log_message.connect(window.log_message)
 
+    startup = StartupController(app, window, settings, worker, gate, timer)
+    # The worker and the license check emit from plain threads: queue the calls onto the GUI thread
+    worker.status_changed.connect(startup.on_first_status, Qt.QueuedConnection)
+
     thread = threading.Thread(target=worker.run, daemon=True)
     thread.start()
 
+    # 4. Background license check for the saved key
+    if saved_key:
+        license_worker = LicenseCheckWorker(saved_key)
+        license_worker.finished.connect(startup.on_license_checked, Qt.QueuedConnection)
+        threading.Thread(target=license_worker.run, daemon=True).start()
+    else:
+        gate.open()
+
+    # 5. Auto-Updater Check, deferred until the event loop is running
+    def start_updater():
+        from updater import Updater
+        window.updater = Updater(window)
+        window.updater.check_for_updates(silent=True)
+        timer.mark("update_check_started")
+    QTimer.singleShot(0, start_updater)
+
     sys.exit(app.exec())
 
 if __name__ == "__main__":
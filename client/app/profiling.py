@@ -0,0 +1,122 @@
+import os
+import sys
+import time
+import logging
+import functools
+import threading
+from collections import Counter, deque
+
+# Opt-in profiling for the client (Debug menu), a trimmed copy of
+# backend/app/profiling.py since the client ships without the backend package.
+# Timing is off unless PROFILE_TIMING=1 is set or the Debug menu turns it on.
+# capture_profile() writes sampled stacks of every thread (GUI, WebSocket
+# worker, fan-out pool) in folded format.
+
+WINDOW = 1000
+MAX_CAPTURE_S = 60
+SAMPLE_INTERVAL = 0.005
+
+logger = logging.getLogger(__name__)
+
+class TimingStats:
+    def __init__(self, window=WINDOW):
+        self.enabled = os.getenv("PROFILE_TIMING", "").lower() in ("1", "true", "yes")
+        self.window = window
+        self.samples = {}
+        self.calls = {}
+        # Fan-out pool threads record concurrently with the GUI thread
+        self.lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self.lock:
+            samples = self.samples.get(name)
+            if samples is None:
+                samples = self.samples[name] = deque(maxlen=self.window)
+            samples.append(seconds)
+            self.calls[name] = self.calls.get(name, 0) + 1
+
+    def reset(self):
+        with self.lock:
+            self.samples = {}
+            self.calls = {}
+
+    def format_table(self):
+        """One line per function over its window, slowest p95 first (ms)."""
+        rows = []
+        with self.lock:
+            windows = [(name, list(window)) for name, window in self.samples.items()]
+        for name, window in windows:
+            samples = sorted(window)
+            if not samples:
+                continue
+
+            def pct(p):
+                return samples[min(len(samples) - 1, int(p / 100 * len(samples)))] * 1000
+            rows.append((pct(95), f"{name}: calls={self.calls.get(name, 0)} mean={sum(samples) / len(samples) * 1000:.3f} "
+                                  f"p50={pct(50):.3f} p95={pct(95):.3f} p99={pct(99):.3f} max={samples[-1] * 1000:.3f}"))
+        return [line for _, line in sorted(rows, reverse=True)]
+
+timings = TimingStats()
+
+def timed(name=None):
+    """Record the wall time of every call while timings.enabled."""
+    def decorate(func):
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not timings.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                timings.record(label, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+def sample_stacks(seconds, interval=SAMPLE_INTERVAL):
+    """Sample the stacks of every other thread, folded (root first). Blocks for `seconds`."""
+    own = threading.get_ident()
+    names = {thread.ident: thread.name for thread in threading.enumerate()}
+    counts = Counter()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            stack.append(names.get(ident, str(ident)))
+            counts[";".join(reversed(stack))] += 1
+        time.sleep(interval)
+    return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+
+_capturing = threading.Event()
+
+def capture_profile(path, seconds, done):
+    """
+    Sample for `seconds` on a background thread and write the profile to path.
+    done(path, error) is called from that thread. False if a capture is already running.
+    """
+    if _capturing.is_set():
+        return False
+    _capturing.set()
+
+    def run():
+        try:
+            text = sample_stacks(min(seconds, MAX_CAPTURE_S))
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+            done(path, None)
+        except Exception as e:
+            logger.error(f"Profile capture failed: {e}")
+            done(path, e)
+        finally:
+            _capturing.clear()
+
+    threading.Thread(target=run, name="profiler", daemon=True).start()
+    return True
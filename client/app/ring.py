@@ -0,0 +1,178 @@
+"""
+Shared-memory signal ring between MT5Bridge and the EA (reference implementation).
+
+A fixed-size file, BenssHelpTools/Signals.ring under MQL5/Files, memory-mapped by
+both sides. Handing over a signal is a memcpy into the mapping, with no file
+create, rename, list or delete per signal:
+
+    header (HEADER_SIZE bytes, little endian)
+       0  magic        u32  "CSRB"
+       4  version      u32
+       8  capacity     u32  record slots
+      12  record_size  u32  bytes per slot
+      16  write_index  u64  records published (client)
+      24  read_index   u64  records consumed (EA)
+      32  sequence     u64  ring generation, a new value whenever the header is (re)initialised
+
+    record (record_size bytes, slot = index % capacity)
+       0  seq          u64  index + 1, stored after the payload
+       8  length       u32
+      12  reserved     u32
+      16  payload      one envelope line (see envelope.py)
+
+Single producer, single consumer. The producer fills the slot, stores its seq,
+then bumps write_index; it never overwrites an unread slot (write() returns False
+when the ring is full, like a failed file write). The consumer polls write_index
+- one 8-byte read - and takes every slot whose seq matches, then stores
+read_index. Stores become visible in program order on x86, which is what MT5
+runs on; the seq check still rejects a slot that isn't published yet.
+
+The EA side is PollRing in ea/BenssHelpTools.mq5 (kernel32 file mapping, needs
+"Allow DLL imports"). RingReader below is the reference reader used by
+tools/mock_ea.py and tools/ring_stress.py.
+"""
+import os
+import mmap
+import struct
+import threading
+
+RING_FILE = os.path.join("BenssHelpTools", "Signals.ring")
+
+MAGIC = 0x42525343 # b"CSRB"
+VERSION = 1
+HEADER_SIZE = 64
+DEFAULT_CAPACITY = 1024
+DEFAULT_RECORD_SIZE = 512
+
+GEOMETRY = struct.Struct("<IIII") # magic, version, capacity, record_size
+RECORD_HEADER = struct.Struct("<QII") # seq, length, reserved
+U64 = struct.Struct("<Q")
+
+WRITE_INDEX = 16
+READ_INDEX = 24
+SEQUENCE = 32
+
+class RingBuffer:
+    def __init__(self, path, capacity=DEFAULT_CAPACITY, record_size=DEFAULT_RECORD_SIZE, create=True):
+        """
+        Map the ring at path. An existing ring is reused as it is (unread records
+        survive a client restart); with create=False the geometry is taken from the
+        header and a missing or foreign file raises ValueError/OSError.
+        """
+        self.path = path
+        if not create:
+            with open(path, "rb") as f:
+                header = f.read(GEOMETRY.size)
+            if len(header) < GEOMETRY.size:
+                raise ValueError(f"Not a signal ring: {path}")
+            magic, version, capacity, record_size = GEOMETRY.unpack(header)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"Not a signal ring: {path}")
+        if record_size <= RECORD_HEADER.size or capacity <= 0:
+            raise ValueError("Ring needs at least one slot bigger than the record header")
+
+        self.capacity = capacity
+        self.record_size = record_size
+        self.size = HEADER_SIZE + capacity * record_size
+        self.lock = threading.Lock() # producer side: fan-out threads may write the same terminal
+
+        if create:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd = os.open(path, os.O_RDWR | (os.O_CREAT if create else 0) | getattr(os, "O_BINARY", 0), 0o644)
+        try:
+            if os.fstat(fd).st_size < self.size:
+                if not create:
+                    raise ValueError(f"Signal ring is truncated: {path}")
+                os.ftruncate(fd, self.size)
+            self.buf = mmap.mmap(fd, self.size)
+        finally:
+            os.close(fd) # the mapping keeps its own handle
+
+        if create and GEOMETRY.unpack_from(self.buf, 0) != (MAGIC, VERSION, capacity, record_size):
+            self._initialise()
+
+    def _initialise(self):
+        # Readers attached to a previous layout see the new generation and resync
+        GEOMETRY.pack_into(self.buf, 0, MAGIC, VERSION, self.capacity, self.record_size)
+        U64.pack_into(self.buf, WRITE_INDEX, 0)
+        U64.pack_into(self.buf, READ_INDEX, 0)
+        U64.pack_into(self.buf, SEQUENCE, int.from_bytes(os.urandom(8), "little") or 1)
+
+    def _get(self, offset):
+        return U64.unpack_from(self.buf, offset)[0]
+
+    @property
+    def write_index(self):
+        return self._get(WRITE_INDEX)
+
+    @property
+    def read_index(self):
+        return self._get(READ_INDEX)
+
+    @property
+    def sequence(self):
+        return self._get(SEQUENCE)
+
+    def pending(self):
+        return self.write_index - self.read_index
+
+    def write(self, payload: bytes) -> bool:
+        """Publish one record. False if the ring is full (the reader isn't keeping up or isn't running)."""
+        if len(payload) > self.record_size - RECORD_HEADER.size:
+            raise ValueError(f"Record of {len(payload)} bytes doesn't fit a {self.record_size} byte slot")
+        with self.lock:
+            index = self._get(WRITE_INDEX)
+            if index - self._get(READ_INDEX) >= self.capacity:
+                return False
+            offset = HEADER_SIZE + (index % self.capacity) * self.record_size
+            start = offset + RECORD_HEADER.size
+            self.buf[start:start + len(payload)] = payload
+            RECORD_HEADER.pack_into(self.buf, offset, index + 1, len(payload), 0)
+            U64.pack_into(self.buf, WRITE_INDEX, index + 1)
+        return True
+
+    def close(self):
+        self.buf.close()
+
+class RingReader:
+    """Consumer side, same steps as PollRing in the EA."""
+
+    def __init__(self, ring: RingBuffer):
+        self.ring = ring
+        self.generation = ring.sequence
+        self.cursor = ring.read_index # resume after the last record the previous reader took
+
+    def poll(self):
+        """Records published since the last poll, oldest first."""
+        ring = self.ring
+        if ring.sequence != self.generation:
+            self.generation = ring.sequence
+            self.cursor = ring.read_index
+        write_index = ring.write_index
+        if write_index == self.cursor:
+            return []
+
+        records = []
+        buf = ring.buf
+        while self.cursor < write_index:
+            offset = HEADER_SIZE + (self.cursor % ring.capacity) * ring.record_size
+            seq, length, _ = RECORD_HEADER.unpack_from(buf, offset)
+            if seq != self.cursor + 1:
+                break # not published yet
+            start = offset + RECORD_HEADER.size
+            records.append(buf[start:start + length])
+            self.cursor += 1
+        U64.pack_into(buf, READ_INDEX, self.cursor)
+        return records
+
+_rings = {}
+_rings_lock = threading.Lock()
+
+def open_ring(mt5_files_path, capacity=DEFAULT_CAPACITY, record_size=DEFAULT_RECORD_SIZE) -> RingBuffer:
+    """The process-wide producer ring of a terminal (bridges rebuilt on settings changes share it)."""
+    path = os.path.abspath(os.path.join(mt5_files_path, RING_FILE))
+    with _rings_lock:
+        ring = _rings.get(path)
+        if ring is None:
+            ring = _rings[path] = RingBuffer(path, capacity, record_size)
+        return ring
@@ -0,0 +1,118 @@
+import os
+import json
+import logging
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from PySide6.QtCore import QObject, Signal, QTimer
+
+# In-memory settings with debounced, atomic writes to settings.json.
+# Reads never touch the disk after startup; set() only updates memory and
+# (re)starts a short timer, and the coalesced snapshot is written on a
+# background thread via temp file + rename.
+
+# name -> (type, default)
+FIELDS = {
+    "mt5_path": (str, ""),
+    "risk_type": (str, "Fixed Lot"),
+    "risk_value": (float, 0.01),
+    "license_key": (str, ""),
+    # How signals reach the EA, see BRIDGE_FORMATS in fanout.py
+    "bridge": (str, "Signal files"),
+    # Additional terminals: [{"name", "mt5_path", "risk_type", "risk_value"}, ...]
+    "terminals": (list, []),
+}
+
+SAVE_DELAY_MS = 500
+
+logger = logging.getLogger(__name__)
+
+def coerce(name, value):
+    """Convert a raw value to the field's type. Raises ValueError if it can't."""
+    if name not in FIELDS:
+        return value
+    field_type, _ = FIELDS[name]
+    if field_type is float and isinstance(value, str):
+        value = value.strip().replace(",", ".")
+    value = field_type(value)
+    if name == "risk_value" and not value > 0:
+        raise ValueError("risk_value must be positive")
+    return value
+
+class SettingsStore(QObject):
+    changed = Signal(str, object) # name, new value
+
+    def __init__(self, path="settings.json", parent=None):
+        super().__init__(parent)
+        self.path = os.path.abspath(path)
+        self.values = {name: default for name, (_, default) in FIELDS.items()}
+        self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="settings")
+        self.pending_write = None
+
+        self.save_timer = QTimer(self)
+        self.save_timer.setSingleShot(True)
+        self.save_timer.setInterval(SAVE_DELAY_MS)
+        self.save_timer.timeout.connect(self.flush)
+
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        for name, value in data.items():
+            try:
+                self.values[name] = coerce(name, value)
+            except (TypeError, ValueError):
+                pass # keep default for bad values
+
+    def get(self, name, default=None):
+        return self.values.get(name, default)
+
+    def set(self, name, value):
+        """Update a value in memory. Returns False if it can't be converted to the field type."""
+        try:
+            value = coerce(name, value)
+        except (TypeError, ValueError):
+            return False
+
+        if self.values.get(name) == value:
+            return True
+
+        self.values[name] = value
+        self.changed.emit(name, value)
+        self.save_timer.start() # restart: rapid edits coalesce into one write
+        return True
+
+    def flush(self, wait=False):
+        """Write the current snapshot now (on the writer thread)."""
+        self.save_timer.stop()
+        snapshot = dict(self.values)
+        self.pending_write = self.writer.submit(self._write, snapshot)
+        if wait:
+            self.pending_write.result()
+
+    def _write(self, snapshot):
+        directory = os.path.dirname(self.path)
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(prefix=".settings-", suffix=".tmp", dir=directory)
+            with os.fdopen(fd, "w") as f:
+                json.dump(snapshot, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f"Failed to save settings: {e}")
+            if tmp_path:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
+    def close(self):
+        if self.save_timer.isActive():
+            self.flush()
+        self.writer.shutdown(wait=True)
@@ -1,18 +1,55 @@
+import time
+import logging
+from datetime import datetime
 from PySide6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                                QLabel, QPushButton, QTableWidget, QTableWidgetItem, 
                                QHeaderView, QLineEdit, QStatusBar, QTabWidget, QFrame)
 from PySide6.QtCore import Qt, Signal, Slot
 from PySide6.QtGui import QColor, QFont
+from logs import ACTIVITY_LOGGER, ui_buffer
+import deadlines
+import profiling
+
+activity = logging.getLogger(ACTIVITY_LOGGER)
+# Audit trail of received signals (file log only)
+audit = logging.getLogger("audit.signals")
+
+MAX_LOG_ROWS = 1000
+LOG_REFRESH_MS = 250
+SWEEP_INTERVAL_MS = 30000
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, settings, log_buffer=ui_buffer):
         super().__init__()
+        self.settings = settings # SettingsStore
+        self.log_buffer = log_buffer # filled by the logging thread, drained by flush_logs
+        self.settings.changed.connect(self.on_setting_changed)
         self.setWindowTitle("BenssHelpTools Client")
         self.setMinimumSize(900, 650)
         
         # Apply Modern Dark Theme
         self.apply_stylesheet()
 
+        # Export Menu
+        from exporter import CsvExporter
+        self.exporter = CsvExporter(self)
+        self.exporter.finished.connect(lambda path, rows: self.log_message(f"Exported {rows} rows to {path}"))
+        self.exporter.failed.connect(lambda error: self.log_message(f"Export failed: {error}"))
+        export_menu = self.menuBar().addMenu("Export")
+        export_menu.addAction("Signals CSV...").triggered.connect(lambda: self.export_table(self.signal_table, "signals"))
+        # From the log files: the Activity Logs table only keeps the newest MAX_LOG_ROWS
+        export_menu.addAction("Activity Logs CSV...").triggered.connect(self.export_logs)
+        export_menu.addAction("Trade History CSV...").triggered.connect(self.export_history)
+
+        # Debug Menu (profiling is off until used, see profiling.py)
+        debug_menu = self.menuBar().addMenu("Debug")
+        timing_action = debug_menu.addAction("Hot-Path Timing")
+        timing_action.setCheckable(True)
+        timing_action.setChecked(profiling.timings.enabled)
+        timing_action.toggled.connect(self.set_timing)
+        debug_menu.addAction("Log Timing Table").triggered.connect(self.log_timing_table)
+        debug_menu.addAction("Capture Profile (10 s)...").triggered.connect(self.capture_profile)
+
         # Central Widget
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
@@ -64,6 +101,9 @@ class MainWindow(QMainWindow):
         self.history_table.setEditTriggers(QTableWidget.NoEditTriggers)
         tabs.addTab(self.history_table, "Trade History")
 
+        # Analytics Tab
+        tabs.addTab(self.build_analytics_tab(), "Analytics")
+
         # Settings Tab
         settings_widget = QWidget()
         settings_layout = QVBoxLayout(settings_widget)
@@ -77,29 +117,69 @@ class MainWindow(QMainWindow):
         mt5_layout.addWidget(QLabel("MT5 Data Path:"))
         self.mt5_path_input = QLineEdit()
         self.mt5_path_input.setPlaceholderText("C:\\Users\\...\\AppData\\Roaming\\MetaQuotes\\Terminal\\...\\MQL5\\Files")
-        self.mt5_path_input.textChanged.connect(self.save_settings)
+        # Applied when editing is done: a new path rebuilds the bridges and ack readers (disk I/O)
+        self.mt5_path_input.editingFinished.connect(lambda: self.settings.set("mt5_path", self.mt5_path_input.text()))
         mt5_layout.addWidget(self.mt5_path_input)
         settings_layout.addWidget(mt5_group)
 
+        # Bridge to the EA: one file per signal, or the shared-memory ring
+        bridge_group = QWidget()
+        bridge_layout = QHBoxLayout(bridge_group)
+        bridge_layout.setContentsMargins(0, 0, 0, 0)
+        bridge_layout.addWidget(QLabel("EA Bridge:"))
+        from PySide6.QtWidgets import QComboBox
+        self.bridge_combo = QComboBox()
+        self.bridge_combo.addItems(["Signal files", "Shared memory"])
+        self.bridge_combo.currentTextChanged.connect(lambda text: self.settings.set("bridge", text))
+        bridge_layout.addWidget(self.bridge_combo)
+        bridge_layout.addStretch()
+        settings_layout.addWidget(bridge_group)
+
         # Risk Settings
         risk_group = QWidget()
         risk_layout = QHBoxLayout(risk_group)
         risk_layout.setContentsMargins(0, 10, 0, 10)
         
         risk_layout.addWidget(QLabel("Risk Type:"))
-        from PySide6.QtWidgets import QComboBox
         self.risk_type_combo = QComboBox()
         self.risk_type_combo.addItems(["Fixed Lot", "Risk % per Trade"])
-        self.risk_type_combo.currentTextChanged.connect(self.save_settings)
+        self.risk_type_combo.currentTextChanged.connect(lambda text: self.settings.set("risk_type", text))
         risk_layout.addWidget(self.risk_type_combo)
         
         risk_layout.addWidget(QLabel("Value:"))
         self.risk_value_input = QLineEdit()
         self.risk_value_input.setPlaceholderText("0.01 or 1.0")
-        self.risk_value_input.textChanged.connect(self.save_settings)
+        self.risk_value_input.textChanged.connect(self.on_risk_value_edited)
+        self.risk_value_input.editingFinished.connect(self.on_risk_value_finished)
         risk_layout.addWidget(self.risk_value_input)
+        # Shown while the text isn't a valid value: trades keep the last valid one
+        self.risk_value_error = QLabel()
+        self.risk_value_error.setStyleSheet("color: #f87171;")
+        self.risk_value_error.hide()
+        risk_layout.addWidget(self.risk_value_error)
         
         settings_layout.addWidget(risk_group)
+
+        # Additional Terminals (signals are written to the primary path above plus all of these)
+        settings_layout.addWidget(QLabel("Additional Terminals:"))
+        self.terminals_table = QTableWidget()
+        self.terminals_table.setColumnCount(5)
+        self.terminals_table.setHorizontalHeaderLabels(["Name", "MT5 Data Path", "Risk Type", "Value", "Status"])
+        self.terminals_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.terminals_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+        self.terminals_table.verticalHeader().setVisible(False)
+        self.terminals_table.itemChanged.connect(self.save_terminals)
+        settings_layout.addWidget(self.terminals_table)
+
+        terminal_buttons = QHBoxLayout()
+        add_terminal_btn = QPushButton("+ Add Terminal")
+        add_terminal_btn.clicked.connect(self.add_terminal)
+        remove_terminal_btn = QPushButton("Remove Selected")
+        remove_terminal_btn.clicked.connect(self.remove_terminal)
+        terminal_buttons.addWidget(add_terminal_btn)
+        terminal_buttons.addWidget(remove_terminal_btn)
+        terminal_buttons.addStretch()
+        settings_layout.addLayout(terminal_buttons)
         
         settings_layout.addStretch()
         tabs.addTab(settings_widget, "Settings")
@@ -122,15 +202,47 @@ class MainWindow(QMainWindow):
         log_layout.addWidget(self.log_widget)
         layout.addWidget(log_container)
         
+        # Fan-out to all terminal targets
+        from fanout import FanOut
+        self.targets = []
+        self.fanout = FanOut()
+        self.fanout.target_done.connect(self.on_target_done)
+        self.fanout.signal_done.connect(self.on_signal_done)
+
+        # Execution acks written by the EA (one reader per terminal)
+        from acks import ExecutionReporter
+        self.sent_signals = {} # signal id -> time first written to MT5 (ms)
+        self.ack_readers = {} # mt5 path -> AckReader
+        self.execution_reporter = ExecutionReporter(self.settings.get("license_key"))
+
         # Load Settings
         self.load_settings()
 
-        # Timer for History Refresh
+        # Timer for History Refresh (read + stats run on the analytics worker)
         from PySide6.QtCore import QTimer
+        from analytics import AnalyticsWorker
+        self.analytics = AnalyticsWorker()
+        self.analytics.reset(self.settings.get("mt5_path"))
+        self.analytics.updated.connect(self.on_analytics_updated)
         self.history_timer = QTimer(self)
         self.history_timer.timeout.connect(self.load_history)
         self.history_timer.start(5000) # Refresh every 5 seconds
 
+        self.ack_timer = QTimer(self)
+        self.ack_timer.timeout.connect(self.poll_acks)
+        self.ack_timer.start(500)
+
+        # Activity Logs are appended in batches instead of one row per event
+        self.log_timer = QTimer(self)
+        self.log_timer.timeout.connect(self.flush_logs)
+        self.log_timer.start(LOG_REFRESH_MS)
+
+        # Stale signal files (e.g. written while MT5 was closed) are removed before the EA sees them
+        self.sweep_timer = QTimer(self)
+        self.sweep_timer.timeout.connect(lambda: self.fanout.sweep(self.targets))
+        self.sweep_timer.start(SWEEP_INTERVAL_MS)
+        QTimer.singleShot(0, lambda: self.fanout.sweep(self.targets))
+
     def apply_stylesheet(self):
         style = """
         QMainWindow {
@@ -291,69 +403,163 @@ class MainWindow(QMainWindow):
         self.setStyleSheet(style)
 
     def load_settings(self):
-        import json
-        import os
-        if os.path.exists("settings.json"):
-            try:
-                with open("settings.json", "r") as f:
-                    settings = json.load(f)
-                    self.mt5_path_input.setText(settings.get("mt5_path", ""))
-                    self.risk_type_combo.setCurrentText(settings.get("risk_type", "Fixed Lot"))
-                    self.risk_value_input.setText(str(settings.get("risk_value", "0.01")))
-            except:
-                pass
-
-    def save_settings(self):
-        import json
-        import os
-        
-        current_settings = {}
-        if os.path.exists("settings.json"):
+        # Fill the inputs from the store, then cache the parsed risk params
+        self.mt5_path_input.setText(self.settings.get("mt5_path"))
+        self.risk_type_combo.setCurrentText(self.settings.get("risk_type"))
+        self.risk_value_input.setText(str(self.settings.get("risk_value")))
+        self.bridge_combo.setCurrentText(self.settings.get("bridge"))
+        self.load_terminals()
+        self.refresh_risk_params()
+
+    def on_risk_value_edited(self, text):
+        if self.settings.set("risk_value", text):
+            self.risk_value_error.hide()
+            self.risk_value_input.setStyleSheet("")
+        else:
+            self.risk_value_error.setText(f"Invalid value, trades use {self.settings.get('risk_value')}")
+            self.risk_value_error.show()
+            self.risk_value_input.setStyleSheet("border: 1px solid #f87171;")
+
+    def on_risk_value_finished(self):
+        # Leaving the field with an invalid value puts back the value in use
+        if self.risk_value_error.isVisible():
+            self.risk_value_input.setText(str(self.settings.get("risk_value")))
+
+    def refresh_risk_params(self):
+        self.risk_type = "PERCENT" if self.settings.get("risk_type") == "Risk % per Trade" else "FIXED"
+        self.risk_value = self.settings.get("risk_value")
+        self.rebuild_targets()
+
+    def rebuild_targets(self):
+        """Build the terminal targets once per settings change (not per signal)."""
+        from fanout import TerminalTarget, parse_risk_type, BRIDGE_FORMATS
+        from acks import AckReader
+
+        bridge_format = BRIDGE_FORMATS.get(self.settings.get("bridge"), "envelope")
+        targets = []
+        if self.settings.get("mt5_path"):
+            targets.append(TerminalTarget("Primary", self.settings.get("mt5_path"), self.risk_type, self.risk_value,
+                                          bridge_format))
+
+        for i, terminal in enumerate(self.settings.get("terminals")):
+            path = terminal.get("mt5_path", "").strip()
+            if not path:
+                continue
             try:
-                with open("settings.json", "r") as f:
-                    current_settings = json.load(f)
-            except:
-                pass
-
-        new_settings = {
-            "mt5_path": self.mt5_path_input.text(),
-            "risk_type": self.risk_type_combo.currentText(),
-            "risk_value": self.risk_value_input.text()
-        }
-        
-        current_settings.update(new_settings)
-        
-        try:
-            with open("settings.json", "w") as f:
-                json.dump(current_settings, f)
-        except:
-            pass
+                risk_value = float(terminal.get("risk_value", 0.01))
+            except (TypeError, ValueError):
+                risk_value = 0.01
+            name = terminal.get("name") or f"Terminal {i + 2}"
+            target = TerminalTarget(name, path, parse_risk_type(terminal.get("risk_type", "FIXED")), risk_value,
+                                    bridge_format)
+            target.row = i # row in terminals_table
+            targets.append(target)
+
+        self.targets = targets
+        # Keep existing ack readers so their file offsets survive the rebuild
+        self.ack_readers = {t.mt5_path: self.ack_readers.get(t.mt5_path) or AckReader(t.mt5_path) for t in targets}
+
+    def load_terminals(self):
+        self.terminals_table.blockSignals(True)
+        self.terminals_table.setRowCount(0)
+        for terminal in self.settings.get("terminals"):
+            row = self.terminals_table.rowCount()
+            self.terminals_table.insertRow(row)
+            self.terminals_table.setItem(row, 0, QTableWidgetItem(terminal.get("name", "")))
+            self.terminals_table.setItem(row, 1, QTableWidgetItem(terminal.get("mt5_path", "")))
+            self.terminals_table.setItem(row, 2, QTableWidgetItem(terminal.get("risk_type", "Fixed Lot")))
+            self.terminals_table.setItem(row, 3, QTableWidgetItem(str(terminal.get("risk_value", "0.01"))))
+            status_item = QTableWidgetItem("-")
+            status_item.setFlags(status_item.flags() & ~Qt.ItemIsEditable)
+            self.terminals_table.setItem(row, 4, status_item)
+        self.terminals_table.blockSignals(False)
+
+    def save_terminals(self, *args):
+        def cell(row, col):
+            item = self.terminals_table.item(row, col)
+            return item.text().strip() if item else ""
+
+        terminals = []
+        for row in range(self.terminals_table.rowCount()):
+            terminals.append({
+                "name": cell(row, 0),
+                "mt5_path": cell(row, 1),
+                "risk_type": cell(row, 2) or "Fixed Lot",
+                "risk_value": cell(row, 3) or "0.01",
+            })
+        self.settings.set("terminals", terminals)
+
+    def add_terminal(self):
+        terminals = list(self.settings.get("terminals"))
+        terminals.append({"name": f"Terminal {len(terminals) + 2}", "mt5_path": "", "risk_type": "Fixed Lot", "risk_value": "0.01"})
+        self.settings.set("terminals", terminals)
+        self.load_terminals()
+
+    def remove_terminal(self):
+        rows = {index.row() for index in self.terminals_table.selectedIndexes()}
+        terminals = [t for i, t in enumerate(self.settings.get("terminals")) if i not in rows]
+        self.settings.set("terminals", terminals)
+        self.load_terminals()
+
+    @Slot(str, object)
+    def on_setting_changed(self, name, value):
+        if name in ("risk_type", "risk_value"):
+            self.refresh_risk_params()
+        elif name in ("mt5_path", "terminals", "bridge"):
+            self.rebuild_targets()
+            if name == "mt5_path":
+                self.analytics.reset(value)
+        elif name == "license_key":
+            self.execution_reporter.license_key = value
 
     @Slot(dict)
+    @profiling.timed("client.process_signal")
     def process_signal(self, signal_data):
+        audit.info("signal received", extra={"signal_id": signal_data.get("id"), "symbol": signal_data.get("symbol"),
+                                             "type": signal_data.get("type"), "targets": len(self.targets)})
+        if deadlines.drop_if_expired(signal_data, "pipeline"):
+            return
         # 1. Update UI
         self.add_signal(signal_data)
         
-        # 2. Inject Risk Settings
-        signal_data["risk_type"] = "PERCENT" if self.risk_type_combo.currentText() == "Risk % per Trade" else "FIXED"
-        try:
-            signal_data["risk_value"] = float(self.risk_value_input.text())
-        except:
-            signal_data["risk_value"] = 0.01 # Default fallback
-        
-        # 2. Write to MT5
-        mt5_path = self.mt5_path_input.text()
-        if mt5_path:
-            from bridge import MT5Bridge
-            bridge = MT5Bridge(mt5_path)
-            success = bridge.write_signal(signal_data)
-            if success:
-                self.log_message(f"Signal sent to MT5: {signal_data['symbol']}")
-            else:
-                self.log_message("Failed to write to MT5 path")
+        # 2. Write to every MT5 terminal in parallel (risk is injected per target unless
+        #    the signal carries the legs of a server-side risk template)
+        if self.targets:
+            self.sent_signals[signal_data["id"]] = time.time() * 1000
+            self.fanout.dispatch(signal_data, self.targets)
         else:
             self.log_message("MT5 Path not set! Signal not sent.")
 
+    @Slot(str, str, bool, float)
+    def on_target_done(self, signal_id, target_name, ok, ms):
+        # Update the status cell of additional terminals
+        for target in self.targets:
+            row = getattr(target, "row", None)
+            if target.name == target_name and row is not None and row < self.terminals_table.rowCount():
+                status = f"OK ({ms:.1f} ms)" if ok else f"Error: {target.last_error}"
+                item = QTableWidgetItem(status)
+                item.setFlags(item.flags() & ~Qt.ItemIsEditable)
+                item.setForeground(QColor("#4ade80" if ok else "#f87171"))
+                self.terminals_table.blockSignals(True)
+                self.terminals_table.setItem(row, 4, item)
+                self.terminals_table.blockSignals(False)
+                break
+
+    @Slot(str, list, float)
+    def on_signal_done(self, signal_id, results, total_ms):
+        expired = sum(1 for _, ok, _ in results if ok is None)
+        if expired == len(results):
+            self.log_message(f"Signal {signal_id[:8]} expired before it was written (dropped so far: {deadlines.dropped.total()})")
+            return
+        ok_count = sum(1 for _, ok, _ in results if ok)
+        slowest = max(results, key=lambda r: r[2])
+        self.log_message(f"Signal {signal_id[:8]} sent to {ok_count}/{len(results)} terminals in {total_ms:.1f} ms (slowest: {slowest[0]} {slowest[2]:.1f} ms)")
+        for name, ok, _ in results:
+            if ok is None:
+                self.log_message(f"Signal {signal_id[:8]} expired before it was written to {name}")
+            elif not ok:
+                self.log_message(f"Failed to write to MT5 path ({name})")
+
     @Slot(dict)
     def add_signal(self, signal_data):
         row = self.signal_table.rowCount()
@@ -396,65 +602,244 @@ class MainWindow(QMainWindow):
 
     @Slot(str)
     def log_message(self, message):
-        row = self.log_widget.rowCount()
-        self.log_widget.insertRow(row)
-        from datetime import datetime
-        time_item = QTableWidgetItem(datetime.now().strftime("%H:%M:%S"))
-        msg_item = QTableWidgetItem(message)
-        self.log_widget.setItem(row, 0, time_item)
-        self.log_widget.setItem(row, 1, msg_item)
+        # Goes through the logging queue (file + this window's Activity Logs via flush_logs)
+        activity.info(message)
 
-    def load_history(self):
-        mt5_path = self.mt5_path_input.text()
-        if not mt5_path:
+    def flush_logs(self):
+        records = self.log_buffer.drain()
+        if not records:
             return
-            
+        records = records[-MAX_LOG_ROWS:]
+
+        table = self.log_widget
+        table.setUpdatesEnabled(False)
+        row = table.rowCount()
+        table.setRowCount(row + len(records))
+        for created, level, message in records:
+            time_item = QTableWidgetItem(datetime.fromtimestamp(created).strftime("%H:%M:%S"))
+            msg_item = QTableWidgetItem(message)
+            if level in ("WARNING", "ERROR", "CRITICAL"):
+                msg_item.setForeground(QColor("#f87171" if level != "WARNING" else "#fbbf24"))
+            table.setItem(row, 0, time_item)
+            table.setItem(row, 1, msg_item)
+            row += 1
+
+        # Bounded view: drop the oldest rows (the full history is in the log file)
+        overflow = table.rowCount() - MAX_LOG_ROWS
+        if overflow > 0:
+            table.model().removeRows(0, overflow)
+        table.setUpdatesEnabled(True)
+
+    def ask_export_path(self, name):
+        from PySide6.QtWidgets import QFileDialog
+        default = f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        path, _ = QFileDialog.getSaveFileName(self, "Export CSV", default, "CSV Files (*.csv)")
+        return path
+
+    def export_table(self, table, name):
+        path = self.ask_export_path(name)
+        if path and not self.exporter.export_table(table, path):
+            self.log_message("An export is already running")
+
+    def export_history(self):
         import os
-        import csv
-        
-        # Path to History.csv (Assuming it's in BenssHelpTools subfolder in MQL5/Files)
-        # Note: EA writes to MQL5/Files/BenssHelpTools/History.csv
-        history_path = os.path.join(mt5_path, "BenssHelpTools", "History.csv")
-        
+        from analytics import HISTORY_FILE
+        mt5_path = self.settings.get("mt5_path")
+        history_path = os.path.join(mt5_path, HISTORY_FILE) if mt5_path else ""
         if not os.path.exists(history_path):
+            self.log_message("No trade history found to export")
+            return
+        path = self.ask_export_path("history")
+        if path and not self.exporter.export_history(history_path, path):
+            self.log_message("An export is already running")
+
+    def export_logs(self):
+        import os
+        from logs import LOG_DIR
+        log_path = os.path.join(LOG_DIR, "client.log")
+        if not os.path.exists(log_path):
+            self.log_message("No log file found to export")
+            return
+        path = self.ask_export_path("logs")
+        if path and not self.exporter.export_logs(log_path, path):
+            self.log_message("An export is already running")
+
+    def set_timing(self, enabled):
+        profiling.timings.enabled = enabled
+        self.log_message(f"Hot-path timing {'on' if enabled else 'off'}")
+
+    def log_timing_table(self):
+        lines = profiling.timings.format_table()
+        if not lines:
+            self.log_message("No timings recorded (turn on Debug > Hot-Path Timing)")
+        for line in lines:
+            self.log_message(f"[timing] {line}")
+
+    def capture_profile(self):
+        from PySide6.QtWidgets import QFileDialog
+        default = f"client_profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}.folded"
+        path, _ = QFileDialog.getSaveFileName(self, "Save Profile", default, "Folded stacks (*.folded)")
+        if not path:
+            return
+
+        def done(path, error):
+            # Called on the profiler thread, log_message goes through the logging queue
+            self.log_message(f"Profile capture failed: {error}" if error else f"Profile saved to {path}")
+
+        if profiling.capture_profile(path, 10, done):
+            self.log_message("Capturing a 10 s profile of all threads...")
+        else:
+            self.log_message("A profile capture is already running")
+
+    def poll_acks(self):
+        if not self.ack_readers:
             return
+        from acks import SUCCESS_RETCODES
+
+        now_ms = time.time() * 1000
+        acks = [ack for reader in self.ack_readers.values() for ack in reader.read_new()]
+        for ack in acks:
+            sent_ms = self.sent_signals.get(ack["signal_id"])
+            # Time from writing the signal file until the ack was picked up here
+            ack["latency_ms"] = round(now_ms - sent_ms) if sent_ms else None
+            self.execution_reporter.report(ack)
+
+            if ack["retcode"] in SUCCESS_RETCODES:
+                latency = f" in {ack['latency_ms']} ms" if ack["latency_ms"] is not None else ""
+                self.log_message(f"MT5 executed signal {ack['signal_id'][:8]} leg {ack['leg']} (ticket {ack['ticket']}){latency}")
+            else:
+                self.log_message(f"MT5 rejected signal {ack['signal_id'][:8]} leg {ack['leg']}: {ack['retcode']} {ack['comment']}")
+
+        # Forget signals that will never be acked
+        if len(self.sent_signals) > 1000:
+            cutoff = now_ms - 3600 * 1000
+            self.sent_signals = {k: v for k, v in self.sent_signals.items() if v > cutoff}
+
+    def build_analytics_tab(self):
+        widget = QWidget()
+        layout = QVBoxLayout(widget)
+        layout.setContentsMargins(15, 15, 15, 15)
 
+        # Summary
+        stats_layout = QHBoxLayout()
+        self.stat_labels = {}
+        for key, title in [("net_profit", "Net P&L"), ("trades", "Trades"), ("win_rate", "Win Rate"),
+                           ("profit_factor", "Profit Factor"), ("max_drawdown", "Max Drawdown")]:
+            box = QVBoxLayout()
+            title_label = QLabel(title)
+            title_label.setStyleSheet("color: #9ca3af; font-size: 12px; font-weight: bold;")
+            value_label = QLabel("-")
+            value_label.setStyleSheet("font-size: 20px; font-weight: bold; color: #ffffff;")
+            box.addWidget(title_label)
+            box.addWidget(value_label)
+            stats_layout.addLayout(box)
+            self.stat_labels[key] = value_label
+        layout.addLayout(stats_layout)
+
+        # Equity curve (QtCharts is optional)
+        self.equity_series = None
         try:
-            with open(history_path, "r") as f:
-                reader = csv.reader(f)
-                data = list(reader)
-                
-                # Check if new data available
-                if len(data) == self.history_table.rowCount():
-                    return
-
-                self.history_table.setRowCount(0) # Clear
-                
-                for row_data in reversed(data): # Show latest first
-                    if len(row_data) < 5: continue
-                    
-                    row = self.history_table.rowCount()
-                    self.history_table.insertRow(row)
-                    
-                    # Time, Symbol, Type, Volume, Profit
-                    self.history_table.setItem(row, 0, QTableWidgetItem(row_data[0]))
-                    self.history_table.setItem(row, 1, QTableWidgetItem(row_data[1]))
-                    
-                    type_item = QTableWidgetItem(row_data[2])
-                    if "BUY" in row_data[2]:
-                        type_item.setForeground(QColor("#4ade80"))
-                    elif "SELL" in row_data[2]:
-                        type_item.setForeground(QColor("#f87171"))
-                    self.history_table.setItem(row, 2, type_item)
-                    
-                    self.history_table.setItem(row, 3, QTableWidgetItem(row_data[3]))
-                    
-                    profit = float(row_data[4])
-                    profit_item = QTableWidgetItem(f"${profit:.2f}")
-                    if profit >= 0:
-                        profit_item.setForeground(QColor("#4ade80"))
-                    else:
-                        profit_item.setForeground(QColor("#f87171"))
-                    self.history_table.setItem(row, 4, profit_item)
-        except Exception as e:
-            print(f"Error loading history: {e}")
+            from PySide6.QtCharts import QChart, QChartView, QLineSeries
+            from PySide6.QtGui import QPainter
+            self.equity_series = QLineSeries()
+            chart = QChart()
+            chart.addSeries(self.equity_series)
+            chart.createDefaultAxes()
+            chart.legend().hide()
+            chart.setTheme(QChart.ChartThemeDark)
+            chart.setTitle("Equity Curve")
+            self.equity_chart = chart
+            chart_view = QChartView(chart)
+            chart_view.setRenderHint(QPainter.Antialiasing)
+            chart_view.setMinimumHeight(180)
+            layout.addWidget(chart_view)
+        except ImportError:
+            pass
+
+        tables_layout = QHBoxLayout()
+        self.symbol_stats_table = QTableWidget()
+        self.symbol_stats_table.setColumnCount(4)
+        self.symbol_stats_table.setHorizontalHeaderLabels(["Symbol", "P&L", "Trades", "Win Rate"])
+        self.day_stats_table = QTableWidget()
+        self.day_stats_table.setColumnCount(3)
+        self.day_stats_table.setHorizontalHeaderLabels(["Day", "P&L", "Trades"])
+        for table in (self.symbol_stats_table, self.day_stats_table):
+            table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+            table.verticalHeader().setVisible(False)
+            table.setAlternatingRowColors(True)
+            table.setEditTriggers(QTableWidget.NoEditTriggers)
+            tables_layout.addWidget(table)
+        layout.addLayout(tables_layout)
+        return widget
+
+    def load_history(self):
+        # Non-blocking: the worker reads new lines and emits on_analytics_updated
+        self.analytics.refresh()
+
+    @Slot(object, list)
+    def on_analytics_updated(self, stats, new_rows):
+        def pnl_item(value):
+            item = QTableWidgetItem(f"${value:,.2f}")
+            item.setForeground(QColor("#4ade80" if value >= 0 else "#f87171"))
+            return item
+
+        # History table: only the new deals are added (latest first). The rows are
+        # made in one call and filled in place, not inserted one by one at row 0,
+        # which made loading a long history quadratic.
+        table = self.history_table
+        if stats.get("reset"):
+            table.setRowCount(0)
+        count = len(new_rows)
+        if count:
+            table.setUpdatesEnabled(False)
+            if table.rowCount() == 0:
+                table.setRowCount(count)
+            else:
+                table.model().insertRows(0, count)
+            for offset, (time_str, _, symbol, deal_type, volume, profit) in enumerate(new_rows):
+                row = count - 1 - offset
+                table.setItem(row, 0, QTableWidgetItem(time_str))
+                table.setItem(row, 1, QTableWidgetItem(symbol))
+                type_item = QTableWidgetItem(deal_type)
+                if "BUY" in deal_type:
+                    type_item.setForeground(QColor("#4ade80"))
+                elif "SELL" in deal_type:
+                    type_item.setForeground(QColor("#f87171"))
+                table.setItem(row, 2, type_item)
+                table.setItem(row, 3, QTableWidgetItem(f"{volume:.2f}"))
+                table.setItem(row, 4, pnl_item(profit))
+            table.setUpdatesEnabled(True)
+
+        if not stats.get("trades"):
+            return
+
+        # Summary
+        self.stat_labels["net_profit"].setText(f"${stats['net_profit']:,.2f}")
+        self.stat_labels["trades"].setText(str(stats["trades"]))
+        self.stat_labels["win_rate"].setText(f"{stats['win_rate'] * 100:.1f}%")
+        pf = stats["profit_factor"]
+        self.stat_labels["profit_factor"].setText("∞" if pf == float("inf") else f"{pf:.2f}")
+        self.stat_labels["max_drawdown"].setText(f"${stats['max_drawdown']:,.2f}")
+
+        self.symbol_stats_table.setRowCount(len(stats["per_symbol"]))
+        for row, (symbol, pnl, trades, win_rate) in enumerate(stats["per_symbol"]):
+            self.symbol_stats_table.setItem(row, 0, QTableWidgetItem(symbol))
+            self.symbol_stats_table.setItem(row, 1, pnl_item(pnl))
+            self.symbol_stats_table.setItem(row, 2, QTableWidgetItem(str(trades)))
+            self.symbol_stats_table.setItem(row, 3, QTableWidgetItem(f"{win_rate * 100:.1f}%"))
+
+        self.day_stats_table.setRowCount(len(stats["per_day"]))
+        for row, (day, pnl, trades) in enumerate(stats["per_day"]):
+            self.day_stats_table.setItem(row, 0, QTableWidgetItem(day))
+            self.day_stats_table.setItem(row, 1, pnl_item(pnl))
+            self.day_stats_table.setItem(row, 2, QTableWidgetItem(str(trades)))
+
+        if self.equity_series is not None:
+            from PySide6.QtCore import QPointF
+            curve = stats["equity_curve"]
+            self.equity_series.replace([QPointF(i, v) for i, v in enumerate(curve)])
+            axis_x = self.equity_chart.axes(Qt.Horizontal)
+            axis_y = self.equity_chart.axes(Qt.Vertical)
+            if axis_x and axis_y:
+                axis_x[0].setRange(0, max(1, len(curve) - 1))
+                axis_y[0].setRange(min(0.0, min(curve)), max(0.0, max(curve)))
@@ -1,29 +1,82 @@
-import requests
-import sys
 import os
+import json
+import hashlib
+import tempfile
 import subprocess
 import logging
-from packaging import version
-from PySide6.QtWidgets import QMessageBox
-from PySide6.QtCore import QThread, Signal
+from PySide6.QtWidgets import QMessageBox, QProgressDialog, QApplication
+from PySide6.QtCore import QThread, Signal, Qt
 
 # URL where the version.json file is hosted
 # We use the raw GitHub URL of the WEB repo because that's where we committed version.json
+# Expected fields: latest_version, download_url, sha256 (required, updates without it are refused)
 VERSION_URL = "https://raw.githubusercontent.com/Nabenns/webnyabensshelptools/main/public/version.json"
 
 CURRENT_VERSION = "1.0.0"
 
+CACHE_DIR = os.path.join(os.getenv("LOCALAPPDATA", tempfile.gettempdir()), "BenssHelpTools")
+VERSION_CACHE_PATH = os.path.join(CACHE_DIR, "version_cache.json")
+INSTALLER_PATH = os.path.join(tempfile.gettempdir(), "BenssHelpTools_Setup.exe")
+
+CHUNK_SIZE = 1024 * 1024  # 1 MB reads, written through a buffered file
+
+logger = logging.getLogger(__name__)
+
+def load_version_cache():
+    try:
+        with open(VERSION_CACHE_PATH, 'r') as f:
+            return json.load(f)
+    except:
+        return {}
+
+def save_version_cache(cache):
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(VERSION_CACHE_PATH, 'w') as f:
+            json.dump(cache, f)
+    except OSError as e:
+        logger.warning(f"Could not save version cache: {e}")
+
+def sha256_file(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
 class UpdateChecker(QThread):
-    update_available = Signal(str, str) # version, download_url
+    update_available = Signal(str, str, str) # version, download_url, sha256
     no_update = Signal()
     error_occurred = Signal(str)
 
     def run(self):
+        import requests
+        from packaging import version
+
         try:
-            response = requests.get(VERSION_URL, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            
+            # Conditional request: a 304 means the cached version.json is still current
+            cache = load_version_cache()
+            headers = {}
+            if cache.get("etag"):
+                headers["If-None-Match"] = cache["etag"]
+            if cache.get("last_modified"):
+                headers["If-Modified-Since"] = cache["last_modified"]
+
+            response = requests.get(VERSION_URL, headers=headers, timeout=10)
+            if response.status_code == 304 and not cache.get("data"):
+                # Validators survived but the cached body didn't: ask again unconditionally
+                response = requests.get(VERSION_URL, timeout=10)
+            if response.status_code == 304:
+                data = cache["data"]
+            else:
+                response.raise_for_status()
+                data = response.json()
+                save_version_cache({
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                    "data": data,
+                })
+
             latest_version = data.get("latest_version")
             download_url = data.get("download_url")
 
@@ -32,63 +85,222 @@ class UpdateChecker(QThread):
                 return
 
             if version.parse(latest_version) > version.parse(CURRENT_VERSION):
-                self.update_available.emit(latest_version, download_url)
+                sha256 = (data.get("sha256") or "").strip().lower()
+                if len(sha256) != 64:
+                    # Never run an installer that can't be verified
+                    self.error_occurred.emit(f"Version {latest_version} has no valid sha256, not installing it.")
+                    return
+                self.update_available.emit(latest_version, download_url, sha256)
             else:
                 self.no_update.emit()
 
         except Exception as e:
             self.error_occurred.emit(str(e))
 
+class DownloadWorker(QThread):
+    """
+    Downloads the installer in the background.
+    Partial downloads are kept as <installer>.<sha256 prefix>.part, so a partial of an
+    older release is never extended with bytes of a newer one, and resumed with an
+    HTTP Range request guarded by If-Range (the ETag or Last-Modified the partial was
+    started with). A finished installer whose hash already matches is reused instead
+    of re-downloaded. Without an expected sha256 nothing is downloaded.
+    """
+    progress = Signal(int, int) # bytes done, bytes total (0 if unknown)
+    finished_ok = Signal(str) # installer path
+    error_occurred = Signal(str)
+
+    def __init__(self, url, expected_sha256, target_path=INSTALLER_PATH):
+        super().__init__()
+        self.url = url
+        self.expected_sha256 = (expected_sha256 or "").lower()
+        self.target_path = target_path
+        self.part_path = f"{target_path}.{self.expected_sha256[:16]}.part"
+        # Validator of the response the partial came from, sent back as If-Range
+        self.validator_path = self.part_path + ".json"
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        try:
+            if len(self.expected_sha256) != 64:
+                self.error_occurred.emit("No sha256 for this update, refusing to install it.")
+                return
+
+            # Already downloaded and verified on a previous attempt
+            if os.path.exists(self.target_path):
+                if sha256_file(self.target_path) == self.expected_sha256:
+                    size = os.path.getsize(self.target_path)
+                    self.progress.emit(size, size)
+                    self.finished_ok.emit(self.target_path)
+                    return
+
+            self.remove_stale_parts()
+            self.download()
+            if self.cancelled:
+                return
+
+            actual = sha256_file(self.part_path)
+            if actual != self.expected_sha256:
+                self.discard_part()
+                self.error_occurred.emit(f"Checksum mismatch (expected {self.expected_sha256[:12]}..., got {actual[:12]}...)")
+                return
+
+            os.replace(self.part_path, self.target_path)
+            self.discard_part()
+            self.finished_ok.emit(self.target_path)
+        except Exception as e:
+            self.error_occurred.emit(str(e))
+
+    def remove_stale_parts(self):
+        """Partials of other releases can't be resumed any more."""
+        directory, name = os.path.split(self.target_path)
+        for entry in os.listdir(directory or "."):
+            path = os.path.join(directory, entry)
+            if entry.startswith(name + ".") and not path.startswith(self.part_path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def discard_part(self):
+        for path in (self.part_path, self.validator_path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def load_validator(self):
+        try:
+            with open(self.validator_path, 'r') as f:
+                saved = json.load(f)
+            return saved.get("validator") if saved.get("url") == self.url else None
+        except (OSError, ValueError):
+            return None
+
+    def save_validator(self, response):
+        validator = response.headers.get("ETag") or response.headers.get("Last-Modified")
+        try:
+            with open(self.validator_path, 'w') as f:
+                json.dump({"url": self.url, "validator": validator}, f)
+        except OSError as e:
+            logger.warning(f"Could not save download validator: {e}")
+
+    def download(self):
+        import requests
+
+        offset = os.path.getsize(self.part_path) if os.path.exists(self.part_path) else 0
+        headers = {}
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+            # If the file changed since the partial was started, the server sends it whole (200)
+            validator = self.load_validator()
+            if validator:
+                headers["If-Range"] = validator
+
+        with requests.get(self.url, headers=headers, stream=True, timeout=30) as response:
+            if response.status_code == 416:
+                # Range not satisfiable: the .part file is already complete
+                self.progress.emit(offset, offset)
+                return
+            response.raise_for_status()
+
+            if response.status_code == 206:
+                mode = 'ab'
+            else:
+                # Server ignored the Range header or the file changed (If-Range), start over
+                mode = 'wb'
+                offset = 0
+                self.save_validator(response)
+
+            length = int(response.headers.get("Content-Length", 0))
+            total = offset + length if length else 0
+            done = offset
+
+            with open(self.part_path, mode, buffering=CHUNK_SIZE) as f:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    if self.cancelled:
+                        return
+                    f.write(chunk)
+                    done += len(chunk)
+                    self.progress.emit(done, total)
+
 class Updater:
     def __init__(self, parent=None):
         self.parent = parent
+        self.downloader = None
+        self.progress_dialog = None
         self.checker = UpdateChecker()
         self.checker.update_available.connect(self.on_update_available)
         self.checker.error_occurred.connect(self.on_error)
-        
+
     def check_for_updates(self, silent=True):
         self.silent = silent
         self.checker.start()
 
-    def on_update_available(self, new_version, download_url):
+    def on_update_available(self, new_version, download_url, sha256):
         reply = QMessageBox.question(
-            self.parent, 
-            "Update Available", 
+            self.parent,
+            "Update Available",
             f"A new version ({new_version}) is available.\nDo you want to download and install it now?",
             QMessageBox.Yes | QMessageBox.No
         )
 
         if reply == QMessageBox.Yes:
-            self.download_and_install(download_url)
+            self.download_and_install(download_url, sha256)
 
     def on_error(self, error_msg):
         if not self.silent:
             QMessageBox.warning(self.parent, "Update Check Failed", f"Could not check for updates:\n{error_msg}")
 
-    def download_and_install(self, url):
-        # 1. Download the installer
+    def download_and_install(self, url, sha256):
+        if self.downloader and self.downloader.isRunning():
+            return
+
+        # Non-modal progress, signals keep being processed while this downloads
+        self.progress_dialog = QProgressDialog("Downloading update...", "Cancel", 0, 0, self.parent)
+        self.progress_dialog.setWindowTitle("Updating")
+        self.progress_dialog.setWindowModality(Qt.NonModal)
+        self.progress_dialog.setMinimumDuration(0)
+        self.progress_dialog.show()
+
+        self.downloader = DownloadWorker(url, sha256)
+        self.downloader.progress.connect(self.on_progress)
+        self.downloader.finished_ok.connect(self.on_downloaded)
+        self.downloader.error_occurred.connect(self.on_download_error)
+        self.progress_dialog.canceled.connect(self.downloader.cancel)
+        self.downloader.start()
+
+    def on_progress(self, done, total):
+        if not self.progress_dialog:
+            return
+        if total:
+            # QProgressDialog takes ints, scale to KB to stay in range
+            self.progress_dialog.setMaximum(total // 1024)
+            self.progress_dialog.setValue(done // 1024)
+            self.progress_dialog.setLabelText(f"Downloading update... {done / 1048576:.1f} / {total / 1048576:.1f} MB")
+        else:
+            self.progress_dialog.setLabelText(f"Downloading update... {done / 1048576:.1f} MB")
+
+    def on_downloaded(self, installer_path):
+        if self.progress_dialog:
+            self.progress_dialog.close()
+
+        # Run the installer
+        # Use /SILENT or /VERYSILENT to install without user interaction if desired
+        # But usually for a major update, standard UI is fine.
         try:
-            import tempfile
-            installer_path = os.path.join(tempfile.gettempdir(), "BenssHelpTools_Setup.exe")
-            
-            # Show progress dialog (simplified for now, blocking download)
-            # In a real app, use a thread and progress bar
-            QMessageBox.information(self.parent, "Downloading", "Downloading update... The app will close shortly.")
-            
-            response = requests.get(url, stream=True)
-            response.raise_for_status()
-            
-            with open(installer_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
-            
-            # 2. Run the installer
-            # Use /SILENT or /VERYSILENT to install without user interaction if desired
-            # But usually for a major update, standard UI is fine.
             subprocess.Popen([installer_path])
-            
-            # 3. Close current app
-            sys.exit(0)
-            
         except Exception as e:
-            QMessageBox.critical(self.parent, "Update Failed", f"Failed to download update:\n{e}")
+            QMessageBox.critical(self.parent, "Update Failed", f"Failed to start installer:\n{e}")
+            return
+
+        # Close current app
+        QApplication.quit()
+
+    def on_download_error(self, error_msg):
+        if self.progress_dialog:
+            self.progress_dialog.close()
+        QMessageBox.critical(self.parent, "Update Failed", f"Failed to download update:\n{error_msg}")
@@ -5,7 +5,8 @@ rmdir /s /q dist
 del /q *.spec
 
 echo [2/3] Building Client App with PyInstaller...
-pyinstaller --noconfirm --onedir --windowed --name "BenssHelpTools" --add-data "settings.json;." app/main.py
+REM --onedir + --noupx: no self-extraction or decompression on launch (faster cold start)
+pyinstaller --noconfirm --onedir --windowed --noupx --exclude-module tkinter --name "BenssHelpTools" --add-data "settings.json;." app/main.py
 
 echo [3/3] Build Complete!
 echo Output is in dist/BenssHelpTools
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The client modules import each other flat (import envelope), as in the frozen app
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
@@ -0,0 +1,126 @@
+import os
+
+import pytest
+
+import envelope
+from bridge import MT5Bridge
+
+
+def make_signal(**overrides):
+    signal = {"id": "sig-1", "symbol": "XAUUSD", "type": "BUY_LIMIT", "digits": 2, "pip_size": 0.1,
+              "entry_price": 2000.55, "stop_loss": 1990.0, "take_profit": 2010.0, "take_profit_2": 2020.0,
+              "take_profit_3": 0.0, "risk_type": "FIXED", "risk_value": 0.05, "deadline": 1700000000000}
+    signal.update(overrides)
+    return signal
+
+
+def rewrite(line, version, field_count):
+    """Re-frame the first field_count payload fields of an envelope as an older version."""
+    payload = line.split("|", 3)[3]
+    payload = "|".join(payload.split("|")[:field_count])
+    return f"{version}|{len(payload)}|{envelope.checksum(payload)}|{payload}"
+
+
+@pytest.mark.parametrize("sig_type", envelope.SIGNAL_TYPES)
+@pytest.mark.parametrize("risk_type", envelope.RISK_TYPES)
+def test_round_trip_every_type(sig_type, risk_type):
+    signal = make_signal(type=sig_type, risk_type=risk_type)
+    decoded = envelope.decode(envelope.encode(signal))
+
+    assert decoded["type"] == sig_type
+    assert decoded["risk_type"] == risk_type
+    for name in ("id", "symbol", "digits", "pip_size", "risk_value", "deadline") + envelope.PRICE_FIELDS:
+        assert decoded[name] == signal[name], name
+    assert decoded["legs"] == []
+
+
+def test_round_trip_legs():
+    legs = [{"value": 0.03, "tp": 2010.0, "max_lots": 0}, {"value": 0.02, "tp": 2020.0, "max_lots": 1.5}]
+    decoded = envelope.decode(envelope.encode(make_signal(legs=legs)))
+    assert decoded["legs"] == [{"leg": 1, "value": 0.03, "tp": 2010.0, "max_lots": 0.0},
+                               {"leg": 2, "value": 0.02, "tp": 2020.0, "max_lots": 1.5}]
+
+
+def test_prices_rounded_to_digits():
+    line = envelope.encode(make_signal(symbol="EURUSD", digits=5, entry_price=1.0812345678, pip_size=None))
+    decoded = envelope.decode(line)
+    assert decoded["entry_price"] == 1.08123
+    assert decoded["pip_size"] == pytest.approx(0.0001)
+
+
+def test_separator_and_newlines_stripped_from_text_fields():
+    decoded = envelope.decode(envelope.encode(make_signal(id="a|b\nc")))
+    assert decoded["id"] == "abc"
+
+
+def test_length_mismatch_rejected():
+    line = envelope.encode(make_signal())
+    version, length, check, payload = line.split("|", 3)
+    with pytest.raises(ValueError, match="Length"):
+        envelope.decode(f"{version}|{int(length) + 1}|{check}|{payload}")
+    with pytest.raises(ValueError, match="Length"):
+        envelope.decode(line[:-3]) # truncated write
+
+
+def test_checksum_mismatch_rejected():
+    line = envelope.encode(make_signal())
+    version, length, check, payload = line.split("|", 3)
+    corrupted = payload.replace("2010.00", "2019.00")
+    assert len(corrupted) == len(payload)
+    with pytest.raises(ValueError, match="Checksum"):
+        envelope.decode(f"{version}|{length}|{check}|{corrupted}")
+
+
+def test_unknown_version_rejected():
+    line = envelope.encode(make_signal())
+    with pytest.raises(ValueError, match="version"):
+        envelope.decode("CS9" + line[3:])
+
+
+def test_field_count_mismatch_rejected():
+    line = rewrite(envelope.encode(make_signal()), "CS4", 13)
+    with pytest.raises(ValueError, match="fields"):
+        envelope.decode(line)
+
+
+def test_decodes_cs3():
+    line = rewrite(envelope.encode(make_signal()), "CS3", envelope.LEGACY_VERSIONS["CS3"])
+    decoded = envelope.decode(line)
+    assert decoded["deadline"] == 1700000000000
+    assert decoded["legs"] == []
+    assert decoded["take_profit_2"] == 2020.0
+
+
+def test_decodes_cs2():
+    line = rewrite(envelope.encode(make_signal()), "CS2", envelope.LEGACY_VERSIONS["CS2"])
+    decoded = envelope.decode(line)
+    assert decoded["deadline"] == 0
+    assert decoded["legs"] == []
+    assert decoded["risk_value"] == 0.05
+
+
+def test_non_ascii_text_is_transliterated():
+    line = envelope.encode(make_signal(id="sig-é-1", symbol="XAUUSD™"))
+    assert line.isascii()
+    decoded = envelope.decode(line)
+    assert decoded["id"] == "sig-e-1"
+    assert decoded["symbol"] == "XAUUSDTM"
+
+
+def test_non_ascii_without_ascii_form_is_dropped():
+    decoded = envelope.decode(envelope.encode(make_signal(id="sig-金-2")))
+    assert decoded["id"] == "sig--2"
+
+
+def test_non_ascii_line_rejected():
+    line = envelope.encode(make_signal())
+    with pytest.raises(ValueError):
+        envelope.decode(line.replace("XAUUSD", "XAUUSÉ"))
+
+
+def test_bridge_writes_non_ascii_signal(tmp_path):
+    bridge = MT5Bridge(str(tmp_path))
+    assert bridge.write_signal(make_signal(id="sig-ü", deadline=0))
+    [name] = os.listdir(tmp_path / "Signals")
+    with open(tmp_path / "Signals" / name, "r") as f:
+        assert envelope.decode(f.read())["id"] == "sig-u"
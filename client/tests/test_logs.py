@@ -0,0 +1,18 @@
+import json
+import logging
+
+from logs import JsonFormatter
+
+
+def test_timestamps_are_utc():
+    record = logging.LogRecord("activity", logging.INFO, __file__, 1, "hello", None, None)
+    record.created = 0.0
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["ts"] == "1970-01-01T00:00:00.000+00:00"
+    assert entry["msg"] == "hello"
+
+
+def test_extra_fields_are_kept():
+    record = logging.LogRecord("activity", logging.INFO, __file__, 1, "sent", None, None)
+    record.signal_id = "abc"
+    assert json.loads(JsonFormatter().format(record))["signal_id"] == "abc"
@@ -0,0 +1,97 @@
+import os
+
+import pytest
+
+import ring
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "BenssHelpTools" / "Signals.ring")
+
+
+def make_ring(path, capacity=4, record_size=64, **kwargs):
+    return ring.RingBuffer(path, capacity, record_size, **kwargs)
+
+
+def test_write_poll_round_trip(path):
+    producer = make_ring(path)
+    reader = ring.RingReader(make_ring(path, create=False))
+
+    assert reader.poll() == []
+    assert producer.write(b"one") and producer.write(b"two")
+    assert reader.poll() == [b"one", b"two"]
+    assert reader.poll() == []
+    assert producer.read_index == producer.write_index == 2
+
+
+def test_round_trip_wraps_around(path):
+    producer = make_ring(path)
+    reader = ring.RingReader(producer)
+    for n in range(10):
+        assert producer.write(f"signal-{n}".encode())
+        assert reader.poll() == [f"signal-{n}".encode()]
+
+
+def test_full_ring_refuses_write(path):
+    producer = make_ring(path)
+    for n in range(producer.capacity):
+        assert producer.write(b"x%d" % n)
+
+    assert producer.write(b"overflow") is False
+    assert producer.pending() == producer.capacity
+
+    reader = ring.RingReader(producer)
+    assert reader.poll() == [b"x0", b"x1", b"x2", b"x3"] # the unread slots weren't overwritten
+    assert producer.write(b"after")
+
+
+def test_reader_resumes_from_read_index_after_restart(path):
+    producer = make_ring(path)
+    for n in range(3):
+        producer.write(b"r%d" % n)
+    first = ring.RingReader(make_ring(path, create=False))
+    assert first.poll() == [b"r0", b"r1", b"r2"]
+    first.ring.close()
+
+    producer.write(b"r3")
+    restarted = ring.RingReader(make_ring(path, create=False))
+    assert restarted.poll() == [b"r3"]
+
+
+def test_client_restart_keeps_unread_records(path):
+    make_ring(path).write(b"unread")
+    reader = ring.RingReader(make_ring(path)) # same geometry: reused, not reinitialised
+    assert reader.poll() == [b"unread"]
+
+
+def test_reader_resyncs_on_new_generation(path):
+    producer = make_ring(path)
+    reader = ring.RingReader(producer)
+    for n in range(3):
+        producer.write(b"old%d" % n)
+    assert len(reader.poll()) == 3
+    generation = producer.sequence
+
+    producer._initialise() # indexes back to 0 under a new sequence
+    assert producer.sequence != generation
+    producer.write(b"new")
+    assert reader.poll() == [b"new"]
+    assert reader.generation == producer.sequence
+
+
+def test_oversize_record_is_rejected(path):
+    producer = make_ring(path)
+    limit = producer.record_size - ring.RECORD_HEADER.size
+    assert producer.write(b"a" * limit)
+    with pytest.raises(ValueError):
+        producer.write(b"a" * (limit + 1))
+    assert producer.write_index == 1
+
+
+def test_create_false_refuses_foreign_file(path):
+    os.makedirs(os.path.dirname(path))
+    with open(path, "wb") as f:
+        f.write(b"\0" * 128)
+    with pytest.raises(ValueError):
+        make_ring(path, create=False)
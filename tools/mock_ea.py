@@ -0,0 +1,145 @@
+"""
+Mock EA for running the client pipeline on Linux/macOS without MT5.
+
+Behaves like ScanForSignals/ProcessSignalFile in ea/BenssHelpTools.mq5:
+polls <files_path>/Signals for *.sig envelopes (decoded with the reference codec
+in client/app/envelope.py) and legacy *.json, "executes" each signal, deletes the file
+and appends ack records to <files_path>/BenssHelpTools/Acks.csv. With --ring it also
+takes signals from the shared-memory ring (client/app/ring.py), like PollRing.
+
+Usage:
+    python tools/mock_ea.py --path /tmp/MQL5/Files [--interval 1.0] [--reject-rate 0.1] [--ring]
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "client", "app"))
+import envelope
+import ring
+
+TRADE_RETCODE_DONE = 10009
+TRADE_RETCODE_REJECT = 10006
+RETCODE_SIGNAL_EXPIRED = 10012 # same as the EA: signal past its deadline, not executed
+RETCODE_SIGNAL_INVALID = 10013 # same as the EA: unknown order type, no request sent
+ORDER_TYPES = ("MARKET_EXECUTION", "BUY_LIMIT", "SELL_LIMIT", "BUY_STOP", "SELL_STOP", "BUY", "SELL")
+
+class MockEA:
+    def __init__(self, files_path, signal_path="Signals", reject_rate=0.0, use_ring=False):
+        self.files_path = files_path
+        self.use_ring = use_ring
+        self.ring_reader = None
+        self.signals_dir = os.path.join(files_path, signal_path)
+        self.ack_path = os.path.join(files_path, "BenssHelpTools", "Acks.csv")
+        self.reject_rate = reject_rate
+        self.next_ticket = 1000000
+        self.processed = []
+        self.expired = []
+
+        os.makedirs(self.signals_dir, exist_ok=True)
+        os.makedirs(os.path.dirname(self.ack_path), exist_ok=True)
+
+    def poll_ring(self):
+        """One PollRing pass. Returns the signals processed."""
+        if self.ring_reader is None:
+            try:
+                self.ring_reader = ring.RingReader(ring.RingBuffer(os.path.join(self.files_path, ring.RING_FILE), create=False))
+            except (OSError, ValueError):
+                return [] # the client hasn't created it yet
+        done = []
+        for record in self.ring_reader.poll():
+            try:
+                signal = envelope.decode(record.decode("ascii"))
+            except ValueError as e:
+                print(f"Invalid ring record: {e}")
+                continue
+            done.append(self.process(signal))
+        return done
+
+    def scan(self):
+        """One ScanForSignals pass (PollRing first with --ring). Returns the signals processed."""
+        done = self.poll_ring() if self.use_ring else []
+        try:
+            names = os.listdir(self.signals_dir)
+        except FileNotFoundError:
+            return done
+
+        # Envelope files first, then legacy JSON (same order as the EA)
+        names = sorted((n for n in names if n.endswith((".sig", ".json"))), key=lambda n: not n.endswith(".sig"))
+
+        for name in names:
+            path = os.path.join(self.signals_dir, name)
+            try:
+                with open(path, "r") as f:
+                    content = f.read()
+                signal = envelope.decode(content) if name.endswith(".sig") else json.loads(content)
+            except OSError:
+                continue
+            except ValueError as e:
+                print(f"Invalid signal file {name}: {e}")
+                os.remove(path)
+                continue
+
+            done.append(self.process(signal))
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        return done
+
+    def process(self, signal):
+        deadline = int(signal.get("deadline") or 0)
+        if deadline and time.time() * 1000 > deadline:
+            self.write_ack(signal.get("id", ""), 1, RETCODE_SIGNAL_EXPIRED, "Signal expired")
+            self.expired.append(signal)
+            return signal
+        # Legs of a server-side risk template, otherwise the EA's own split
+        legs = len(signal.get("legs") or ()) or (2 if float(signal.get("take_profit_2") or 0) > 0 else 1)
+        for leg in range(1, legs + 1):
+            if signal.get("type") in ORDER_TYPES:
+                self.write_ack(signal.get("id", ""), leg)
+            else:
+                self.write_ack(signal.get("id", ""), leg, RETCODE_SIGNAL_INVALID, f"Unknown signal type {signal.get('type')}")
+        self.processed.append(signal)
+        return signal
+
+    def write_ack(self, signal_id, leg, retcode=None, comment=""):
+        if retcode is not None:
+            ticket = 0
+        elif random.random() < self.reject_rate:
+            ticket, retcode, comment = 0, TRADE_RETCODE_REJECT, "Request rejected"
+        else:
+            self.next_ticket += 1
+            ticket, retcode, comment = self.next_ticket, TRADE_RETCODE_DONE, "Request executed"
+
+        fill_time_ms = int(time.time() * 1000)
+        line = f"{signal_id}|{leg}|{ticket}|{retcode}|{fill_time_ms}|{comment}\n"
+        with open(self.ack_path, "a") as f:
+            f.write(line)
+
+    def run(self, interval=1.0):
+        print(f"Mock EA started. Monitoring path: {self.signals_dir}")
+        while True:
+            for signal in self.scan():
+                print(f"Executed: {signal.get('symbol')} {signal.get('type')} ({signal.get('id')})")
+            time.sleep(interval)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mock MT5 EA (file bridge consumer)")
+    parser.add_argument("--path", required=True, help="Directory acting as MQL5/Files")
+    parser.add_argument("--interval", type=float, default=1.0, help="Scan interval in seconds (EA timer)")
+    parser.add_argument("--reject-rate", type=float, default=0.0, help="Fraction of orders to reject")
+    parser.add_argument("--ring", action="store_true", help="Also read the shared-memory signal ring")
+    args = parser.parse_args(argv)
+
+    ea = MockEA(args.path, reject_rate=args.reject_rate, use_ring=args.ring)
+    try:
+        ea.run(args.interval)
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    sys.exit(main())
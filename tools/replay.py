@@ -0,0 +1,388 @@
+"""
+End-to-end replay simulator.
+
+Feeds a recorded corpus of Discord messages through the whole chain and traces
+every signal hop by hop:
+
+    corpus --(original inter-arrival times / speed)--> bot parse_signal
+      --> POST /api/v1/signals (API service) --> Redis --> gateway /ws/signals
+      --> headless client SignalWorker --> MT5Bridge --> Signals/ folder
+      --> MockEA (tools/mock_ea.py, same scan as the EA's ScanForSignals)
+
+It reports per-hop latency percentiles and any lost or duplicated signals.
+Signal ids are derived from the corpus position, so two runs of the same corpus
+are directly comparable.
+
+Corpus: JSON lines, one Discord message each:
+    {"t": 0.0, "channel_id": 123, "content": "XAUUSD SELL LIMIT @ 2050 ..."}
+"t" is seconds since the first message (a "timestamp" ISO string works too).
+
+Usage:
+    # Redis must be running; --spawn starts the API and gateway with uvicorn
+    python tools/replay.py run tools/corpus/sample_burst.jsonl --speed 100 --spawn
+    python tools/replay.py run corpus.jsonl --api http://localhost:8000 --ws ws://localhost:8001/ws/signals
+    # Synthetic corpus with an NFP-like burst
+    python tools/replay.py generate --out nfp.jsonl --duration 600 --burst-at 300 --burst-rate 50
+
+--json writes the report for comparing runs, --max-p95-ms makes the run fail
+(exit 1) when end-to-end p95 latency regresses past a threshold.
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import asyncio
+import argparse
+import tempfile
+import threading
+import subprocess
+import urllib.request
+from datetime import datetime
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+BACKEND_DIR = os.path.join(ROOT, "backend")
+CLIENT_DIR = os.path.join(ROOT, "client", "app")
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, CLIENT_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Timestamps recorded per signal, in pipeline order
+STAGES = ("fed", "parsed", "acked", "received", "written", "executed")
+# name -> (from stage, to stage)
+HOPS = {
+    "parse": ("fed", "parsed"),
+    "api": ("parsed", "acked"),
+    "to_client": ("parsed", "received"), # API + Redis + gateway + WebSocket
+    "bridge": ("received", "written"),
+    "ea_pickup": ("written", "executed"),
+    "end_to_end": ("fed", "executed"),
+}
+
+# --- Corpus ---
+
+def load_corpus(path):
+    messages = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            entry = json.loads(line)
+            if "t" not in entry and "timestamp" in entry:
+                entry["t"] = datetime.fromisoformat(entry["timestamp"].replace("Z", "+00:00")).timestamp()
+            messages.append(entry)
+    if messages:
+        start = messages[0]["t"]
+        for entry in messages:
+            entry["t"] = float(entry["t"]) - start
+    return messages
+
+TEMPLATES = [
+    ("XAUUSD", 2350.0, 2, "{symbol} {side} LIMIT @ {entry}\nSL: {sl}\nTP: {tp}"),
+    ("XAUUSD", 2350.0, 2, "{symbol} {side} AREA {entry}- {entry2}\nSL {sl}\nTP 1 50 PIPS\nTP 2 100 PIPS"),
+    ("EURUSD", 1.0850, 5, "{symbol} {side} STOP @ {entry}\nSL: {sl}\nTP1 {tp}\nTP2 {tp2}"),
+    ("GBPUSD", 1.2650, 5, "{symbol} {side} LIMIT @ {entry} SL {sl} TP {tp}"),
+    ("NAS100", 18250.0, 1, "{symbol} {side} LIMIT @ {entry} SL {sl} TP {tp}"),
+]
+CHATTER = [
+    "good morning traders",
+    "NFP in 5 minutes, careful with size",
+    "market is choppy today",
+    "results this week: +320 pips",
+    "who is still holding gold?",
+]
+
+def generate_corpus(count, duration, burst_at, burst_len, burst_rate, signal_ratio, channels, seed):
+    """Poisson background traffic over `duration` seconds plus one burst window."""
+    rng = random.Random(seed)
+    base_rate = count / duration if duration else 1.0
+    messages, t = [], 0.0
+    while t < duration:
+        in_burst = burst_at is not None and burst_at <= t < burst_at + burst_len
+        t += rng.expovariate(burst_rate if in_burst else base_rate)
+        if rng.random() < signal_ratio:
+            symbol, price, digits, template = rng.choice(TEMPLATES)
+            side = rng.choice(("BUY", "SELL"))
+            step = price * 0.002 * (1 if side == "BUY" else -1)
+            entry = round(price * rng.uniform(0.99, 1.01), digits)
+            content = template.format(symbol=symbol, side=side, entry=entry,
+                                      entry2=round(entry + abs(step) / 2, digits),
+                                      sl=round(entry - step, digits), tp=round(entry + step, digits),
+                                      tp2=round(entry + 2 * step, digits))
+        else:
+            content = rng.choice(CHATTER)
+        messages.append({"t": round(t, 4), "channel_id": rng.choice(channels), "content": content})
+    return messages
+
+# --- Tracing ---
+
+class Trace:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.times = {} # signal id -> {stage: [perf_counter times]}
+
+    def mark(self, signal_id, stage, at=None):
+        at = at if at is not None else time.perf_counter()
+        with self.lock:
+            self.times.setdefault(signal_id, {}).setdefault(stage, []).append(at)
+
+    def in_flight(self):
+        with self.lock:
+            return sum(1 for st in self.times.values() if "parsed" in st and "executed" not in st)
+
+    def last(self, stage):
+        with self.lock:
+            return max((ts[-1] for st in self.times.values() for ts in [st.get(stage)] if ts), default=None)
+
+    def report(self, wall_s):
+        with self.lock:
+            times = {sid: {stage: list(ts) for stage, ts in stages.items()} for sid, stages in self.times.items()}
+
+        parsed = [sid for sid, st in times.items() if "parsed" in st]
+        hops = {}
+        for name, (start, end) in HOPS.items():
+            samples = sorted((st[end][0] - st[start][0]) * 1000
+                             for st in times.values() if start in st and end in st)
+            hops[name] = summarize(samples)
+
+        lost = {}
+        for stage in STAGES[2:]:
+            lost[stage] = sorted(sid for sid in parsed if stage not in times[sid])
+        duplicates = {stage: sorted(sid for sid, st in times.items() if len(st.get(stage, [])) > 1)
+                      for stage in ("received", "written", "executed")}
+        return {
+            "signals": len(parsed),
+            "wall_s": round(wall_s, 3),
+            "throughput_per_s": round(len(parsed) / wall_s, 1) if wall_s else 0.0,
+            "hops_ms": hops,
+            "missing": {stage: ids for stage, ids in lost.items() if ids},
+            "duplicates": {stage: ids for stage, ids in duplicates.items() if ids},
+        }
+
+def summarize(samples):
+    if not samples:
+        return {"count": 0}
+    def pct(p):
+        return round(samples[min(len(samples) - 1, int(p / 100 * len(samples)))], 2)
+    return {"count": len(samples), "p50": pct(50), "p95": pct(95), "p99": pct(99), "max": round(samples[-1], 2)}
+
+def print_report(report):
+    print(f"\nSignals: {report['signals']}  wall: {report['wall_s']}s  ({report['throughput_per_s']}/s)")
+    print(f"{'hop':<12}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, s in report["hops_ms"].items():
+        if s["count"]:
+            print(f"{name:<12}{s['count']:>8}{s['p50']:>10}{s['p95']:>10}{s['p99']:>10}{s['max']:>10}")
+        else:
+            print(f"{name:<12}{0:>8}")
+    for stage, ids in report["missing"].items():
+        print(f"MISSING at {stage}: {len(ids)} (e.g. {', '.join(ids[:3])})")
+    for stage, ids in report["duplicates"].items():
+        print(f"DUPLICATED at {stage}: {len(ids)} (e.g. {', '.join(ids[:3])})")
+    if not report["missing"] and not report["duplicates"]:
+        print("No lost or duplicated signals")
+
+# --- Services ---
+
+def wait_http(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=1)
+            return True
+        except Exception:
+            time.sleep(0.2)
+    return False
+
+def spawn_services(api_port, gateway_port):
+    # Admission control would throttle a 100x replay, open it up for the simulated services
+    env = dict(os.environ, INGEST_RATE="100000", INGEST_BURST="100000",
+               WS_ACCEPT_RATE="1000", WS_RAMP_SECONDS="0", LOG_LEVEL="WARNING",
+               WS_REQUIRE_KEY="false") # the headless worker connects without a license
+    procs = [
+        subprocess.Popen([sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(api_port),
+                          "--log-level", "warning"], cwd=BACKEND_DIR, env=env),
+        subprocess.Popen([sys.executable, "-m", "uvicorn", "app.gateway:app", "--port", str(gateway_port),
+                          "--log-level", "warning"], cwd=BACKEND_DIR, env=env),
+    ]
+    ok = wait_http(f"http://127.0.0.1:{api_port}/") and wait_http(f"http://127.0.0.1:{gateway_port}/")
+    if not ok:
+        stop_services(procs)
+        raise RuntimeError("API/gateway did not start (is Redis running?)")
+    return procs
+
+def stop_services(procs):
+    for proc in procs:
+        proc.terminate()
+    for proc in procs:
+        try:
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+# --- Replay ---
+
+def start_client(ws_url, files_path, trace, bridge_format="envelope"):
+    """Headless SignalWorker -> MT5Bridge, as the desktop client wires them (minus the UI)."""
+    from PySide6.QtCore import Qt
+    from main import SignalWorker
+    from bridge import MT5Bridge
+
+    bridge = MT5Bridge(files_path, bridge_format)
+    worker = SignalWorker(ws_url)
+    connected = threading.Event()
+
+    def on_signal(data):
+        trace.mark(data["id"], "received")
+        if bridge.write_signal(data):
+            trace.mark(data["id"], "written")
+
+    # Direct: run on the worker thread, there is no Qt event loop here
+    worker.signal_received.connect(on_signal, Qt.DirectConnection)
+    worker.status_changed.connect(lambda status: status == "Connected" and connected.set(), Qt.DirectConnection)
+    threading.Thread(target=worker.run, daemon=True).start()
+    return worker, connected
+
+def start_mock_ea(files_path, interval, trace, stop, use_ring=False):
+    from mock_ea import MockEA
+    ea = MockEA(files_path, use_ring=use_ring)
+
+    def loop():
+        while not stop.is_set():
+            for signal in ea.scan():
+                trace.mark(signal["id"], "executed")
+            time.sleep(interval)
+
+    thread = threading.Thread(target=loop, daemon=True)
+    thread.start()
+    return thread
+
+async def feed(messages, speed, api_url, trace, run_id):
+    import aiohttp
+    from bot.main import parse_signal
+
+    signals_url = api_url.rstrip("/") + "/api/v1/signals"
+    start = time.perf_counter()
+    pending = []
+
+    async with aiohttp.ClientSession() as session:
+        async def post(signal):
+            async with session.post(signals_url, json=signal) as response:
+                if response.status == 200:
+                    trace.mark(signal["id"], "acked")
+                else:
+                    print(f"Ingest failed for {signal['id']}: {response.status}")
+
+        for index, message in enumerate(messages):
+            delay = start + message["t"] / speed - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            fed_at = time.perf_counter()
+            signal = parse_signal(message["content"])
+            if not signal:
+                continue
+            # Deterministic id: the same corpus position is the same signal across runs
+            signal["id"] = f"replay-{run_id}-{index:06d}"
+            signal["provider"] = str(message.get("channel_id", "replay"))
+            trace.mark(signal["id"], "fed", fed_at)
+            trace.mark(signal["id"], "parsed")
+            pending.append(asyncio.create_task(post(signal)))
+
+        await asyncio.gather(*pending)
+
+def run(args):
+    messages = load_corpus(args.corpus)
+    if not messages:
+        print("Empty corpus")
+        return 1
+
+    procs = spawn_services(args.api_port, args.gateway_port) if args.spawn else []
+    api_url = f"http://127.0.0.1:{args.api_port}" if args.spawn else args.api
+    ws_url = f"ws://127.0.0.1:{args.gateway_port}/ws/signals" if args.spawn else args.ws
+    files_path = tempfile.mkdtemp(prefix="replay-mql5-")
+    trace = Trace()
+    stop = threading.Event()
+
+    try:
+        worker, connected = start_client(ws_url, files_path, trace, args.bridge)
+        if not connected.wait(15):
+            print(f"Client could not connect to {ws_url}")
+            return 1
+        start_mock_ea(files_path, args.ea_interval, trace, stop, args.bridge == "ring")
+
+        run_id = args.run_id or datetime.now().strftime("%H%M%S")
+        print(f"Replaying {len(messages)} messages ({messages[-1]['t']:.1f}s of traffic) at {args.speed}x")
+        started = time.perf_counter()
+        asyncio.run(feed(messages, args.speed, api_url, trace, run_id))
+
+        # Let the tail of the pipeline drain (anything still missing after this is reported as lost)
+        drain_until = time.monotonic() + args.drain
+        while trace.in_flight() and time.monotonic() < drain_until:
+            time.sleep(0.05)
+        wall = (trace.last("executed") or time.perf_counter()) - started
+        worker.running = False
+        stop.set()
+    finally:
+        stop_services(procs)
+        shutil.rmtree(files_path, ignore_errors=True)
+
+    report = trace.report(wall)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    failed = bool(report["missing"] or report["duplicates"])
+    p95 = report["hops_ms"]["end_to_end"].get("p95")
+    if args.max_p95_ms is not None and (p95 is None or p95 > args.max_p95_ms):
+        print(f"End-to-end p95 {p95} ms exceeds {args.max_p95_ms} ms")
+        failed = True
+    return 1 if failed else 0
+
+def generate(args):
+    channels = [int(c) for c in args.channels.split(",") if c.strip()]
+    messages = generate_corpus(args.count, args.duration, args.burst_at, args.burst_len, args.burst_rate,
+                               args.signal_ratio, channels, args.seed)
+    with open(args.out, "w", encoding="utf-8") as f:
+        for message in messages:
+            f.write(json.dumps(message) + "\n")
+    print(f"Wrote {len(messages)} messages ({messages[-1]['t']:.1f}s) to {args.out}")
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="End-to-end replay simulator")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="Replay a corpus through the full pipeline")
+    run_parser.add_argument("corpus", help="JSON lines corpus")
+    run_parser.add_argument("--speed", type=float, default=1.0, help="Speed-up factor for inter-arrival times")
+    run_parser.add_argument("--api", default="http://127.0.0.1:8000", help="API service URL")
+    run_parser.add_argument("--ws", default="ws://127.0.0.1:8001/ws/signals", help="Gateway WebSocket URL")
+    run_parser.add_argument("--spawn", action="store_true", help="Start the API and gateway with uvicorn")
+    run_parser.add_argument("--api-port", type=int, default=18000)
+    run_parser.add_argument("--gateway-port", type=int, default=18001)
+    run_parser.add_argument("--ea-interval", type=float, default=0.05, help="Mock EA scan interval (s)")
+    run_parser.add_argument("--bridge", choices=("envelope", "ring"), default="envelope",
+                            help="Client -> EA transport: signal files or the shared-memory ring")
+    run_parser.add_argument("--drain", type=float, default=10.0, help="Max seconds to wait for in-flight signals")
+    run_parser.add_argument("--run-id", help="Id prefix for signals (default: time of day)")
+    run_parser.add_argument("--json", help="Write the report to this file")
+    run_parser.add_argument("--max-p95-ms", type=float, help="Fail if end-to-end p95 exceeds this")
+
+    gen_parser = sub.add_parser("generate", help="Write a synthetic corpus")
+    gen_parser.add_argument("--out", required=True)
+    gen_parser.add_argument("--count", type=int, default=600, help="Background messages over the duration")
+    gen_parser.add_argument("--duration", type=float, default=600, help="Seconds of traffic")
+    gen_parser.add_argument("--burst-at", type=float, help="Burst start (s), e.g. an NFP release")
+    gen_parser.add_argument("--burst-len", type=float, default=10)
+    gen_parser.add_argument("--burst-rate", type=float, default=50, help="Messages/s during the burst")
+    gen_parser.add_argument("--signal-ratio", type=float, default=0.3)
+    gen_parser.add_argument("--channels", default="1")
+    gen_parser.add_argument("--seed", type=int, default=1)
+
+    args = parser.parse_args(argv)
+    return run(args) if args.command == "run" else generate(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
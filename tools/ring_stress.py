@@ -0,0 +1,179 @@
+"""
+Stress run for the shared-memory signal ring (client/app/ring.py), Linux/macOS.
+
+Producer threads push signals through MT5Bridge(format="ring") - the same
+encode + copy the client does - while a reader process polls the ring like the
+EA's PollRing, decodes every record (checksum included) and checks that each
+signal arrives exactly once, in order per producer and intact. The ring is kept
+small so it wraps and fills many times; a full ring makes the producer retry.
+
+Reports handoff latency (bridge call -> record seen by the reader) and
+throughput, and exits 1 on any lost, duplicated, reordered or corrupt record.
+--compare-files runs the same signals through the .sig file bridge and the mock
+EA's directory scan for reference.
+
+Usage:
+    python tools/ring_stress.py --count 200000 --producers 4
+    python tools/ring_stress.py --count 20000 --capacity 64 --rate 5000 --compare-files
+"""
+import os
+import sys
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+import threading
+import multiprocessing
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "client", "app"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import ring
+import envelope
+
+def make_signal(producer, n):
+    # The id carries who sent it, its position and when, nothing else is needed to verify it
+    return {"id": f"p{producer}-{n}-{time.monotonic_ns()}", "symbol": "XAUUSD", "type": "BUY_LIMIT",
+            "digits": 2, "pip_size": 0.1, "entry_price": 2000.0 + n % 100, "stop_loss": 1990.0,
+            "take_profit": 2010.0, "take_profit_2": 2020.0, "risk_type": "FIXED", "risk_value": 0.01,
+            "legs": [{"value": 0.01, "tp": 2010.0, "max_lots": 0}, {"value": 0.01, "tp": 2020.0, "max_lots": 0}]}
+
+def summarize(samples_ns):
+    if not samples_ns:
+        return {"count": 0}
+    samples = sorted(samples_ns)
+
+    def pct(p):
+        return round(samples[min(len(samples) - 1, int(p / 100 * len(samples)))] / 1000, 1)
+    return {"count": len(samples), "p50": pct(50), "p99": pct(99), "p999": pct(99.9), "max": round(samples[-1] / 1000, 1)}
+
+def reader(path, expected, poll_us, results):
+    """Reader process: poll, decode and verify until every record arrived or nothing comes for 5 s."""
+    reader = ring.RingReader(ring.RingBuffer(path, create=False))
+    last = {} # producer -> last n
+    latencies, corrupt, duplicates, reordered, received, polls = [], 0, 0, 0, 0, 0
+    idle_since = time.monotonic()
+    while received < expected and time.monotonic() - idle_since < 5:
+        polls += 1
+        records = reader.poll()
+        if not records:
+            if poll_us:
+                time.sleep(poll_us / 1e6)
+            continue
+        now = time.monotonic_ns()
+        idle_since = time.monotonic()
+        for record in records:
+            received += 1
+            try:
+                signal_id = envelope.decode(record.decode("ascii"))["id"]
+                producer, n, sent_ns = signal_id.split("-")
+                n = int(n)
+            except ValueError:
+                corrupt += 1
+                continue
+            latencies.append(now - int(sent_ns))
+            previous = last.get(producer, -1)
+            if n <= previous:
+                duplicates += n == previous
+                reordered += n < previous
+            last[producer] = max(previous, n)
+    results.put({"received": received, "corrupt": corrupt, "duplicates": duplicates, "reordered": reordered,
+                 "polls": polls, "latency_us": summarize(latencies),
+                 "per_producer": {p: n + 1 for p, n in last.items()}})
+
+def run_ring(args, files_path):
+    from bridge import MT5Bridge
+    producer_ring = ring.open_ring(files_path, args.capacity, args.record_size) # the bridges share it
+    results = multiprocessing.Queue()
+    expected = args.count * args.producers
+    process = multiprocessing.Process(target=reader, args=(producer_ring.path, expected, args.poll_us, results))
+    process.start()
+
+    full_retries = [0] * args.producers
+    interval = args.producers / args.rate if args.rate else 0
+
+    def produce(index):
+        bridge = MT5Bridge(files_path, "ring")
+        next_at = time.perf_counter()
+        for n in range(args.count):
+            if interval:
+                next_at += interval
+                delay = next_at - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            signal = make_signal(index, n)
+            while not bridge.write_signal(signal):
+                full_retries[index] += 1
+                time.sleep(0) # ring full: let the reader catch up
+
+    # The bridge logs every full ring as an error, expected here
+    logging.getLogger("bridge").setLevel(logging.CRITICAL)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=produce, args=(i,)) for i in range(args.producers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    produced_s = time.perf_counter() - started
+    report = results.get()
+    process.join()
+    wall_s = time.perf_counter() - started
+
+    report.update({"sent": expected, "full_retries": sum(full_retries), "produce_s": round(produced_s, 3),
+                   "wall_s": round(wall_s, 3), "throughput_per_s": round(expected / wall_s)})
+    report["lost"] = expected - report["received"]
+    return report
+
+def run_files(args, files_path):
+    """Same signals through .sig files: write them all, then one mock EA scan (no concurrency, just cost)."""
+    from bridge import MT5Bridge
+    from mock_ea import MockEA
+    count = args.count * args.producers
+    bridge = MT5Bridge(files_path)
+    ea = MockEA(files_path)
+    started = time.perf_counter()
+    for n in range(count):
+        bridge.write_signal(make_signal(0, n))
+    written = time.perf_counter()
+    executed = len(ea.scan())
+    done = time.perf_counter()
+    return {"sent": count, "executed": executed, "write_us_per_signal": round((written - started) / count * 1e6, 1),
+            "scan_us_per_signal": round((done - written) / count * 1e6, 1)}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stress the shared-memory signal ring")
+    parser.add_argument("--count", type=int, default=100000, help="Signals per producer")
+    parser.add_argument("--producers", type=int, default=2, help="Producer threads (fan-out workers)")
+    parser.add_argument("--capacity", type=int, default=256, help="Ring slots")
+    parser.add_argument("--record-size", type=int, default=ring.DEFAULT_RECORD_SIZE)
+    parser.add_argument("--rate", type=float, default=0, help="Total signals/s, 0 = as fast as possible")
+    parser.add_argument("--poll-us", type=float, default=20,
+                        help="Reader sleep between empty polls, 0 = spin (only sensible with a core to spare)")
+    parser.add_argument("--compare-files", action="store_true", help="Also time the .sig file bridge")
+    args = parser.parse_args(argv)
+
+    files_path = tempfile.mkdtemp(prefix="ring-stress-")
+    try:
+        report = run_ring(args, files_path)
+        latency = report["latency_us"]
+        print(f"Ring: {report['sent']} sent, {report['received']} received in {report['wall_s']}s "
+              f"({report['throughput_per_s']}/s), {report['full_retries']} full-ring retries, {report['polls']} polls")
+        if latency["count"]:
+            print(f"Handoff latency us: p50 {latency['p50']}  p99 {latency['p99']}  p99.9 {latency['p999']}  max {latency['max']}")
+        print(f"Lost {report['lost']}  duplicated {report['duplicates']}  reordered {report['reordered']}  corrupt {report['corrupt']}")
+
+        if args.compare_files:
+            files = run_files(args, os.path.join(files_path, "files"))
+            print(f"Files: {files['executed']}/{files['sent']} executed, write {files['write_us_per_signal']} us/signal, "
+                  f"EA scan + delete {files['scan_us_per_signal']} us/signal")
+    finally:
+        shutil.rmtree(files_path, ignore_errors=True)
+
+    failed = report["lost"] or report["duplicates"] or report["reordered"] or report["corrupt"]
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())